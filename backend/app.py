@@ -1,169 +1,221 @@
-from flask import Flask, request, jsonify, Response, stream_template, send_from_directory
+from flask import Flask, g, request, jsonify, Response, send_from_directory
 from flask_cors import CORS
-import joblib
-import pandas as pd
-import numpy as np
 import json
+import time
 from datetime import datetime
 import os
 
 # Llama entegrasyonu
-from llama_integration import LlamaHealthBot, create_bot_instance, get_quick_health_tips
+from llama_integration import (LlamaHealthBot, OllamaBusy, bot_metrics, create_bot_instance, get_quick_health_tips,
+                               get_fallback_response, DEFAULT_ASSISTANT_MESSAGE,
+                               STREAM_UNAVAILABLE_MESSAGE)
+from metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, HTTP_REQUESTS, METRICS, PREDICTION_STAGE_SECONDS
+from recommendation_index import load_index
+from model_registry import create_model_registry
+from prediction_cache import create_prediction_cache
+from quick_grid import load_quick_grid
+from schema import (CHAT_SCHEMA, HEALTH_RECOMMENDATIONS_SCHEMA, WHAT_IF_SCHEMA, format_errors,
+                    prediction_schema, quick_predict_schema)
+from sse import create_sse_writer
+from static_assets import load_static_assets
+from what_if import parse_sweep, run_sweep
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='../frontend', static_url_path='')
 CORS(app)  # Enable CORS for all routes
 
+# build_assets.py çıktısı (minify, hash'li isimler, gzip/br varyantları); yoksa frontend/ doğrudan sunulur
+static_assets = load_static_assets(
+    os.environ.get('STATIC_DIST_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend', 'dist'))
+)
+# Gövdeyi önündeki proxy'nin göndermesi için (nginx X-Accel / apache X-Sendfile)
+app.config['USE_X_SENDFILE'] = os.environ.get('STATIC_X_SENDFILE', '0') == '1'
+
 # Initialize Llama Health Bot
 health_bot = create_bot_instance()
+health_bot.start_health_monitor()  # Ollama durumu arka planda yenilenir, istekler önbellekten okur
 
-# Load trained model and scaler
-import os
-model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'obesity_model.pkl')
-scaler_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'scaler.pkl')
-
-try:
-    model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    print("Model and Scaler loaded successfully!")
-    print(f"Model path: {model_path}")
-    print(f"Scaler path: {scaler_path}")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    print(f"Tried to load from: {model_path}")
+# /api/chat/stream için token birleştiren SSE yazıcısı
+sse_writer = create_sse_writer()
+
+# warm_recommendations.py ile önceden üretilmiş öneriler (varsa mmap ile açılır)
+recommendation_index_path = os.environ.get(
+    'RECOMMENDATION_INDEX',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'recommendations.idx')
+)
+recommendation_index = load_index(recommendation_index_path)
+if recommendation_index is not None:
+    print(f"Recommendation index loaded: {len(recommendation_index)} buckets")
+
+# Inference motoru: 'flat' (NumPy, düzleştirilmiş orman) veya 'sklearn'
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'flat')
+
+# Sürümlü model registry'si: ilk sürüm açılışta yüklenir, yenileri arka planda
+# doğrulanıp devreye alınır (registry boşsa models/*.pkl kullanılır)
+model_registry = create_model_registry(INFERENCE_ENGINE)
+model_registry.start_watcher()
+if model_registry.active is not None:
+    print(f"Model loaded: version {model_registry.active.version} from {model_registry.active.path}")
+else:
     print("⚠️ Model yüklenemedi, sadece chat özellikleri çalışacak!")
-    model = None
-    scaler = None
-
-# Define feature columns in correct order
-FEATURE_COLUMNS = ['Age', 'Gender', 'Height', 'Weight', 'CALC', 'FAVC', 'FCVC', 
-                   'NCP', 'SCC', 'SMOKE', 'CH2O', 'family_history_with_overweight', 
-                   'FAF', 'TUE', 'CAEC', 'MTRANS', 'BMI']
-
-# Define class labels
-OBESITY_CLASSES = {
-    0: 'Normal Weight',
-    1: 'Overweight Level I', 
-    2: 'Overweight Level II',
-    3: 'Obesity Type I',
-    4: 'Insufficient Weight',
-    5: 'Obesity Type II',
-    6: 'Obesity Type III'
-}
-
-def process_input_data(data):
-    """Process input data and convert to model format"""
-    
-    # Calculate BMI
-    height_m = data['height'] / 100 if data['height'] > 10 else data['height']  # Handle cm/m conversion
-    bmi = round(data['weight'] / (height_m ** 2), 2)
-    
-    # Create feature dictionary in correct order
-    features = {
-        'Age': data['age'],
-        'Gender': 1 if data['gender'].lower() == 'male' else 0,
-        'Height': height_m,
-        'Weight': data['weight'],
-        'CALC': {'no': 0, 'sometimes': 1, 'frequently': 2, 'always': 3}[data['calc'].lower()],
-        'FAVC': 1 if data['favc'].lower() == 'yes' else 0,
-        'FCVC': data['fcvc'],
-        'NCP': data['ncp'],
-        'SCC': 1 if data['scc'].lower() == 'yes' else 0,
-        'SMOKE': 1 if data['smoke'].lower() == 'yes' else 0,
-        'CH2O': data['ch2o'],
-        'family_history_with_overweight': 1 if data['family_history'].lower() == 'yes' else 0,
-        'FAF': data['faf'],
-        'TUE': data['tue'],
-        'CAEC': {'no': 0, 'sometimes': 3, 'frequently': 2, 'always': 4}[data['caec'].lower()],
-        'MTRANS': {'public_transportation': 0, 'walking': 1, 'automobile': 2, 
-                   'motorbike': 3, 'bike': 4}[data['mtrans'].lower()],
-        'BMI': bmi
-    }
-    
-    return features, bmi
+print(f"Inference engine: {INFERENCE_ENGINE}")
+
+# /quick-predict sonuçları için LRU önbellek (model sürümü değişince temizlenir)
+quick_predict_cache = create_prediction_cache()
+
+# build_quick_grid.py ile önceden hesaplanmış quick-predict ızgarası (varsa mmap ile açılır)
+quick_grid = load_quick_grid(
+    os.environ.get('QUICK_PREDICT_GRID',
+                   os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'quick_grid')),
+    mode=os.environ.get('QUICK_PREDICT_GRID_MODE', 'nearest')
+)
+if quick_grid is not None:
+    print(f"Quick-predict grid loaded: {len(quick_grid)} cells for model version {quick_grid.model_version}")
+
+# /metrics: istek süreleri ve doğrulama aşaması
+VALIDATION_SECONDS = PREDICTION_STAGE_SECONDS.labels('validation')
+
+
+def service_metrics():
+    """/metrics collector'ı: aktif model, quick-predict önbelleği ve ızgarası"""
+    active = model_registry.active
+    yield ('model_info', 'gauge', 'Aktif model sürümü',
+           [({'version': active.version, 'format': active.artifact_format}, 1)] if active else [])
+    if quick_predict_cache is not None:
+        stats = quick_predict_cache.stats()
+        yield ('quick_predict_cache_lookups_total', 'counter', 'Quick-predict önbellek aramaları',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+        yield ('quick_predict_cache_evictions_total', 'counter', 'LRU tahliyeleri', [({}, stats['evictions'])])
+        yield ('quick_predict_cache_entries', 'gauge', 'Önbellekteki sonuçlar', [({}, stats['entries'])])
+    if quick_grid is not None:
+        stats = quick_grid.stats()
+        yield ('quick_predict_grid_lookups_total', 'counter', 'Quick-predict ızgara aramaları',
+               [({'result': result}, stats[result]) for result in ('hits', 'out_of_grid', 'version_mismatch')])
+
+
+METRICS.add_collector('service', service_metrics)
+METRICS.add_collector('chat', lambda: bot_metrics(health_bot))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Etiket olarak URL kuralı kullanılır (örn. /api/chat/sessions/<session_id>)
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    return response
+
+
+def validation_error(errors):
+    """Şema hataları için 400 yanıtı (tüm alan hataları birlikte)"""
+    return jsonify({
+        "error": f"Invalid request: {format_errors(errors)}",
+        "errors": errors,
+        "success": False
+    }), 400
+
+
+def explain_requested() -> bool:
+    """?explain=true: tahmin edilen sınıf için feature katkıları da döndürülür"""
+    return request.args.get('explain', '').lower() in ('1', 'true', 'yes')
+
+
+def explain_unavailable():
+    return jsonify({
+        "error": "Feature attribution is only available for tree ensemble models",
+        "success": False
+    }), 400
+
+
+# Toplu tahmin limitleri
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonlines')
+
+def serve_static(filename):
+    """Build edilmiş statik dosyalar (cache/ETag/sıkıştırma) veya frontend/ dizini"""
+    if static_assets is not None:
+        asset = static_assets.get(filename)
+        if asset is not None:
+            return static_assets.response(asset, request)
+    return send_from_directory(app.static_folder, filename)
+
+# Flask'ın /<path:filename> statik endpoint'i de aynı yoldan geçer
+app.view_functions['static'] = serve_static
 
 @app.route('/', methods=['GET'])
 def home():
     """Serve frontend homepage"""
-    return send_from_directory(app.static_folder, 'index.html')
+    return serve_static('index.html')
 
 @app.route('/chat')
 def chat_page():
     """Serve chat page"""
-    return send_from_directory(app.static_folder, 'chat.html')
+    return serve_static('chat.html')
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metin formatında metrikler"""
+    return Response(METRICS.render(), content_type=CONTENT_TYPE)
 
 @app.route('/api/status', methods=['GET'])
 def api_status():
     """Health check endpoint"""
+    active = model_registry.active
     return jsonify({
         "message": "Obesity Prediction API is running!",
         "status": "healthy",
-        "model_loaded": model is not None
+        "model_loaded": active is not None,
+        "model_version": active.version if active is not None else None,
+        "model_registry": model_registry.status(),
+        "inference_engine": INFERENCE_ENGINE,
+        "scoring_timings": active.scoring.timings.snapshot() if active is not None else None,
+        "quick_predict_cache": quick_predict_cache.stats() if quick_predict_cache else None,
+        "quick_predict_grid": quick_grid.stats() if quick_grid else None
     })
 
 @app.route('/predict', methods=['POST'])
 def predict_obesity():
     """Main prediction endpoint"""
     try:
-        # Check if model is loaded
-        if model is None or scaler is None:
+        # Check if model is loaded (istek boyunca aynı sürüm kullanılır)
+        active = model_registry.active
+        if active is None:
             return jsonify({
                 "error": "Model not loaded properly",
                 "success": False
             }), 500
         
-        # Get JSON data
-        data = request.get_json()
+        # Parse, validate and normalize the body in one pass (modelin kategori tablolarıyla)
+        started = time.perf_counter()
+        data, errors = prediction_schema(active.scoring.encoder).decode(request.get_data())
+        VALIDATION_SECONDS.observe(time.perf_counter() - started)
+        if errors:
+            return validation_error(errors)
         
-        # Validate required fields
-        required_fields = ['gender', 'age', 'height', 'weight', 'family_history', 
-                          'favc', 'fcvc', 'ncp', 'caec', 'smoke', 'ch2o', 'scc', 
-                          'faf', 'tue', 'calc', 'mtrans']
+        explain = explain_requested()
+        if explain and not active.scoring.explainable:
+            return explain_unavailable()
         
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({
-                "error": f"Missing required fields: {missing_fields}",
-                "success": False
-            }), 400
-        
-        # Process input data
-        features, bmi = process_input_data(data)
-        
-        # Convert to DataFrame
-        input_df = pd.DataFrame([features])
-        input_df = input_df[FEATURE_COLUMNS]  # Ensure correct column order
-        
-        # Scale the input
-        input_scaled = scaler.transform(input_df)
-        
-        # Make prediction
-        prediction = model.predict(input_scaled)[0]
-        prediction_proba = model.predict_proba(input_scaled)[0]
-        
-        # Prepare response
-        predicted_class = OBESITY_CLASSES[prediction]
-        confidence = float(prediction_proba[prediction] * 100)
-        
-        # All class probabilities
-        all_probabilities = {}
-        for i, prob in enumerate(prediction_proba):
-            all_probabilities[OBESITY_CLASSES[i]] = float(prob * 100)
+        # Encode, scale and score once (probabilities -> argmax)
+        result = active.scoring.score(data, explain=explain)
         
         response = {
             "success": True,
-            "prediction": {
-                "bmi": bmi,
-                "predicted_class": predicted_class,
-                "confidence": round(confidence, 1),
-                "all_probabilities": all_probabilities
-            },
+            "prediction": result.to_prediction(),
+            "model_version": active.version,
             "input_data": {
                 "age": data['age'],
                 "gender": data['gender'],
                 "height": data['height'],
                 "weight": data['weight'],
-                "bmi": bmi
+                "bmi": result.bmi
             }
         }
         
@@ -180,69 +232,183 @@ def predict_obesity():
             "success": False
         }), 500
 
-@app.route('/quick-predict', methods=['POST'])
-def quick_predict():
-    """Simple prediction with minimal inputs"""
+def parse_batch_records():
+    """JSON array veya NDJSON gövdesinden kayıt listesini ve satır hatalarını oku"""
+    line_errors = {}
+
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = []
+        lines = [line for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        for i, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                records.append(None)
+                line_errors[i] = [{"field": None, "message": f"Invalid JSON: {e.msg}"}]
+        return records, line_errors
+
+    # Bozuk gövde BadRequest fırlatmasın, 400 "Invalid JSON" dönsün
+    data = request.get_json(silent=True)
+    if data is None and request.is_json:
+        raise ValueError("Invalid JSON: body could not be parsed")
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError("Body must be a JSON array, an object with a 'records' array, or NDJSON")
+    return data, line_errors
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Toplu tahmin endpoint'i (JSON array veya NDJSON)"""
     try:
-        if model is None or scaler is None:
+        active = model_registry.active
+        if active is None:
             return jsonify({
                 "error": "Model not loaded properly",
                 "success": False
             }), 500
-        
-        data = request.get_json()
-        
-        # Validate required fields for quick prediction
-        required_fields = ['gender', 'age', 'height', 'weight']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
+
+        started = time.perf_counter()
+        try:
+            records, line_errors = parse_batch_records()
+        except ValueError as e:
             return jsonify({
-                "error": f"Missing required fields: {missing_fields}",
+                "error": str(e),
                 "success": False
             }), 400
+
+        explain = explain_requested()
+        if explain and not active.scoring.explainable:
+            return explain_unavailable()
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({
+                "error": f"Batch too large: {len(records)} records (max {MAX_BATCH_SIZE})",
+                "success": False
+            }), 413
+
+        # Her kayıt /predict ile aynı şemadan geçer (aynı aralıklar, aynı hata formatı)
+        schema = prediction_schema(active.scoring.encoder)
+        results = [None] * len(records)
+        valid_records, valid_index = [], []
+        for index, record in enumerate(records):
+            if index in line_errors:
+                errors = line_errors[index]
+            elif type(record) is not dict:
+                errors = [{"field": None, "message": "Record must be a JSON object"}]
+            else:
+                record, errors = schema.validate(record)
+            if errors:
+                results[index] = {"index": index, "success": False, "errors": errors}
+            else:
+                valid_records.append(record)
+                valid_index.append(index)
+        VALIDATION_SECONDS.observe(time.perf_counter() - started)
+
+        # Geçerli kayıtları tek matrise encode et, tek seferde ölçekle ve tahmin et
+        _, scored, _ = active.scoring.score_records(valid_records, explain=explain)
+        for index, result in zip(valid_index, scored):
+            results[index] = {
+                "index": index,
+                "success": True,
+                "prediction": result.to_prediction()
+            }
+
+        return jsonify({
+            "success": True,
+            "model_version": active.version,
+            "total": len(records),
+            "succeeded": len(valid_index),
+            "failed": len(records) - len(valid_index),
+            "results": results
+        })
+
+    except Exception as e:
+        return jsonify({
+            "error": f"Batch prediction failed: {str(e)}",
+            "success": False
+        }), 500
+
+@app.route('/predict/what-if', methods=['POST'])
+def predict_what_if():
+    """Profil etrafında bir veya iki sayısal alanı tarayan olasılık yüzeyi (tek orman geçişi)"""
+    try:
+        active = model_registry.active
+        if active is None:
+            return jsonify({
+                "error": "Model not loaded properly",
+                "success": False
+            }), 500
+
+        started = time.perf_counter()
+        body, errors = WHAT_IF_SCHEMA.decode(request.get_data())
+        if not errors:
+            profile, profile_errors = prediction_schema(active.scoring.encoder).validate(body['profile'])
+            axes, errors = parse_sweep(body['sweep'])
+            errors = [{"field": f"profile.{error['field']}" if error['field'] else 'profile',
+                       "message": error['message']} for error in profile_errors] + errors
+        VALIDATION_SECONDS.observe(time.perf_counter() - started)
+        if errors:
+            return validation_error(errors)
+
+        # Izgara + profil tek matriste encode edilir, ölçeklenir ve skorlanır
+        base, sweep = run_sweep(active.scoring, profile, axes)
+
+        return jsonify({
+            "success": True,
+            "model_version": active.version,
+            "prediction": base.to_prediction(),
+            "sweep": sweep
+        })
+
+    except KeyError as e:
+        return jsonify({
+            "error": f"Invalid value for field: {str(e)}",
+            "success": False
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": f"What-if sweep failed: {str(e)}",
+            "success": False
+        }), 500
+
+@app.route('/quick-predict', methods=['POST'])
+def quick_predict():
+    """Simple prediction with minimal inputs"""
+    try:
+        active = model_registry.active
+        if active is None:
+            return jsonify({
+                "error": "Model not loaded properly",
+                "success": False
+            }), 500
         
-        # Add default values
-        full_data = {
-            **data,
-            'family_history': 'no',
-            'favc': 'no', 
-            'fcvc': 2,
-            'ncp': 3,
-            'caec': 'sometimes',
-            'smoke': 'no',
-            'ch2o': 2,
-            'scc': 'no',
-            'faf': 1,
-            'tue': 1,
-            'calc': 'sometimes',
-            'mtrans': 'automobile'
-        }
-        
-        # Process and predict
-        features, bmi = process_input_data(full_data)
-        input_df = pd.DataFrame([features])
-        input_df = input_df[FEATURE_COLUMNS]
-        input_scaled = scaler.transform(input_df)
-        
-        prediction = model.predict(input_scaled)[0]
-        prediction_proba = model.predict_proba(input_scaled)[0]
-        
-        predicted_class = OBESITY_CLASSES[prediction]
-        confidence = float(prediction_proba[prediction] * 100)
+        # gender/age/height/weight doğrulanır, diğer alanlar varsayılan değerlerle doldurulur
+        started = time.perf_counter()
+        data, errors = quick_predict_schema(active.scoring.encoder).decode(request.get_data())
+        VALIDATION_SECONDS.observe(time.perf_counter() - started)
+        if errors:
+            return validation_error(errors)
+        
+        # Önce ızgara (dizi index'i), ızgara dışındaysa model (tekrarlanan girdiler önbellekten)
+        result = quick_grid.predict(active.version, active.scoring, data) if quick_grid else None
+        precomputed, cached = result is not None, False
+        if result is None and quick_predict_cache is not None:
+            result, cached = active.scoring.score_cached(data, quick_predict_cache, active.version)
+        elif result is None:
+            result = active.scoring.score(data)
         
         response = {
             "success": True,
-            "prediction": {
-                "bmi": bmi,
-                "predicted_class": predicted_class,
-                "confidence": round(confidence, 1)
-            },
+            "prediction": result.to_prediction(include_probabilities=False),
+            "model_version": active.version,
+            "cached": cached,
+            "precomputed": precomputed,
             "input_data": {
                 "age": data['age'],
                 "gender": data['gender'],
                 "height": data['height'],
                 "weight": data['weight'],
-                "bmi": bmi
+                "bmi": result.bmi
             },
             "note": "Quick prediction uses default values for detailed health parameters"
         }
@@ -259,16 +425,18 @@ def quick_predict():
 def chat_status():
     """Llama chatbot servis durumunu kontrol et"""
     try:
-        ollama_status = health_bot.check_ollama_status()
-        model_status = health_bot.check_model_availability() if ollama_status else False
+        health = health_bot.health_snapshot()
         
         return jsonify({
             "success": True,
             "status": {
-                "ollama_running": ollama_status,
-                "model_available": model_status,
+                **health,
                 "model_name": health_bot.model_name,
-                "fallback_available": True  # Her zaman temel öneriler verebiliriz
+                "fallback_available": True,  # Her zaman temel öneriler verebiliriz
+                "connection": health_bot.connection_stats(),
+                "response_cache": health_bot.response_cache.stats() if health_bot.response_cache else None,
+                "scheduler": health_bot.scheduler.stats() if health_bot.scheduler else None,
+                "sessions": health_bot.sessions.stats() if health_bot.sessions else None
             }
         })
     except Exception as e:
@@ -281,49 +449,34 @@ def chat_status():
 def chat_with_assistant():
     """Sağlık asistanı ile sohbet et (normal response)"""
     try:
-        data = request.get_json()
-        
-        # Gerekli alanları kontrol et
-        if 'message' not in data:
-            return jsonify({
-                "success": False,
-                "error": "Message field is required"
-            }), 400
+        data, errors = CHAT_SCHEMA.decode(request.get_data())
+        if errors:
+            return validation_error(errors)
         
         user_message = data['message']
         context = data.get('context', None)  # Obezite tahmin sonuçları vs.
+        # Çok turlu sohbet: istemci önceki yanıttaki session_id'yi geri gönderir
+        session = health_bot.open_session(data.get('session_id'), context)
         
-        # Ollama mevcut mu kontrol et
-        if health_bot.check_ollama_status() and health_bot.check_model_availability():
-            # Llama ile yanıt üret
-            response_text = health_bot.generate_chat_response(user_message, context)
+        # Ollama mevcut mu kontrol et (önbellekten, ağ çağrısı yok)
+        llama_used = health_bot.is_available()
+        if llama_used:
+            # Llama ile yanıt üret; Ollama kuyruğu bütçeyi aşıyorsa beklemeden fallback
+            try:
+                response_text = health_bot.generate_chat_response(user_message, context, session=session)
+            except OllamaBusy:
+                llama_used = False
+                response_text = get_fallback_response(context, DEFAULT_ASSISTANT_MESSAGE)
         else:
             # Fallback: Temel sağlık önerileri
-            if context and 'predicted_class' in context:
-                bmi = context.get('bmi', 0)
-                obesity_class = context.get('predicted_class', 'Normal Weight')
-                response_text = get_quick_health_tips(obesity_class, bmi)
-            else:
-                response_text = """
-🏥 **Sağlık Asistanı**
-
-Merhaba! Size yardımcı olmak için buradayım. 
-
-🎯 **Yapabileceklerim:**
-- Obezite ve beslenme konularında bilgi verebilirim
-- Egzersiz önerileri sunabilirim  
-- Sağlıklı yaşam ipuçları paylaşabilirim
-
-⚠️ **Önemli:** Ben bir sağlık asistanıyım, tıbbi tanı koymam. Ciddi sağlık sorunları için mutlaka doktorunuza danışın.
-
-Size nasıl yardımcı olabilirim?
-"""
+            response_text = get_fallback_response(context, DEFAULT_ASSISTANT_MESSAGE)
         
         return jsonify({
             "success": True,
             "response": response_text,
             "timestamp": datetime.now().isoformat(),
-            "llama_used": health_bot.check_ollama_status()
+            "llama_used": llama_used,
+            "session_id": session.session_id if session else None
         })
         
     except Exception as e:
@@ -336,54 +489,45 @@ Size nasıl yardımcı olabilirim?
 def chat_stream():
     """Streaming sohbet endpoint'i"""
     try:
-        data = request.get_json()
-        
-        if 'message' not in data:
-            return jsonify({
-                "success": False,
-                "error": "Message field is required"
-            }), 400
+        data, errors = CHAT_SCHEMA.decode(request.get_data())
+        if errors:
+            return validation_error(errors)
         
         user_message = data['message']
         context = data.get('context', None)
-        
-        def generate_stream():
-            """Streaming response generator"""
-            try:
-                if health_bot.check_ollama_status() and health_bot.check_model_availability():
-                    # Llama streaming response
-                    for chunk in health_bot.generate_streaming_response(user_message, context):
-                        yield f"data: {json.dumps({'chunk': chunk, 'done': False})}\n\n"
-                    
-                    yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                else:
-                    # Fallback response
-                    if context and 'predicted_class' in context:
-                        bmi = context.get('bmi', 0)
-                        obesity_class = context.get('predicted_class', 'Normal Weight')
-                        response_text = get_quick_health_tips(obesity_class, bmi)
-                    else:
-                        response_text = "Üzgünüm, şu anda Llama servisi çalışmıyor. Temel sağlık önerileri için lütfen Ollama'yı başlatın."
-                    
-                    # Kelime kelime stream simülasyonu
-                    words = response_text.split()
-                    for word in words:
-                        yield f"data: {json.dumps({'chunk': word + ' ', 'done': False})}\n\n"
-                    
-                    yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
-                    
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e), 'done': True})}\n\n"
+        session = health_bot.open_session(data.get('session_id'), context)
+        done_event = {'chunk': '', 'done': True, 'session_id': session.session_id if session else None}
+        
+        def text_chunks():
+            """Llama (veya kuyruk doluysa / Ollama yoksa fallback) metin parçaları"""
+            if health_bot.is_available():
+                try:
+                    yield from health_bot.generate_streaming_response(user_message, context, session=session)
+                    return
+                except OllamaBusy:
+                    # Kuyruk dolu: ilk chunk'tan önce fallback'e geç
+                    pass
+            
+            # Fallback response: parçalar SSE yazıcısında frame'lere birleştirilir
+            yield from LlamaHealthBot.replay_chunks(get_fallback_response(context, STREAM_UNAVAILABLE_MESSAGE))
+        
+        # Token'lar boyut/zaman penceresine göre birleştirilir; istemci izin verirse gzip
+        content_encoding = sse_writer.content_encoding(request.headers.get('Accept-Encoding'))
+        headers = {
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type'
+        }
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+            headers['Vary'] = 'Accept-Encoding'
         
         return Response(
-            generate_stream(),
+            sse_writer.stream(text_chunks(), done_event, content_encoding),
             mimetype='text/event-stream',
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            }
+            headers=headers
         )
         
     except Exception as e:
@@ -392,26 +536,39 @@ def chat_stream():
             "error": f"Streaming chat failed: {str(e)}"
         }), 500
 
+@app.route('/api/chat/sessions/<session_id>', methods=['DELETE'])
+def close_chat_session(session_id):
+    """Sohbet oturumunu sonlandır (istemci sohbeti temizlediğinde)"""
+    closed = health_bot.sessions.close(session_id) if health_bot.sessions else False
+    return jsonify({
+        "success": True,
+        "closed": closed
+    })
+
 @app.route('/api/health-recommendations', methods=['POST'])
 def get_health_recommendations():
     """Obezite tahmin sonuçlarına özel sağlık önerileri"""
     try:
-        data = request.get_json()
-        
         # Prediction data ve user input kontrolü
-        if 'prediction' not in data or 'user_input' not in data:
-            return jsonify({
-                "success": False,
-                "error": "Both prediction and user_input fields are required"
-            }), 400
+        data, errors = HEALTH_RECOMMENDATIONS_SCHEMA.decode(request.get_data())
+        if errors:
+            return validation_error(errors)
         
         prediction_data = data['prediction']
         user_input = data['user_input']
         
-        # Llama ile kişiselleştirilmiş öneriler al
-        if health_bot.check_ollama_status() and health_bot.check_model_availability():
-            recommendations = health_bot.get_health_recommendations(prediction_data, user_input)
-        else:
+        # Önce önceden üretilmiş öneriler, sonra Llama, en son fallback. Kova metni
+        # kovanın tipik profili için yazılmıştır, bu yüzden kişiselleştirilmiş sayılmaz
+        precomputed = recommendation_index.get(prediction_data, user_input) if recommendation_index else None
+        personalized = precomputed is None and health_bot.is_available()
+        if precomputed is not None:
+            recommendations = precomputed
+        elif personalized:
+            try:
+                recommendations = health_bot.get_health_recommendations(prediction_data, user_input)
+            except OllamaBusy:
+                personalized = False
+        if precomputed is None and not personalized:
             # Fallback öneriler
             obesity_class = prediction_data.get('predicted_class', 'Normal Weight')
             bmi = prediction_data.get('bmi', 0)
@@ -421,7 +578,8 @@ def get_health_recommendations():
             "success": True,
             "recommendations": recommendations,
             "timestamp": datetime.now().isoformat(),
-            "personalized": health_bot.check_ollama_status()
+            "personalized": personalized,
+            "precomputed": precomputed is not None
         })
         
     except Exception as e:
@@ -434,9 +592,14 @@ if __name__ == '__main__':
     print("Starting Obesity Prediction API...")
     print("API Endpoints:")
     print("   GET  / - Health check")
-    print("   POST /predict - Full prediction")
+    print("   POST /predict - Full prediction (?explain=true: feature contributions)")
+    print("   POST /predict/batch - Batch prediction (JSON array or NDJSON)")
+    print("   POST /predict/what-if - Probability surface over one or two swept fields")
     print("   POST /quick-predict - Quick prediction")
     print("   POST /api/chat - Chat with health assistant")
     print("   POST /api/chat/stream - Streaming chat")
     print("   GET  /api/chat/status - Check Llama service status")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    print("   GET  /metrics - Prometheus metrics")
+    # Yük testleri FLASK_DEBUG=0 ile (reloader ve debugger olmadan) çalıştırır
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0',
+            port=int(os.environ.get('FLASK_PORT', 5000)))
\ No newline at end of file
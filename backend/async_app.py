@@ -0,0 +1,254 @@
+"""
+Chat endpoint'leri için asyncio tabanlı sunucu (aiohttp)
+/api/chat, /api/chat/stream, /api/chat/status, /api/chat/sessions/<id>,
+/api/health-recommendations ve /metrics
+Flask uygulamasıyla aynı JSON ve SSE formatını kullanır; stream'ler worker
+thread tutmadığı için tahmin endpoint'lerini bloklamaz.
+
+Kullanım: python async_app.py  (port: ASYNC_CHAT_PORT, varsayılan 5001)
+OLLAMA_POOL_SIZE bu modda Ollama'ya açık eşzamanlı bağlantı üst sınırıdır;
+üretim istekleri ayrıca OLLAMA_MAX_CONCURRENCY zamanlayıcısından geçer.
+"""
+
+import os
+import time
+from datetime import datetime
+
+from aiohttp import web
+
+from async_llama import AsyncLlamaHealthBot
+from recommendation_index import load_index
+from sse import SSEWriter, create_sse_writer
+from llama_integration import (OllamaBusy, bot_metrics, create_bot_instance, get_fallback_response,
+                               get_quick_health_tips, DEFAULT_ASSISTANT_MESSAGE, STREAM_UNAVAILABLE_MESSAGE)
+from metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, HTTP_REQUESTS, METRICS
+from schema import CHAT_SCHEMA, HEALTH_RECOMMENDATIONS_SCHEMA, format_errors
+
+SSE_HEADERS = {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'X-Accel-Buffering': 'no',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+
+
+# Uygulama durumu anahtarları
+HEALTH_BOT = web.AppKey('health_bot', AsyncLlamaHealthBot)
+STREAM_STATS = web.AppKey('stream_stats', dict)
+SSE_WRITER = web.AppKey('sse_writer', SSEWriter)
+RECOMMENDATION_INDEX = web.AppKey('recommendation_index', object)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'models', 'recommendations.idx')
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """Flask-CORS ile aynı davranış: tüm origin'lere izin ver"""
+    if request.method == 'OPTIONS':
+        response = web.Response()
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, DELETE, OPTIONS'
+    return response
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Endpoint (route şablonu) bazında istek sayısı ve süresi; stream'lerde tüm akış dahil"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        route = request.match_info.route.resource
+        endpoint = route.canonical if route is not None else 'unmatched'
+        HTTP_REQUESTS.labels(endpoint, request.method, status).inc()
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - started)
+
+
+async def metrics(request):
+    """Prometheus metin formatında metrikler"""
+    return web.Response(body=METRICS.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def decode_body(request, schema):
+    """Gövdeyi şemayla parse edip doğrula; hata varsa (None, 400 yanıtı) döner"""
+    data, errors = schema.decode(await request.read())
+    if errors:
+        return None, web.json_response({
+            "success": False,
+            "error": f"Invalid request: {format_errors(errors)}",
+            "errors": errors
+        }, status=400)
+    return data, None
+
+
+async def chat_status(request):
+    """Llama chatbot servis durumunu kontrol et"""
+    bot = request.app[HEALTH_BOT]
+    return web.json_response({
+        "success": True,
+        "status": {
+            **bot.health_snapshot(),
+            "model_name": bot.model_name,
+            "fallback_available": True,
+            "connection": bot.connection_stats(),
+            "response_cache": bot.response_cache.stats() if bot.response_cache else None,
+            "scheduler": bot.scheduler.stats() if bot.scheduler else None,
+            "sessions": bot.sessions.stats() if bot.sessions else None,
+            "active_streams": request.app[STREAM_STATS]['active']
+        }
+    })
+
+
+async def chat(request):
+    """Sağlık asistanı ile sohbet et (normal response)"""
+    bot = request.app[HEALTH_BOT]
+    data, error_response = await decode_body(request, CHAT_SCHEMA)
+    if error_response is not None:
+        return error_response
+
+    context = data.get('context', None)
+    session = bot.open_session(data.get('session_id'), context)
+    llama_used = bot.is_available()
+    if llama_used:
+        try:
+            response_text = await bot.generate_chat_response(data['message'], context, session=session)
+        except OllamaBusy:
+            llama_used = False
+    if not llama_used:
+        response_text = get_fallback_response(context, DEFAULT_ASSISTANT_MESSAGE)
+
+    return web.json_response({
+        "success": True,
+        "response": response_text,
+        "timestamp": datetime.now().isoformat(),
+        "llama_used": llama_used,
+        "session_id": session.session_id if session else None
+    })
+
+
+async def chat_stream(request):
+    """Streaming sohbet endpoint'i (SSE)"""
+    bot = request.app[HEALTH_BOT]
+    data, error_response = await decode_body(request, CHAT_SCHEMA)
+    if error_response is not None:
+        return error_response
+
+    user_message = data['message']
+    context = data.get('context', None)
+    session = bot.open_session(data.get('session_id'), context)
+
+    async def text_chunks():
+        if bot.is_available():
+            try:
+                async for chunk in bot.generate_streaming_response(user_message, context, session=session):
+                    yield chunk
+                return
+            except OllamaBusy:
+                # Kuyruk dolu: ilk chunk'tan önce fallback'e geç
+                pass
+        for chunk in bot.replay_chunks(get_fallback_response(context, STREAM_UNAVAILABLE_MESSAGE)):
+            yield chunk
+
+    writer = request.app[SSE_WRITER]
+    content_encoding = writer.content_encoding(request.headers.get('Accept-Encoding'))
+    response = web.StreamResponse(headers=SSE_HEADERS)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+    await response.prepare(request)
+    request.app[STREAM_STATS]['active'] += 1
+    done_event = {'chunk': '', 'done': True, 'session_id': session.session_id if session else None}
+    try:
+        async for data in writer.stream_async(text_chunks(), done_event, content_encoding):
+            await response.write(data)
+    except ConnectionResetError:
+        # İstemci bağlantıyı kapattı
+        pass
+    finally:
+        request.app[STREAM_STATS]['active'] -= 1
+
+    return response
+
+
+async def close_chat_session(request):
+    """Sohbet oturumunu sonlandır (istemci sohbeti temizlediğinde)"""
+    bot = request.app[HEALTH_BOT]
+    closed = bot.sessions.close(request.match_info['session_id']) if bot.sessions else False
+    return web.json_response({"success": True, "closed": closed})
+
+
+async def health_recommendations(request):
+    """Obezite tahmin sonuçlarına özel sağlık önerileri"""
+    bot = request.app[HEALTH_BOT]
+    data, error_response = await decode_body(request, HEALTH_RECOMMENDATIONS_SCHEMA)
+    if error_response is not None:
+        return error_response
+
+    prediction_data = data['prediction']
+    index = request.app[RECOMMENDATION_INDEX]
+    precomputed = index.get(prediction_data, data['user_input']) if index else None
+    # Kova metni kovanın tipik profili için yazılmıştır, kişiselleştirilmiş sayılmaz
+    personalized = precomputed is None and bot.is_available()
+    if precomputed is not None:
+        recommendations = precomputed
+    elif personalized:
+        try:
+            recommendations = await bot.get_health_recommendations(prediction_data, data['user_input'])
+        except OllamaBusy:
+            personalized = False
+    if precomputed is None and not personalized:
+        recommendations = get_quick_health_tips(prediction_data.get('predicted_class', 'Normal Weight'),
+                                                prediction_data.get('bmi', 0))
+
+    return web.json_response({
+        "success": True,
+        "recommendations": recommendations,
+        "timestamp": datetime.now().isoformat(),
+        "personalized": personalized,
+        "precomputed": precomputed is not None
+    })
+
+
+def create_app(bot: AsyncLlamaHealthBot = None) -> web.Application:
+    """aiohttp uygulamasını oluştur; bot verilmezse ortam değişkenlerinden kurulur"""
+    app = web.Application(middlewares=[metrics_middleware, cors_middleware])
+    app[HEALTH_BOT] = bot or create_bot_instance(AsyncLlamaHealthBot)
+    METRICS.add_collector('chat', lambda: bot_metrics(app[HEALTH_BOT]))
+    app[STREAM_STATS] = {'active': 0}
+    app[SSE_WRITER] = create_sse_writer()
+    app[RECOMMENDATION_INDEX] = load_index(os.environ.get('RECOMMENDATION_INDEX', DEFAULT_INDEX_PATH))
+
+    async def on_startup(app):
+        await app[HEALTH_BOT].start()
+
+    async def on_cleanup(app):
+        await app[HEALTH_BOT].close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_get('/api/chat/status', chat_status)
+    app.router.add_post('/api/chat', chat)
+    app.router.add_post('/api/chat/stream', chat_stream)
+    app.router.add_delete('/api/chat/sessions/{session_id}', close_chat_session)
+    app.router.add_post('/api/health-recommendations', health_recommendations)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('ASYNC_CHAT_PORT', 5001))
+    print(f"Starting async chat gateway on port {port}...")
+    web.run_app(create_app(), host='0.0.0.0', port=port)
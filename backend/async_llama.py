@@ -0,0 +1,197 @@
+"""
+LlamaHealthBot'un asyncio varyantı
+aiohttp istemcisi ile Ollama'ya bloklamadan bağlanır; tek event loop
+üzerinde yüzlerce eşzamanlı stream taşınabilir
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import nullcontext
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import aiohttp
+
+from chat_sessions import ChatSession
+from llama_integration import (LLM_TTFT_SECONDS, OLLAMA_ERRORS, LlamaHealthBot, OllamaError,
+                               RECOMMENDATION_MESSAGE, observe_generation)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLlamaHealthBot(LlamaHealthBot):
+    """aiohttp tabanlı, coroutine döndüren LlamaHealthBot"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Senkron requests session'ı bu varyantta kullanılmaz
+        self.session.close()
+        self.http: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """Event loop içinde HTTP havuzunu ve sağlık monitörünü başlat"""
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+        self.http = aiohttp.ClientSession(connector=connector)
+        self._monitor = asyncio.create_task(self._monitor_loop_async())
+
+    async def close(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+        if self.http is not None:
+            await self.http.close()
+
+    def _async_slot(self):
+        """Zamanlayıcı slotu; event loop bloklanmadan beklenir"""
+        return self.scheduler.async_slot() if self.scheduler is not None else nullcontext()
+
+    def _timeout(self, read_timeout: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=read_timeout)
+
+    async def _probe_health_async(self) -> None:
+        try:
+            with self._timed('tags'):
+                async with self.http.get(f"{self.ollama_url}/api/tags", timeout=self._timeout(5)) as response:
+                    running = response.status == 200
+                    available = self._parse_tags(await response.json()) if running else False
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            OLLAMA_ERRORS.labels('health_check').inc()
+            logger.warning(f"Ollama sağlık kontrolü başarısız: {e}")
+            running = available = False
+
+        self._update_health(running, available)
+
+    async def _monitor_loop_async(self) -> None:
+        while True:
+            # Beklenmeyen hatalar task'ı bitirmemeli (CancelledError Exception değildir, kapanış etkilenmez)
+            try:
+                if not self.health_snapshot()["circuit_open"]:
+                    await self._probe_health_async()
+            except Exception as e:
+                self._monitor_failed(e)
+            await asyncio.sleep(self.health_ttl)
+
+    async def request_generation_async(self, payload: Dict[str, Any], cache: bool = False) -> Optional[str]:
+        """request_generation'ın aiohttp karşılığı (cache=True ise önbellek dahil)"""
+        cache_key, cached = self._cache_lookup(payload, cache)
+        if cached is not None:
+            return cached
+        async with self._async_slot():
+            with self._timed('generate'):
+                async with self.http.post(self._endpoint_for(payload), json=payload,
+                                          timeout=self._timeout(self.read_timeout)) as response:
+                    if response.status != 200:
+                        OLLAMA_ERRORS.labels('http').inc()
+                        raise OllamaError(f"API hatası: {response.status} - {await response.text()}")
+                    result = await response.json()
+                    observe_generation(result)
+                    text = self.response_text(result)
+        if text is not None:
+            self._cache_store(cache_key, text)
+        return text
+
+    async def generate_chat_response(self, user_message: str, context: Optional[str] = None,
+                                     session: Optional[ChatSession] = None, cache: bool = False) -> str:
+        """
+        Basit chat response üret (streaming olmayan); session verilirse çok turlu /api/chat.
+        cache=True sadece deterministik prompt'lar (sağlık önerileri) için
+        """
+        try:
+            if session is not None:
+                self._lock_session(session)
+                try:
+                    payload = self.build_chat_payload(session.request_messages(user_message), stream=False)
+                    text = await self.request_generation_async(payload)
+                    if text is not None:
+                        session.append_turn(user_message, text, self.sessions.max_messages)
+                finally:
+                    session.lock.release()
+            else:
+                text = await self.request_generation_async(
+                    self.build_payload(self.build_prompt(user_message, context), stream=False), cache)
+            if text is None:
+                return 'Üzgünüm, bir yanıt üretemedi.'
+            return text
+
+        except OllamaError as e:
+            logger.error(str(e))
+            return "Şu anda bir teknik sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"İstek hatası: {e}")
+            self.record_failure()
+            return "Bağlantı sorunu yaşıyorum. Ollama servisinin çalıştığından emin olun."
+
+    async def _stream_payload_async(self, payload: Dict[str, Any], parts: List[Optional[str]],
+                                    cache: bool = False) -> AsyncGenerator[str, None]:
+        """
+        Önbellekten (cache=True ise) veya Ollama NDJSON stream'inden parçaları üret.
+
+        Üretilen metin parts listesine eklenir; yanıt tamamlandıysa listenin
+        sonuna None işareti konur (async generator değer döndüremez).
+        """
+        cache_key, cached = self._cache_lookup(payload, cache)
+        if cached is not None:
+            for chunk in self.replay_chunks(cached):
+                yield chunk
+            parts.extend((cached, None))
+            return
+
+        start = time.perf_counter()
+        async with self._async_slot(), \
+                self.http.post(self._endpoint_for(payload), json=payload,
+                               timeout=self._timeout(self.stream_read_timeout)) as response:
+            if response.status != 200:
+                OLLAMA_ERRORS.labels('http').inc()
+                yield "Teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+                return
+
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                try:
+                    json_response = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                text = self.response_text(json_response)
+                if text:
+                    if not parts:
+                        LLM_TTFT_SECONDS.observe(time.perf_counter() - start)
+                    parts.append(text)
+                    yield text
+                # Stream tamamlandı kontrolü: sadece tamamlanan yanıtlar önbelleğe girer
+                if json_response.get('done', False):
+                    observe_generation(json_response)
+                    self._cache_store(cache_key, ''.join(parts))
+                    parts.append(None)
+                    break
+
+    async def generate_streaming_response(self, user_message: str, context: Optional[str] = None,
+                                          session: Optional[ChatSession] = None) -> AsyncGenerator[str, None]:
+        """Streaming chat response üret; session verilirse çok turlu /api/chat"""
+        parts: List[Optional[str]] = []
+        try:
+            if session is None:
+                payload = self.build_payload(self.build_prompt(user_message, context), stream=True)
+                async for chunk in self._stream_payload_async(payload, parts):
+                    yield chunk
+                return
+
+            self._lock_session(session)
+            try:
+                payload = self.build_chat_payload(session.request_messages(user_message), stream=True)
+                async for chunk in self._stream_payload_async(payload, parts):
+                    yield chunk
+                if parts and parts[-1] is None:
+                    session.append_turn(user_message, ''.join(parts[:-1]), self.sessions.max_messages)
+            finally:
+                session.lock.release()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Streaming hatası: {e}")
+            self.record_failure()
+            yield "Bağlantı sorunu yaşıyorum. Ollama servisinin çalıştığından emin olun."
+
+    async def get_health_recommendations(self, prediction_data: Dict[str, Any], user_input: Dict[str, Any]) -> str:
+        """Obezite tahmin sonuçlarına özel sağlık önerileri üret"""
+        context = self.format_health_context(prediction_data, user_input)
+        return await self.generate_chat_response(RECOMMENDATION_MESSAGE, context, cache=True)
@@ -0,0 +1,117 @@
+"""
+Sunucu tarafı çok turlu sohbet oturumları
+Her oturum Ollama /api/chat için mesaj geçmişini (system + kullanıcı/asistan
+turları) tutar. Aynı oturumun ardışık istekleri aynı mesaj önekiyle başladığı
+için Ollama önceki turların KV cache'ini yeniden kullanır ve sadece yeni
+mesajı işler. Boşta kalan oturumlar idle_ttl sonunda, kapasite aşıldığında
+da en uzun süredir kullanılmayan oturum silinir.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ChatSession:
+    """Tek bir sohbetin mesaj geçmişi; turlar lock ile sıraya girer"""
+
+    def __init__(self, session_id: str, system_message: str):
+        self.session_id = session_id
+        self.messages: List[Dict[str, str]] = [{"role": "system", "content": system_message}]
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.turns = 0
+        self.lock = threading.Lock()
+
+    def set_system_message(self, content: str) -> None:
+        """Sağlık bağlamı değiştiyse system mesajını güncelle (geçmiş korunur)"""
+        self.messages[0] = {"role": "system", "content": content}
+
+    def request_messages(self, user_message: str) -> List[Dict[str, str]]:
+        """Bu tur için Ollama'ya gidecek mesajlar (geçmiş + yeni kullanıcı mesajı)"""
+        return self.messages + [{"role": "user", "content": user_message}]
+
+    def append_turn(self, user_message: str, reply: str, max_messages: int) -> None:
+        """Tamamlanan turu geçmişe ekle; sınır aşılırsa en eski turları at"""
+        self.messages.append({"role": "user", "content": user_message})
+        self.messages.append({"role": "assistant", "content": reply})
+        self.turns += 1
+        overflow = len(self.messages) - 1 - max_messages
+        if overflow > 0:
+            # Kullanıcı/asistan çiftleri halinde at (system mesajı hep kalır)
+            overflow += overflow % 2
+            del self.messages[1:1 + overflow]
+
+
+class ChatSessionStore:
+    """Oturum kimliği -> ChatSession; boşta kalma süresi ve kapasite ile sınırlı"""
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0, max_messages: int = 20):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._sessions: 'OrderedDict[str, ChatSession]' = OrderedDict()
+        self._stats = {"created": 0, "resumed": 0, "expired": 0, "evicted": 0, "closed": 0}
+
+    def _evict_idle_locked(self, now: float) -> None:
+        # En eski kullanılan oturumlar başta: ilk taze oturumda dur
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self._stats["expired"] += 1
+
+    def get_or_create(self, session_id: Optional[str], system_message: str,
+                      update_system: bool = True) -> ChatSession:
+        """
+        Var olan oturumu devam ettir, yoksa (veya süresi dolduysa) yenisini aç.
+
+        update_system=False ise devam eden oturumun system mesajı korunur
+        (istemci sağlık bağlamını sadece ilk mesajda göndermiş olabilir).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_locked(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self._stats["resumed"] += 1
+            else:
+                session = ChatSession(uuid.uuid4().hex, system_message)
+                self._sessions[session.session_id] = session
+                self._stats["created"] += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self._stats["evicted"] += 1
+            session.last_used = now
+
+        if update_system and session.messages[0]["content"] != system_message:
+            # Süren tur kendi mesaj listesinin kopyasıyla çalışır; kilide gerek yok
+            session.set_system_message(system_message)
+        return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                return False
+            self._stats["closed"] += 1
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+            return {
+                **self._stats,
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl,
+                "max_messages": self.max_messages
+            }
@@ -0,0 +1,292 @@
+"""
+Model girdi özelliklerinin (feature) encode edilmesi
+Eğitim (create_models.py) ve tekil/toplu (batch) tahminler için ortak, tablo tabanlı encoder
+"""
+
+import json
+import os
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+# Define feature columns in correct order
+FEATURE_COLUMNS = ['Age', 'Gender', 'Height', 'Weight', 'CALC', 'FAVC', 'FCVC',
+                   'NCP', 'SCC', 'SMOKE', 'CH2O', 'family_history_with_overweight',
+                   'FAF', 'TUE', 'CAEC', 'MTRANS', 'BMI']
+
+REQUIRED_FIELDS = ['gender', 'age', 'height', 'weight', 'family_history',
+                   'favc', 'fcvc', 'ncp', 'caec', 'smoke', 'ch2o', 'scc',
+                   'faf', 'tue', 'calc', 'mtrans']
+
+# Sayısal alanlar: request alanı -> model kolonu
+NUMERIC_FIELDS = {
+    'age': 'Age',
+    'height': 'Height',
+    'weight': 'Weight',
+    'fcvc': 'FCVC',
+    'ncp': 'NCP',
+    'ch2o': 'CH2O',
+    'faf': 'FAF',
+    'tue': 'TUE',
+}
+
+# Kategorik alanlar: request alanı -> model kolonu (= veri seti kolonu)
+CATEGORY_COLUMNS = {
+    'gender': 'Gender',
+    'family_history': 'family_history_with_overweight',
+    'favc': 'FAVC',
+    'scc': 'SCC',
+    'smoke': 'SMOKE',
+    'calc': 'CALC',
+    'caec': 'CAEC',
+    'mtrans': 'MTRANS',
+}
+
+# /quick-predict'in sadece gender/age/height/weight alıp diğer alanlar için kullandığı değerler
+QUICK_PREDICT_FIELDS = ['gender', 'age', 'height', 'weight']
+QUICK_PREDICT_DEFAULTS = {
+    'family_history': 'no',
+    'favc': 'no',
+    'fcvc': 2,
+    'ncp': 3,
+    'caec': 'sometimes',
+    'smoke': 'no',
+    'ch2o': 2,
+    'scc': 'no',
+    'faf': 1,
+    'tue': 1,
+    'calc': 'sometimes',
+    'mtrans': 'automobile'
+}
+
+TARGET_COLUMN = 'NObeyesdad'
+
+COLUMN_INDEX = {column: i for i, column in enumerate(FEATURE_COLUMNS)}
+
+ENCODER_FORMAT_VERSION = 1
+
+
+class FeatureEncoder:
+    """
+    Eğitim ve sunum tarafının ortak, tablo tabanlı feature encoder'ı.
+
+    create_models.py veri setinden fit eder ve modelle birlikte encoder.json
+    olarak kaydeder; backend aynı dosyayı yükler. Kategori kodları
+    LabelEncoder ile aynıdır (ham değerlerin sıralı index'i), anahtarlar
+    küçük harfe çevrilir. Sınıf adları da aynı şekilde hedef kolondan gelir.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], classes: List[str]):
+        # categories: request alanı -> değerler (kod = listedeki index, küçük harf)
+        # classes: sınıf etiketi (index) -> sınıf adı
+        self.categories = {field: [str(value).lower() for value in values]
+                           for field, values in categories.items()}
+        self.classes = list(classes)
+        self.class_names = dict(enumerate(self.classes))
+
+        # Her istekte tekrar kurulmayan, önceden derlenmiş tablolar
+        self.tables = {field: {value: code for code, value in enumerate(values)}
+                       for field, values in self.categories.items()}
+        self._numeric = [(field, COLUMN_INDEX[column]) for field, column in NUMERIC_FIELDS.items()]
+        self._categorical = [(field, COLUMN_INDEX[CATEGORY_COLUMNS[field]], self.tables[field],
+                              len(self.tables[field]) == 2)
+                             for field in CATEGORY_COLUMNS]
+        self._class_codes = {name: label for label, name in self.class_names.items()}
+        self._height = COLUMN_INDEX['Height']
+        self._weight = COLUMN_INDEX['Weight']
+        self._bmi = COLUMN_INDEX['BMI']
+
+    @staticmethod
+    def class_name(raw: str) -> str:
+        """Veri setindeki hedef değeri API sınıf adına çevir ('Obesity_Type_I' -> 'Obesity Type I')"""
+        return str(raw).replace('_', ' ')
+
+    @classmethod
+    def fit(cls, df) -> 'FeatureEncoder':
+        """Ham veri setinden (data/*.csv kolonları) kategori ve sınıf tablolarını öğren"""
+        categories = {field: sorted(df[column].unique()) for field, column in CATEGORY_COLUMNS.items()}
+        classes = [cls.class_name(value) for value in sorted(df[TARGET_COLUMN].unique())]
+        return cls(categories, classes)
+
+    def encode_target(self, values) -> np.ndarray:
+        """Hedef kolon değerlerini sınıf etiketlerine çevir"""
+        return np.array([self._class_codes[self.class_name(value)] for value in values], dtype=np.int64)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'format_version': ENCODER_FORMAT_VERSION,
+            'feature_columns': FEATURE_COLUMNS,
+            'categories': self.categories,
+            'classes': self.classes
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureEncoder':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('feature_columns') != FEATURE_COLUMNS:
+            raise ValueError(f"Encoder feature columns do not match this backend: {path}")
+        return cls(data['categories'], data['classes'])
+
+    def encode_row_into(self, data: Dict[str, Any], out: np.ndarray) -> float:
+        """
+        Tek kaydı verilen float64 satır buffer'ına yaz ve (gösterim için
+        yuvarlanmış) BMI'ı döndür. Modele giden BMI yuvarlanmaz.
+
+        İki değerli alanlarda (gender, yes/no) bilinmeyen değer 0 kabul edilir,
+        diğer kategorik alanlarda bilinmeyen değer KeyError fırlatır.
+        """
+        for field, index in self._numeric:
+            out[index] = data[field]
+
+        for field, index, table, binary in self._categorical:
+            value = data[field].lower()
+            out[index] = table.get(value, 0) if binary else table[value]
+
+        height = out[self._height]
+        if height > 10:  # Handle cm/m conversion
+            height = out[self._height] = height / 100
+        bmi = out[self._bmi] = out[self._weight] / (height ** 2)
+        return round(bmi, 2)
+
+    def validate_record(self, record: Any) -> List[str]:
+        """Tek bir kaydı kontrol et, bulunan tüm hataları liste olarak döndür"""
+        if not isinstance(record, dict):
+            return ["Record must be a JSON object"]
+
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in record]
+        if missing_fields:
+            return [f"Missing required fields: {missing_fields}"]
+
+        errors = []
+        for field in NUMERIC_FIELDS:
+            value = record[field]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"Field '{field}' must be a number")
+
+        for field, table in self.tables.items():
+            value = record[field]
+            if not isinstance(value, str) or value.lower() not in table:
+                errors.append(f"Invalid value for field: '{field}'")
+
+        if not errors and record['height'] <= 0:
+            errors.append("Field 'height' must be positive")
+
+        return errors
+
+    def encode_records(self, records: List[Any]) -> Tuple[np.ndarray, np.ndarray, List[int], List[Dict[str, Any]]]:
+        """
+        Kayıt listesini tek seferde model matrisine dönüştür.
+
+        Geçersiz kayıtlar matrise alınmaz; index ve hata mesajlarıyla ayrıca
+        döndürülür. Dönüş: (X, gösterim BMI'ları, geçerli index listesi, hata listesi)
+        """
+        valid_rows = []
+        valid_index = []
+        errors = []
+
+        for i, record in enumerate(records):
+            record_errors = self.validate_record(record)
+            if record_errors:
+                errors.append({"index": i, "errors": record_errors})
+            else:
+                valid_rows.append(record)
+                valid_index.append(i)
+
+        X = np.empty((len(valid_rows), len(FEATURE_COLUMNS)), dtype=np.float64)
+        if not valid_rows:
+            return X, np.empty(0, dtype=np.float64), valid_index, errors
+
+        for field, index in self._numeric:
+            X[:, index] = [row[field] for row in valid_rows]
+
+        for field, index, table, _ in self._categorical:
+            X[:, index] = [table[row[field].lower()] for row in valid_rows]
+
+        # Boy cm olarak geldiyse metreye çevir, BMI'ı hesapla
+        height = X[:, self._height]
+        height = np.where(height > 10, height / 100, height)
+        X[:, self._height] = height
+        X[:, self._bmi] = X[:, self._weight] / (height ** 2)
+
+        return X, np.round(X[:, self._bmi], 2), valid_index, errors
+
+    def encode_frame(self, df) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Veri seti şemasındaki (data/*.csv kolonları) DataFrame'i kolon kolon,
+        satır dict'i kurmadan encode et. Eksik/sayısal olmayan değer veya
+        bilinmeyen kategori içeren satırlar maskede False olur.
+        Dönüş: (X, gösterim BMI'ları, geçerli satır maskesi)
+        """
+        import pandas as pd  # sadece toplu skorlamada gerekir, sunucu açılışını yavaşlatmasın
+
+        X = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float64)
+        for field, index in self._numeric:
+            X[:, index] = pd.to_numeric(df[NUMERIC_FIELDS[field]], errors='coerce').to_numpy(dtype=np.float64)
+
+        for field, index, table, _ in self._categorical:
+            X[:, index] = df[CATEGORY_COLUMNS[field]].astype(str).str.lower().map(table).to_numpy(dtype=np.float64)
+
+        height = X[:, self._height]
+        X[:, self._height] = np.where(height > 10, height / 100, height)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X[:, self._bmi] = X[:, self._weight] / (X[:, self._height] ** 2)
+
+        valid = np.isfinite(X).all(axis=1) & (X[:, self._height] > 0)
+        return X, np.round(X[:, self._bmi], 2), valid
+
+
+# Encoder artefaktı olmayan (eski create_models.py ile eğitilmiş) modeller için:
+# LabelEncoder'ın veri setinden ürettiği kodların aynısı
+DEFAULT_ENCODER = FeatureEncoder(
+    categories={
+        'gender': ['Female', 'Male'],
+        'family_history': ['no', 'yes'],
+        'favc': ['no', 'yes'],
+        'scc': ['no', 'yes'],
+        'smoke': ['no', 'yes'],
+        'calc': ['Always', 'Frequently', 'Sometimes', 'no'],
+        'caec': ['Always', 'Frequently', 'Sometimes', 'no'],
+        'mtrans': ['Automobile', 'Bike', 'Motorbike', 'Public_Transportation', 'Walking'],
+    },
+    classes=['Insufficient Weight', 'Normal Weight', 'Obesity Type I', 'Obesity Type II',
+             'Obesity Type III', 'Overweight Level I', 'Overweight Level II']
+)
+
+# Class labels (model etiketi -> sınıf adı)
+OBESITY_CLASSES = DEFAULT_ENCODER.class_names
+
+
+def load_encoder(path: str) -> FeatureEncoder:
+    """Modelle birlikte kaydedilmiş encoder'ı yükle; dosya yoksa DEFAULT_ENCODER"""
+    if path and os.path.exists(path):
+        return FeatureEncoder.load(path)
+    return DEFAULT_ENCODER
+
+
+def records_from_dataset(df) -> List[Dict[str, Any]]:
+    """Veri seti satırlarını (data/*.csv kolonları) /predict istek gövdesi formatına çevir"""
+    return [
+        {
+            'gender': row.Gender,
+            'age': float(row.Age),
+            'height': float(row.Height) * 100,
+            'weight': float(row.Weight),
+            'family_history': row.family_history_with_overweight,
+            'favc': row.FAVC,
+            'fcvc': float(row.FCVC),
+            'ncp': float(row.NCP),
+            'caec': row.CAEC,
+            'smoke': row.SMOKE,
+            'ch2o': float(row.CH2O),
+            'scc': row.SCC,
+            'faf': float(row.FAF),
+            'tue': float(row.TUE),
+            'calc': row.CALC,
+            'mtrans': row.MTRANS,
+        }
+        for row in df.itertuples(index=False)
+    ]
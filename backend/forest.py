@@ -0,0 +1,235 @@
+"""
+RandomForest için düzleştirilmiş (flattened) ağaç dizileri ve NumPy değerlendiricisi
+Tüm ağaçların düğümleri tek dizilerde tutulur, her adımda bütün ağaçlar
+birlikte bir seviye ilerletilir
+"""
+
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class FlatForest:
+    """sklearn RandomForestClassifier'ın dizi tabanlı, sadece tahmin yapan kopyası"""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 classes: np.ndarray, max_depth: int, children: Optional[np.ndarray] = None,
+                 feature_index: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.n_trees = len(roots)
+
+        # Değerlendirme için: çocuklar yan yana (2*i sol, 2*i+1 sağ), index'ler intp.
+        # Dizin formatından (save_arrays) yüklenirken hazır diziler kopyalanmadan kullanılır
+        self._children = children if children is not None else np.stack([left, right], axis=1).ravel().astype(np.intp)
+        self._feature = feature_index if feature_index is not None else feature.astype(np.intp)
+        self._roots = roots.astype(np.intp)
+        # Yollar max_depth'ten çok kısaysa (specialize) aktif çiftler izlenir; tam ormanda
+        # yolların çoğu max_depth'e yakındır ve sabit adım sayısı daha hızlıdır
+        self.compact_paths = False
+
+    @staticmethod
+    def supports(model) -> bool:
+        """Model düzleştirilebilir mi (RandomForest/ExtraTrees gibi tree_ taşıyan ağaç toplulukları)"""
+        estimators = getattr(model, 'estimators_', None)
+        return bool(estimators) and all(hasattr(estimator, 'tree_') for estimator in estimators)
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'FlatForest':
+        """Eğitilmiş RandomForestClassifier'ı düğüm dizilerine çevir"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Yapraklar kendilerine döner: sabit sayıda adım sonunda her yol bir yaprakta durur
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+
+            # Yaprak dağılımlarını sınıf olasılığına normalize et (sklearn tree.predict_proba gibi)
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            value = value / totals
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'classes': self.classes_,
+            'max_depth': np.array(self.max_depth),
+        }
+
+    def save(self, path: str) -> None:
+        """Düğüm dizilerini .npz olarak kaydet"""
+        np.savez(path, **self.to_arrays())
+
+    def save_arrays(self, directory: str) -> None:
+        """
+        Her diziyi ayrı .npy olarak kaydet (değerlendirme dizileri dahil);
+        bu format np.load(mmap_mode='r') ile açılabilir, worker süreçleri
+        aynı page cache kopyasını paylaşır
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {**self.to_arrays(), 'children': self._children, 'feature_index': self._feature}
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), array)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'FlatForest':
+        """.npz dosyası (belleğe okunur) veya save_arrays dizini (memory-map) yükle"""
+        if os.path.isdir(path):
+            return cls(**{name[:-4]: np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+                          for name in os.listdir(path) if name.endswith('.npy')})
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """
+        Ağaç-majör yaprak düğümleri: (n_trees, n_rows). compact_paths ise
+        her adımda sadece henüz yaprağa ulaşmamış (ağaç, satır) çiftleri
+        ilerletilir; iş, max_depth yerine yolların gerçek uzunluğu kadardır.
+        """
+        # sklearn ağaçları girdiyi float32'ye çevirip float64 eşiklerle karşılaştırır
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        nodes = np.repeat(self._roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        children = self._children
+
+        if not self.compact_paths:
+            for _ in range(self.max_depth):
+                go_right = ~(flat_X[row_offsets + self._feature[nodes]] <= self.threshold[nodes])
+                nodes = children[nodes * 2 + go_right]
+            return nodes.reshape(self.n_trees, n_rows)
+
+        # Yapraklar kendilerine döner: sol çocuğu kendisi olan düğüm yapraktır
+        active = np.flatnonzero(children[nodes * 2] != nodes)
+        while len(active):
+            current = nodes[active]
+            go_right = ~(flat_X[row_offsets[active] + self._feature[current]] <= self.threshold[current])
+            current = children[current * 2 + go_right]
+            nodes[active] = current
+            active = active[children[current * 2] != current]
+
+        return nodes.reshape(self.n_trees, n_rows)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Her satır ve ağaç için ulaşılan yaprak düğümü: (n_rows, n_trees)"""
+        return self._leaves(X).T
+
+    def contributions(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ağaç yolu (Saabas) atıfı: her bölmede çocuk ile ebeveyn düğümün sınıf
+        dağılımı farkı, bölmenin feature'ına yazılır ve ağaçlar üzerinden
+        ortalanır. Düğüm dağılımları (value) from_sklearn'de önceden normalize
+        edilmiştir; tüm ağaçlar her adımda birlikte bir seviye ilerler.
+
+        Dönüş: (bias [n_classes], katkılar [n_rows, n_features, n_classes]);
+        bias + katkıların feature toplamı == predict_proba(X)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        n_classes = self.value.shape[1]
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self._roots, (n_rows, self.n_trees))
+        # Katkılar (satır, feature, sınıf) düz dizisinde; her adım tek bincount ile eklenir
+        slots = (row_offsets * n_classes)[..., None] + np.arange(n_classes)
+        totals = np.zeros(n_rows * n_features * n_classes)
+
+        for _ in range(self.max_depth):
+            feature = self._feature[nodes]
+            go_right = ~(flat_X[row_offsets + feature] <= self.threshold[nodes])
+            children = self._children[nodes * 2 + go_right]
+            # Yapraklar kendilerine döndüğü için yola devam etmeyen ağaçlarda fark sıfırdır
+            delta = self.value[children] - self.value[nodes]
+            totals += np.bincount((slots + (feature * n_classes)[..., None]).ravel(),
+                                  weights=delta.ravel(), minlength=totals.size)
+            nodes = children
+
+        bias = self.value[self._roots].mean(axis=0)
+        return bias, totals.reshape(n_rows, n_features, n_classes) / self.n_trees
+
+    def specialize(self, row: np.ndarray, free: np.ndarray) -> 'FlatForest':
+        """
+        Sadece free (bool maske) kolonları row'dan farklı olan satırlar için
+        kısmi değerlendirilmiş orman. Diğer kolonlardaki bölmeler row'a göre
+        önceden çözülür ve atlanır; kalan ağaçların derinliği sadece serbest
+        kolonlardaki bölme sayısı kadardır. Düğüm numaraları (value, threshold)
+        aynı kalır, sonuçlar birebir aynıdır.
+        """
+        row = np.asarray(row, dtype=np.float32)
+        nodes = np.arange(len(self.threshold), dtype=np.intp)
+        children = self._children.reshape(-1, 2)
+        is_leaf = children[:, 0] == nodes
+        go_right = ~(row[self._feature] <= self.threshold)
+        fixed = ~is_leaf & ~np.asarray(free, dtype=bool)[self._feature]
+
+        # Sabit bölmeler seçilen çocuğa atlar; pointer jumping ile her düğüm
+        # ilk serbest bölmeye veya yaprağa bağlanır (2^k >= max_depth adım)
+        jump = np.where(fixed, children[nodes, go_right.astype(np.intp)], nodes)
+        for _ in range(max(self.max_depth, 1).bit_length()):
+            jump = jump[jump]
+        specialized = jump[self._children]
+        roots = jump[self._roots]
+
+        # Kalan en uzun yol: kökten başlayarak serbest bölmeler seviye seviye izlenir
+        depth = 0
+        frontier = np.unique(roots)
+        while True:
+            frontier = frontier[~is_leaf[frontier]]
+            if not len(frontier):
+                break
+            frontier = np.unique(specialized.reshape(-1, 2)[frontier])
+            depth += 1
+
+        forest = FlatForest(self.feature, self.threshold, specialized[0::2], specialized[1::2], self.value,
+                            roots, self.classes_, depth, children=specialized, feature_index=self._feature)
+        forest.compact_paths = True
+        return forest
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Ağaçların yaprak olasılıklarının ortalaması (sklearn gibi ağaç sırasıyla toplanır)"""
+        return self.value[self._leaves(X)].sum(axis=0) / self.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
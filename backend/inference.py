@@ -0,0 +1,381 @@
+"""
+Tahmin (inference) katmanı: motor seçimi, pandas'sız tek satır yolu ve skorlama servisi
+StandardScaler parametreleri önceden dizilere alınır, her thread kendi
+float64 satır buffer'ını tekrar tekrar kullanır
+"""
+
+import logging
+import os
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from features import DEFAULT_ENCODER, FEATURE_COLUMNS, FeatureEncoder
+from forest import FlatForest
+from metrics import PREDICTION_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 'sklearn': RandomForestClassifier.predict_proba, 'flat': NumPy FlatForest değerlendiricisi
+INFERENCE_ENGINES = ('sklearn', 'flat')
+
+# Düzleştirilmiş orman tek satırda hızlıdır, büyük matrislerde ise sklearn'ün derlenmiş
+# ağaçları öne geçer (~300 satır). Bu sayıda ve üstünde satır içeren matrisler, model
+# pickle'ı varsa sklearn predict_proba ile değerlendirilir (0 kapatır)
+BATCH_ENGINE_MIN_ROWS = int(os.environ.get('BATCH_ENGINE_MIN_ROWS', 256))
+
+
+def create_engine(name: str, model, flat_forest_path: str = None):
+    """Seçilen inference motorunu hazırla; predict/predict_proba/classes_ sunar"""
+    if name == 'sklearn':
+        return model
+    if name == 'flat':
+        # create_models.py düzleştirilmiş ormanı modelle birlikte kaydeder,
+        # dosya yoksa yüklü modelden bellekte oluşturulur
+        if flat_forest_path and os.path.exists(flat_forest_path):
+            return FlatForest.load(flat_forest_path)
+        if not FlatForest.supports(model):
+            # Ağaç topluluğu olmayan modeller (örn. HistGradientBoosting) sklearn ile değerlendirilir
+            return model
+        return FlatForest.from_sklearn(model)
+    raise ValueError(f"Unknown inference engine: {name} (expected one of {INFERENCE_ENGINES})")
+
+
+def scaler_arrays(scaler) -> Tuple[np.ndarray, np.ndarray]:
+    """StandardScaler: (x - mean_) / scale_ ; with_mean/with_std kapalıysa None olabilir"""
+    n_features = len(FEATURE_COLUMNS)
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    mean = np.zeros(n_features) if mean is None or not scaler.with_mean else np.array(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None or not scaler.with_std else np.array(scale, dtype=np.float64)
+    return mean, scale
+
+
+class FlatScaler:
+    """StandardScaler'ın sadece RowPredictor'ın kullandığı parametreleri (mean_, scale_)"""
+
+    with_mean = True
+    with_std = True
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    @classmethod
+    def from_sklearn(cls, scaler) -> 'FlatScaler':
+        # with_mean/with_std kapalıysa etkisiz değerler (0 ve 1) kaydedilir
+        return cls(*scaler_arrays(scaler))
+
+
+def save_flat_artifacts(directory: str, model, scaler) -> None:
+    """
+    Orman ve scaler'ı pickle'sız .npy dizilerine yaz:
+    <directory>/forest/*.npy ve <directory>/scaler/{mean,scale}.npy
+    """
+    FlatForest.from_sklearn(model).save_arrays(os.path.join(directory, 'forest'))
+    flat_scaler = FlatScaler.from_sklearn(scaler)
+    os.makedirs(os.path.join(directory, 'scaler'), exist_ok=True)
+    np.save(os.path.join(directory, 'scaler', 'mean.npy'), flat_scaler.mean_)
+    np.save(os.path.join(directory, 'scaler', 'scale.npy'), flat_scaler.scale_)
+
+
+def load_flat_artifacts(directory: str, mmap_mode: str = 'r') -> Tuple[FlatForest, FlatScaler]:
+    """
+    save_flat_artifacts çıktısını joblib/sklearn olmadan yükle; orman dizileri
+    memory-map edilir, aynı dosyayı açan worker'lar fiziksel belleği paylaşır
+    """
+    forest = FlatForest.load(os.path.join(directory, 'forest'), mmap_mode=mmap_mode)
+    scaler = FlatScaler(np.load(os.path.join(directory, 'scaler', 'mean.npy')),
+                        np.load(os.path.join(directory, 'scaler', 'scale.npy')))
+    return forest, scaler
+
+
+class RowPredictor:
+    """Önceden ayrılmış satır buffer'ı ile tek kayıtlık ölçekleme ve tahmin"""
+
+    def __init__(self, model, scaler, encoder: FeatureEncoder = DEFAULT_ENCODER):
+        # model: sklearn modeli veya create_engine ile hazırlanan motor
+        self.model = model
+        self.encoder = encoder
+        self.mean, self.scale = scaler_arrays(scaler)
+
+        # Flask her isteği ayrı thread'de işleyebilir, buffer thread başına tutulur
+        self._local = threading.local()
+
+    def _row_buffer(self) -> np.ndarray:
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float64)
+            self._local.row = buffer
+        return buffer
+
+    def encode(self, data: Dict[str, Any]) -> Tuple[np.ndarray, float]:
+        """İstek verisini thread'in satır buffer'ına encode et; (buffer, BMI) döndür"""
+        buffer = self._row_buffer()
+        bmi = self.encoder.encode_row_into(data, buffer[0])
+        return buffer, bmi
+
+    def scale_in_place(self, X: np.ndarray) -> np.ndarray:
+        """StandardScaler dönüşümünü verilen matris üzerinde yerinde uygula"""
+        np.subtract(X, self.mean, out=X)
+        np.divide(X, self.scale, out=X)
+        return X
+
+    def transform(self, data: Dict[str, Any]) -> Tuple[np.ndarray, float]:
+        """İstek verisini encode edip yerinde ölçekle; (ölçekli satır, BMI) döndür"""
+        buffer, bmi = self.encode(data)
+        return self.scale_in_place(buffer), bmi
+
+    def predict_proba(self, data: Dict[str, Any]) -> Tuple[np.ndarray, float]:
+        """Tek kayıt için sınıf olasılıkları ve BMI"""
+        input_scaled, bmi = self.transform(data)
+        return self.model.predict_proba(input_scaled)[0], bmi
+
+
+@dataclass
+class ScoringResult:
+    """Tek bir kaydın skorlama sonucu (olasılıklar yüzde olarak)"""
+    class_label: int
+    predicted_class: str
+    confidence: float
+    probabilities: Dict[str, float]
+    bmi: float
+    # explain=True ile: tahmin edilen sınıf için feature katkıları (ScoringService.explain_rows)
+    explanation: Optional[Dict[str, Any]] = None
+
+    def to_prediction(self, include_probabilities: bool = True) -> Dict[str, Any]:
+        """API yanıtlarındaki "prediction" objesi"""
+        prediction = {
+            "bmi": self.bmi,
+            "predicted_class": self.predicted_class,
+            "confidence": round(self.confidence, 1)
+        }
+        if include_probabilities:
+            prediction["all_probabilities"] = self.probabilities
+        if self.explanation is not None:
+            prediction["explanation"] = self.explanation
+        return prediction
+
+
+class StageTimings:
+    """encode / scale / forest (ve istenirse explain) aşamaları için kümülatif süre sayaçları"""
+
+    STAGES = ('encode', 'scale', 'forest', 'explain')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+        self.totals = dict.fromkeys(self.STAGES, 0.0)
+        # /metrics histogramları (tüm sürümler için ortak)
+        self._histograms = [PREDICTION_STAGE_SECONDS.labels(stage) for stage in self.STAGES]
+
+    def record(self, encode: float, scale: float, forest: float, rows: int = 1) -> None:
+        with self._lock:
+            self.calls += 1
+            self.rows += rows
+            self.totals['encode'] += encode
+            self.totals['scale'] += scale
+            self.totals['forest'] += forest
+        encode_histogram, scale_histogram, forest_histogram, _ = self._histograms
+        encode_histogram.observe(encode)
+        if rows:
+            scale_histogram.observe(scale)
+            forest_histogram.observe(forest)
+
+    def record_explain(self, seconds: float) -> None:
+        with self._lock:
+            self.totals['explain'] += seconds
+        self._histograms[3].observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.calls
+            return {
+                "calls": calls,
+                "rows": self.rows,
+                "stages": {
+                    stage: {
+                        "total_ms": round(total * 1000, 3),
+                        "avg_ms_per_call": round(total * 1000 / calls, 4) if calls else 0.0
+                    }
+                    for stage, total in self.totals.items()
+                }
+            }
+
+
+class ScoringService:
+    """
+    /predict, /quick-predict ve /predict/batch için ortak skorlama servisi.
+
+    Orman tek sefer predict_proba ile değerlendirilir, sınıf argmax ile
+    türetilir; her aşamanın süresi StageTimings'e yazılır.
+    """
+
+    def __init__(self, engine, scaler, encoder: FeatureEncoder = DEFAULT_ENCODER,
+                 batch_engine: Optional[Callable[[], Any]] = None):
+        # encoder: modelle birlikte kaydedilen feature encoder'ı (sınıf adları dahil)
+        # batch_engine: büyük matrisler için sklearn modelini döndüren yükleyici (ilk kullanımda çağrılır)
+        self.engine = engine
+        self._batch_loader = batch_engine
+        self._batch_engine = None
+        self._batch_lock = threading.Lock()
+        self.encoder = encoder
+        self.rows = RowPredictor(engine, scaler, encoder)
+        self.class_names = encoder.class_names
+        self.labels = [int(label) for label in engine.classes_]
+        self.names = [self.class_names[label] for label in self.labels]
+        self.timings = StageTimings()
+        # Feature atıfı düzleştirilmiş orman üzerinde yapılır; sklearn motorunda ilk explain'de oluşturulur
+        self._attribution_forest = engine if isinstance(engine, FlatForest) else None
+
+    def engine_for(self, rows: int):
+        """
+        Matris boyutuna göre motor: BATCH_ENGINE_MIN_ROWS ve üstünde (varsa) sklearn
+        modeli. Model yüklenemezse (ör. sürüm dizini registry'den silindi) bir kez
+        loglanır ve sonuçları aynı olan asıl motor kullanılmaya devam eder
+        """
+        if self._batch_loader is None or not BATCH_ENGINE_MIN_ROWS or rows < BATCH_ENGINE_MIN_ROWS:
+            return self.engine
+        if self._batch_engine is None:
+            with self._batch_lock:
+                if self._batch_engine is None:
+                    try:
+                        self._batch_engine = self._batch_loader()
+                    except Exception as e:
+                        logger.error(f"Batch engine could not be loaded, using the default engine: {e}")
+                        self._batch_engine = self.engine
+        return self._batch_engine
+
+    @property
+    def explainable(self) -> bool:
+        """Model ağaç topluluğu mu (feature atıfı sadece ağaç yollarıyla hesaplanır)"""
+        return self._attribution_forest is not None or FlatForest.supports(self.engine)
+
+    def explain_rows(self, X: np.ndarray, probabilities: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Ölçeklenmiş satırlar için tahmin edilen sınıfın feature katkıları
+        (yüzde puanı). base_value + katkıların toplamı == confidence (yuvarlama hariç)
+        """
+        start = time.perf_counter()
+        if self._attribution_forest is None:
+            self._attribution_forest = FlatForest.from_sklearn(self.engine)
+        bias, contributions = self._attribution_forest.contributions(X)
+
+        explanations = []
+        for row, index in zip(contributions, probabilities.argmax(axis=1)):
+            explanations.append({
+                "class": self.names[index],
+                "base_value": round(float(bias[index] * 100), 2),
+                "contributions": {column: round(float(value * 100), 2)
+                                  for column, value in zip(FEATURE_COLUMNS, row[:, index])}
+            })
+        self.timings.record_explain(time.perf_counter() - start)
+        return explanations
+
+    def results(self, probabilities: np.ndarray, bmi) -> List[ScoringResult]:
+        """predict_proba satırlarından (self.names sırasında) ScoringResult listesi"""
+        best = probabilities.argmax(axis=1)
+        results = []
+        for proba, index, row_bmi in zip(probabilities, best, bmi):
+            results.append(ScoringResult(
+                class_label=self.labels[index],
+                predicted_class=self.names[index],
+                confidence=float(proba[index] * 100),
+                probabilities={name: float(p * 100) for name, p in zip(self.names, proba)},
+                bmi=float(row_bmi)
+            ))
+        return results
+
+    def score(self, data: Dict[str, Any], explain: bool = False) -> ScoringResult:
+        """Tek kaydı skorla; geçersiz kategori değerinde KeyError fırlatır"""
+        start = time.perf_counter()
+        buffer, bmi = self.rows.encode(data)
+        encoded = time.perf_counter()
+        self.rows.scale_in_place(buffer)
+        scaled = time.perf_counter()
+        probabilities = self.engine.predict_proba(buffer)
+        done = time.perf_counter()
+
+        self.timings.record(encoded - start, scaled - encoded, done - scaled)
+        result = self.results(probabilities, [bmi])[0]
+        if explain:
+            result.explanation = self.explain_rows(buffer, probabilities)[0]
+        return result
+
+    def score_cached(self, data: Dict[str, Any], cache, version: str) -> Tuple[ScoringResult, bool]:
+        """
+        score() gibi, ama sonuç encode edilmiş satırın byte'larıyla cache'te
+        (PredictionCache) aranır; isabette scaler ve orman atlanır.
+
+        Dönüş: (sonuç, cache isabeti mi)
+        """
+        start = time.perf_counter()
+        buffer, bmi = self.rows.encode(data)
+        key = buffer.tobytes()
+        result = cache.get(version, key)
+        if result is not None:
+            return result, True
+
+        encoded = time.perf_counter()
+        self.rows.scale_in_place(buffer)
+        scaled = time.perf_counter()
+        probabilities = self.engine.predict_proba(buffer)
+        done = time.perf_counter()
+
+        self.timings.record(encoded - start, scaled - encoded, done - scaled)
+        result = self.results(probabilities, [bmi])[0]
+        cache.set(version, key, result)
+        return result, False
+
+    def score_records(self, records: List[Any],
+                      explain: bool = False) -> Tuple[List[int], List[ScoringResult], List[Dict[str, Any]]]:
+        """
+        Kayıt listesini tek matris olarak skorla (explain=True: satır başına feature katkıları).
+
+        Dönüş: (geçerli kayıt index'leri, bu index'lerin sonuçları, hatalı kayıtlar)
+        """
+        start = time.perf_counter()
+        X, bmi, valid_index, errors = self.encoder.encode_records(records)
+        encoded = time.perf_counter()
+        if not valid_index:
+            self.timings.record(encoded - start, 0.0, 0.0, rows=0)
+            return valid_index, [], errors
+
+        self.rows.scale_in_place(X)
+        scaled = time.perf_counter()
+        probabilities = self.engine_for(len(X)).predict_proba(X)
+        done = time.perf_counter()
+
+        self.timings.record(encoded - start, scaled - encoded, done - scaled, rows=len(valid_index))
+        results = self.results(probabilities, bmi)
+        if explain:
+            for result, explanation in zip(results, self.explain_rows(X, probabilities)):
+                result.explanation = explanation
+        return valid_index, results, errors
+
+    def score_frame(self, df) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Veri seti şemasındaki DataFrame'i skorla (toplu skorlama CLI'ı için);
+        satır başına ScoringResult oluşturmaz.
+
+        Dönüş: (geçerli satır maskesi, geçerli satırların olasılıkları
+        [self.names sırasında], tüm satırların BMI'ları)
+        """
+        start = time.perf_counter()
+        X, bmi, valid = self.encoder.encode_frame(df)
+        X = X[valid]
+        encoded = time.perf_counter()
+        if not len(X):
+            self.timings.record(encoded - start, 0.0, 0.0, rows=0)
+            return valid, np.empty((0, len(self.names))), bmi
+
+        self.rows.scale_in_place(X)
+        scaled = time.perf_counter()
+        probabilities = self.engine_for(len(X)).predict_proba(X)
+        done = time.perf_counter()
+
+        self.timings.record(encoded - start, scaled - encoded, done - scaled, rows=len(X))
+        return valid, probabilities, bmi
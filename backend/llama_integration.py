@@ -4,23 +4,358 @@ Turkish Health Assistant Chatbot için özelleştirilmiş prompt sistemi
 """
 
 import requests
+import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any, Generator
-from datetime import datetime
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, Generator, List, Tuple
+
+from chat_sessions import ChatSession, ChatSessionStore
+from metrics import METRICS, Histogram
+from response_cache import ResponseCache
 
 # Logging yapılandırması
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# /metrics: Ollama çağrı süreleri, hata sayıları ve üretim hızı
+OLLAMA_REQUEST_SECONDS = METRICS.histogram(
+    'ollama_request_duration_seconds', 'Ollama çağrı süresi (stream için ilk byte)', ('operation',))
+OLLAMA_ERRORS = METRICS.counter(
+    'ollama_errors_total', 'Ollama hataları: http (200 dışı yanıt), connection, busy (kuyruk/bütçe), health_check',
+    ('kind',))
+LLM_TTFT_SECONDS = METRICS.histogram(
+    'llm_time_to_first_token_seconds', 'Stream isteğinden (kuyruk beklemesi dahil) ilk token\'a kadar geçen süre')
+LLM_TOKENS_PER_SECOND = METRICS.histogram(
+    'llm_tokens_per_second', 'Ollama üretim hızı (eval_count / eval_duration)',
+    buckets=(1, 2, 5, 10, 15, 20, 30, 40, 50, 75, 100, 150, 200))
+LLM_TOKENS = METRICS.counter('llm_generated_tokens_total', 'Ollama tarafından üretilen token sayısı')
+
+
+def observe_generation(result: Dict[str, Any]) -> None:
+    """Ollama'nın son (done) yanıtındaki eval_count/eval_duration'dan üretim hızını kaydet"""
+    tokens = result.get('eval_count')
+    duration = result.get('eval_duration')  # nanosaniye
+    if tokens:
+        LLM_TOKENS.inc(tokens)
+        if duration:
+            LLM_TOKENS_PER_SECOND.observe(tokens / (duration / 1e9))
+
+class OllamaError(RuntimeError):
+    """Ollama'nın 200 dışı bir HTTP yanıtı döndürmesi"""
+
+
+class OllamaBusy(RuntimeError):
+    """Ollama kuyruğu dolu veya isteğin bekleme bütçesi aşıldı; çağıran fallback'e geçmeli"""
+
+
+class _Waiter:
+    """Kuyrukta bekleyen istek: thread (Event) veya coroutine (Future) olarak uyandırılır"""
+    __slots__ = ('granted', 'event', 'loop', 'future')
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve_future, self.future)
+
+
+def _resolve_future(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class OllamaScheduler:
+    """
+    Ollama'ya giden üretim isteklerini sınırlayan adil (FIFO) zamanlayıcı.
+
+    En fazla max_concurrency istek aynı anda Ollama'ya gider; diğerleri sırayla
+    bekler ve boşalan slot doğrudan kuyruğun başındakine devredilir. Her isteğin
+    bir bekleme bütçesi vardır: tahmini bekleme süresi bütçeyi aşıyorsa veya
+    kuyruk doluysa istek hemen OllamaBusy ile reddedilir; kuyrukta bütçe dolarsa
+    da aynı hata fırlatılır.
+    """
+
+    WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 64, default_budget: float = 10.0,
+                 service_time_alpha: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.default_budget = default_budget
+        self.service_time_alpha = service_time_alpha
+        self._lock = threading.Lock()
+        self._queue: 'deque[_Waiter]' = deque()
+        self._in_flight = 0
+        self._service_time: Optional[float] = None  # slot tutma süresinin hareketli ortalaması
+        self._wait_histogram = Histogram(self.WAIT_BUCKETS)
+        self._depth_histogram = Histogram(self.DEPTH_BUCKETS)
+        self._stats = {"admitted": 0, "completed": 0, "rejected_queue_full": 0,
+                       "rejected_expected_wait": 0, "expired_in_queue": 0, "max_queue_depth": 0}
+
+    def expected_wait(self, position: int) -> float:
+        """Kuyrukta position kişi öndeyken tahmini bekleme (saniye)"""
+        if self._service_time is None:
+            return 0.0
+        return (position // self.max_concurrency + 1) * self._service_time
+
+    def _admit_locked(self, budget: float, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """Slot boşsa None (slot alındı), değilse kuyruğa eklenen waiter; reddedilirse OllamaBusy"""
+        depth = len(self._queue)
+        self._depth_histogram.observe(depth)
+        if self._in_flight < self.max_concurrency and not self._queue:
+            self._in_flight += 1
+            self._stats["admitted"] += 1
+            self._wait_histogram.observe(0.0)
+            return None
+
+        if depth >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            OLLAMA_ERRORS.labels('busy').inc()
+            raise OllamaBusy(f"Ollama kuyruğu dolu ({depth} istek bekliyor)")
+        expected = self.expected_wait(depth)
+        if expected > budget:
+            self._stats["rejected_expected_wait"] += 1
+            OLLAMA_ERRORS.labels('busy').inc()
+            raise OllamaBusy(f"Tahmini bekleme {expected:.1f}s, bütçe {budget:.1f}s")
+
+        waiter = _Waiter(loop)
+        self._queue.append(waiter)
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+        return waiter
+
+    def _abandon_locked(self, waiter: _Waiter) -> bool:
+        """Beklemeyi bırakan waiter'ı kuyruktan çıkar; slot zaten devredildiyse True"""
+        if waiter.granted:
+            return True
+        self._queue.remove(waiter)
+        return False
+
+    def _granted_locked(self, start: float) -> None:
+        self._stats["admitted"] += 1
+        self._wait_histogram.observe(time.monotonic() - start)
+
+    def _expired_locked(self, budget: float) -> OllamaBusy:
+        self._stats["expired_in_queue"] += 1
+        OLLAMA_ERRORS.labels('busy').inc()
+        return OllamaBusy(f"Ollama kuyruğunda {budget:.1f}s beklendi")
+
+    def acquire(self, budget: Optional[float] = None) -> None:
+        """Slot al (gerekirse sırayla bekle); bütçe içinde alınamazsa OllamaBusy"""
+        budget = self.default_budget if budget is None else budget
+        start = time.monotonic()
+        with self._lock:
+            waiter = self._admit_locked(budget)
+        if waiter is None:
+            return
+
+        waiter.event.wait(budget)
+        with self._lock:
+            if not self._abandon_locked(waiter):
+                raise self._expired_locked(budget)
+            self._granted_locked(start)
+
+    async def acquire_async(self, budget: Optional[float] = None) -> None:
+        """acquire'ın event loop'u bloklamayan varyantı"""
+        budget = self.default_budget if budget is None else budget
+        start = time.monotonic()
+        with self._lock:
+            waiter = self._admit_locked(budget, asyncio.get_running_loop())
+        if waiter is None:
+            return
+
+        try:
+            await asyncio.wait_for(waiter.future, budget)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # İstemci gitti: devredilmiş slot varsa sıradakine bırak
+            with self._lock:
+                granted = self._abandon_locked(waiter)
+            if granted:
+                self.release(0.0)
+            raise
+        with self._lock:
+            if not self._abandon_locked(waiter):
+                raise self._expired_locked(budget)
+            self._granted_locked(start)
+
+    def release(self, held: float) -> None:
+        """Slotu bırak: kuyrukta bekleyen varsa doğrudan ona devret"""
+        with self._lock:
+            self._stats["completed"] += 1
+            if held > 0:
+                if self._service_time is None:
+                    self._service_time = held
+                else:
+                    self._service_time += self.service_time_alpha * (held - self._service_time)
+            if self._queue:
+                waiter = self._queue.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self._in_flight -= 1
+
+    @contextmanager
+    def slot(self, budget: Optional[float] = None):
+        self.acquire(budget)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    @asynccontextmanager
+    async def async_slot(self, budget: Optional[float] = None):
+        await self.acquire_async(budget)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "default_budget_seconds": self.default_budget,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._queue),
+                "service_time_seconds": round(self._service_time, 4) if self._service_time is not None else None,
+                "expected_wait_seconds": round(self.expected_wait(len(self._queue)), 4),
+                "wait_seconds": self._wait_histogram.snapshot(),
+                "queue_depth_at_arrival": self._depth_histogram.snapshot()
+            }
+
+
+# Kişiselleştirilmiş öneri isteğinde kullanıcı adına gönderilen mesaj
+RECOMMENDATION_MESSAGE = """Yukarıdaki sağlık profilime göre:
+1. Durumumu nasıl değerlendiriyorsun?
+2. Beslenme konusunda hangi önerilerin var?
+3. Hangi egzersizleri yapmalıyım?
+4. Yaşam tarzımda hangi değişiklikleri yapmalıyım?
+5. Motivasyonel tavsiyeler ver.
+
+Lütfen detaylı ve kişiselleştirilmiş öneriler ver."""
+
+# Ollama kullanılamadığında ve sağlık bağlamı yokken verilen yanıtlar
+DEFAULT_ASSISTANT_MESSAGE = """
+🏥 **Sağlık Asistanı**
+
+Merhaba! Size yardımcı olmak için buradayım. 
+
+🎯 **Yapabileceklerim:**
+- Obezite ve beslenme konularında bilgi verebilirim
+- Egzersiz önerileri sunabilirim  
+- Sağlıklı yaşam ipuçları paylaşabilirim
+
+⚠️ **Önemli:** Ben bir sağlık asistanıyım, tıbbi tanı koymam. Ciddi sağlık sorunları için mutlaka doktorunuza danışın.
+
+Size nasıl yardımcı olabilirim?
+"""
+
+STREAM_UNAVAILABLE_MESSAGE = "Üzgünüm, şu anda Llama servisi çalışmıyor. Temel sağlık önerileri için lütfen Ollama'yı başlatın."
+
+# Feature atıfı (/predict?explain=true) kolonlarının prompt'taki karşılıkları
+FEATURE_LABELS = {
+    'Age': 'Yaş',
+    'Gender': 'Cinsiyet',
+    'Height': 'Boy',
+    'Weight': 'Kilo',
+    'CALC': 'Alkol tüketimi',
+    'FAVC': 'Yüksek kalorili besin tüketimi',
+    'FCVC': 'Sebze tüketim sıklığı',
+    'NCP': 'Günlük öğün sayısı',
+    'SCC': 'Kalori takibi',
+    'SMOKE': 'Sigara kullanımı',
+    'CH2O': 'Günlük su tüketimi',
+    'family_history_with_overweight': 'Aile obezite geçmişi',
+    'FAF': 'Fiziksel aktivite sıklığı',
+    'TUE': 'Teknoloji kullanım süresi',
+    'CAEC': 'Öğün arası atıştırma',
+    'MTRANS': 'Ulaşım şekli',
+    'BMI': 'BMI',
+}
+
+
+def top_risk_drivers(prediction_data: Dict[str, Any], limit: int = 3) -> List[Tuple[str, float]]:
+    """
+    Tahmin edilen sınıfa en çok katkı veren feature'lar: [(kolon, yüzde puanı), ...]
+    Açıklama yoksa veya istemciden bozuk geldiyse boş liste.
+    """
+    explanation = prediction_data.get('explanation')
+    contributions = explanation.get('contributions') if isinstance(explanation, dict) else None
+    if not isinstance(contributions, dict):
+        return []
+    positive = [(column, float(value)) for column, value in contributions.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0]
+    return sorted(positive, key=lambda item: item[1], reverse=True)[:limit]
+
+
 class LlamaHealthBot:
     """Llama tabanlı sağlık danışmanı chatbot sınıfı"""
     
-    def __init__(self, ollama_url: str = "http://localhost:11434", model_name: str = "llama3.1"):
+    def __init__(self, ollama_url: str = "http://localhost:11434", model_name: str = "llama3.1",
+                 health_ttl: float = 10.0, failure_threshold: int = 3, breaker_cooldown: float = 30.0,
+                 pool_size: int = 10, max_retries: int = 2, connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0, stream_read_timeout: float = 60.0,
+                 response_cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[OllamaScheduler] = None,
+                 sessions: Optional[ChatSessionStore] = None, keep_alive: str = "30m"):
         self.ollama_url = ollama_url
         self.model_name = model_name
         self.api_endpoint = f"{ollama_url}/api/generate"
         self.chat_endpoint = f"{ollama_url}/api/chat"
+
+        # Keep-alive bağlantı havuzu: thread'ler arasında paylaşılan tek Session
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.stream_read_timeout = stream_read_timeout
+        self.session = self._create_session()
+        self._latency_lock = threading.Lock()
+        self._latencies = {}
+
+        # Aynı model/ayar/prompt için üretilmiş yanıtlar (None ise önbellek kapalı)
+        self.response_cache = response_cache
+
+        # Ollama'ya eşzamanlı üretim isteği sınırı ve FIFO kuyruk (None ise sınırsız)
+        self.scheduler = scheduler
+
+        # Çok turlu sohbet oturumları (/api/chat); None ise her mesaj tek seferlik /api/generate
+        self.sessions = sessions
+        # Model (ve KV cache) istekler arasında bellekte tutulur
+        self.keep_alive = keep_alive
+
+        # Önbelleklenmiş sağlık durumu: istekler ağ çağrısı yapmadan okur
+        self.health_ttl = health_ttl
+        self.failure_threshold = failure_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._health_lock = threading.Lock()
+        self._ollama_running = False
+        self._model_available = False
+        self._checked_at = 0.0
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
+        self._refreshing = False
+        self._monitor = None  # arka plan yenileyici (thread veya asyncio task)
         
         # Türkçe sağlık danışmanı system prompt'u
         self.system_prompt = """Sen uzman bir sağlık danışmanısın ve Türkçe konuşuyorsun. 
@@ -54,7 +389,7 @@ Her zaman pozitif ve destekleyici ol!"""
     def check_ollama_status(self) -> bool:
         """Ollama servisinin çalışıp çalışmadığını kontrol et"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=(self.connect_timeout, 5))
             return response.status_code == 200
         except requests.RequestException as e:
             logger.error(f"Ollama bağlantı hatası: {e}")
@@ -63,16 +398,182 @@ Her zaman pozitif ve destekleyici ol!"""
     def check_model_availability(self) -> bool:
         """Belirtilen modelin mevcut olup olmadığını kontrol et"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=(self.connect_timeout, 5))
             if response.status_code == 200:
-                models = response.json().get('models', [])
-                available_models = [model['name'].split(':')[0] for model in models]
-                return self.model_name in available_models
+                return self._parse_tags(response.json())
             return False
         except requests.RequestException as e:
             logger.error(f"Model kontrol hatası: {e}")
             return False
 
+    def _create_session(self) -> requests.Session:
+        """Havuz boyutu ve retry politikası ayarlı HTTP session oluştur"""
+        # Bağlantı hataları her metotta tekrar denenir (istek sunucuya ulaşmamıştır);
+        # 502/503/504 yanıtları sadece idempotent GET isteklerinde tekrar denenir
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=self.max_retries,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                              max_retries=retry, pool_block=False)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @contextmanager
+    def _timed(self, operation: str):
+        """Ollama çağrısının süresini operasyon bazında kaydet"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            OLLAMA_REQUEST_SECONDS.labels(operation).observe(elapsed)
+            with self._latency_lock:
+                stats = self._latencies.setdefault(operation, {"calls": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+                stats["calls"] += 1
+                stats["total"] += elapsed
+                stats["max"] = max(stats["max"], elapsed)
+                stats["last"] = elapsed
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """Havuz ayarları ve Ollama çağrı gecikmeleri (ms)"""
+        with self._latency_lock:
+            latencies = {
+                operation: {
+                    "calls": stats["calls"],
+                    "avg_ms": round(stats["total"] * 1000 / stats["calls"], 2),
+                    "max_ms": round(stats["max"] * 1000, 2),
+                    "last_ms": round(stats["last"] * 1000, 2)
+                }
+                for operation, stats in self._latencies.items()
+            }
+        return {
+            "pool_size": self.pool_size,
+            "max_retries": self.max_retries,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "stream_read_timeout": self.stream_read_timeout,
+            "latency": latencies
+        }
+
+    def _probe_health(self) -> None:
+        """Tek bir /api/tags isteğiyle hem servis hem model durumunu güncelle"""
+        try:
+            with self._timed('tags'):
+                response = self.session.get(f"{self.ollama_url}/api/tags", timeout=(self.connect_timeout, 5))
+            running = response.status_code == 200
+            available = False
+            if running:
+                available = self._parse_tags(response.json())
+        except (requests.RequestException, ValueError) as e:
+            OLLAMA_ERRORS.labels('health_check').inc()
+            logger.warning(f"Ollama sağlık kontrolü başarısız: {e}")
+            running = available = False
+
+        self._update_health(running, available)
+
+    def _parse_tags(self, tags: Any) -> bool:
+        """/api/tags yanıtında yapılandırılmış model var mı (beklenmeyen biçimler: model yok)"""
+        models = tags.get('models') if isinstance(tags, dict) else None
+        if not isinstance(models, list):
+            return False
+        return self.model_name in [str(model.get('name', '')).split(':')[0]
+                                   for model in models if isinstance(model, dict)]
+
+    def _monitor_failed(self, error: Exception) -> None:
+        """Monitor turunda beklenmeyen hata: sağlık kontrolü hatası say, durumu kullanılamaz yap"""
+        OLLAMA_ERRORS.labels('health_check').inc()
+        logger.exception(f"Ollama sağlık monitörü hatası: {error}")
+        self._update_health(False, False)
+
+    def _update_health(self, running: bool, available: bool) -> None:
+        with self._health_lock:
+            self._ollama_running = running
+            self._model_available = available
+            self._checked_at = time.monotonic()
+            if running:
+                self._consecutive_failures = 0
+                self._breaker_open_until = 0.0
+            else:
+                self._register_failure_locked()
+
+    def _register_failure_locked(self) -> None:
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.failure_threshold:
+            # Circuit breaker açılır: cooldown boyunca Ollama'ya probe gönderilmez
+            self._breaker_open_until = time.monotonic() + self.breaker_cooldown
+
+    def record_failure(self) -> None:
+        """Üretim isteği bağlantı hatası aldığında durumu hemen kullanılamaz yap"""
+        OLLAMA_ERRORS.labels('connection').inc()
+        with self._health_lock:
+            self._ollama_running = False
+            self._model_available = False
+            self._checked_at = time.monotonic()
+            self._register_failure_locked()
+
+    def refresh_health(self) -> None:
+        """Circuit breaker kapalıysa (veya cooldown dolduysa) durumu senkron yenile"""
+        with self._health_lock:
+            if time.monotonic() < self._breaker_open_until:
+                return
+        self._probe_health()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh_health()
+        finally:
+            with self._health_lock:
+                self._refreshing = False
+
+    def _monitor_loop(self) -> None:
+        while True:
+            # Tek bir hatalı tur thread'i sonlandırmamalı; aksi halde önbellekteki durum donar
+            try:
+                self.refresh_health()
+            except Exception as e:
+                self._monitor_failed(e)
+            time.sleep(self.health_ttl)
+
+    def start_health_monitor(self) -> None:
+        """Durumu health_ttl aralıklarla arka planda yenileyen daemon thread'i başlat"""
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._monitor_loop, name='ollama-health', daemon=True)
+            self._monitor.start()
+
+    def is_available(self) -> bool:
+        """Ollama ve model kullanılabilir mi (önbellekten, bloklamadan)"""
+        with self._health_lock:
+            available = self._ollama_running and self._model_available
+            stale = time.monotonic() - self._checked_at > self.health_ttl
+            refresh = stale and not self._refreshing and self._monitor is None
+            if refresh:
+                self._refreshing = True
+        if refresh:
+            # Monitor thread yoksa bayat durum isteği bekletmeden arka planda yenilenir
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return available
+
+    def health_snapshot(self) -> Dict[str, Any]:
+        """Önbellekteki sağlık durumu ve circuit breaker bilgisi"""
+        with self._health_lock:
+            now = time.monotonic()
+            return {
+                "ollama_running": self._ollama_running,
+                "model_available": self._model_available,
+                "checked_seconds_ago": round(now - self._checked_at, 1) if self._checked_at else None,
+                "consecutive_failures": self._consecutive_failures,
+                "circuit_open": now < self._breaker_open_until
+            }
+
     def format_health_context(self, prediction_data: Dict[str, Any], user_input: Dict[str, Any]) -> str:
         """Kullanıcının sağlık verilerini Llama için formatla"""
         
@@ -89,6 +590,11 @@ Her zaman pozitif ve destekleyici ol!"""
         
         predicted_class = prediction_data.get('predicted_class', 'Bilinmeyen')
         description = obesity_descriptions.get(predicted_class, predicted_class)
+        drivers = top_risk_drivers(prediction_data)
+        drivers_section = ''
+        if drivers:
+            lines = '\n'.join(f"- {FEATURE_LABELS.get(column, column)}: +{value:.1f} puan" for column, value in drivers)
+            drivers_section = f"\n🔍 Tahmini En Çok Etkileyen Faktörler (modelin karar yolundan):\n{lines}\n"
         
         context = f"""
 KULLANICI SAĞLIK PROFİLİ:
@@ -102,7 +608,7 @@ KULLANICI SAĞLIK PROFİLİ:
 - BMI: {prediction_data.get('bmi', 'Hesaplanamadı')}
 - Obezite Seviyesi: {description}
 - Tahmin Güveni: %{prediction_data.get('confidence', 0)}
-
+{drivers_section}
 📊 Yaşam Tarzı Bilgileri:
 - Aile Obezite Geçmişi: {user_input.get('family_history', 'Belirtilmemiş')}
 - Yüksek Kalorili Besin Tüketimi: {user_input.get('favc', 'Belirtilmemiş')}
@@ -118,93 +624,243 @@ Bu bilgilere dayanarak kişiselleştirilmiş sağlık önerileri ver.
 """
         return context
 
-    def generate_chat_response(self, user_message: str, context: Optional[str] = None) -> str:
-        """Basit chat response üret (streaming olmayan)"""
-        try:
-            # Prompt'u hazırla
-            full_prompt = self.system_prompt
-            if context:
-                full_prompt += f"\n\n{context}"
-            full_prompt += f"\n\nKullanıcı Mesajı: {user_message}"
-            
-            payload = {
-                "model": self.model_name,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 1000
-                }
+    def build_prompt(self, user_message: str, context: Optional[str] = None) -> str:
+        """System prompt + (varsa) sağlık bağlamı + kullanıcı mesajı"""
+        full_prompt = self.build_system_message(context)
+        full_prompt += f"\n\nKullanıcı Mesajı: {user_message}"
+        return full_prompt
+
+    def build_system_message(self, context: Optional[str] = None) -> str:
+        """System prompt + (varsa) sağlık bağlamı"""
+        if context:
+            return self.system_prompt + f"\n\n{context}"
+        return self.system_prompt
+
+    def build_payload(self, prompt: str, stream: bool) -> Dict[str, Any]:
+        """/api/generate istek gövdesi"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": 1000
             }
-            
-            response = requests.post(
-                self.api_endpoint,
+        }
+
+    def build_chat_payload(self, messages: List[Dict[str, str]], stream: bool) -> Dict[str, Any]:
+        """/api/chat istek gövdesi (ayarlar /api/generate ile aynı)"""
+        payload = self.build_payload('', stream)
+        del payload["prompt"]
+        payload["messages"] = messages
+        return payload
+
+    def _endpoint_for(self, payload: Dict[str, Any]) -> str:
+        return self.chat_endpoint if "messages" in payload else self.api_endpoint
+
+    @staticmethod
+    def response_text(result: Dict[str, Any]) -> Optional[str]:
+        """/api/generate ('response') veya /api/chat ('message.content') yanıtındaki metin"""
+        if 'response' in result:
+            return result['response']
+        message = result.get('message')
+        return message.get('content') if isinstance(message, dict) else None
+
+    def open_session(self, session_id: Optional[str], context: Optional[str] = None) -> Optional[ChatSession]:
+        """Oturumu devam ettir veya yenisini aç; oturumlar kapalıysa None"""
+        if self.sessions is None:
+            return None
+        return self.sessions.get_or_create(session_id, self.build_system_message(context),
+                                           update_system=bool(context))
+
+    @staticmethod
+    def _lock_session(session: ChatSession) -> None:
+        # Aynı oturumda yanıtı süren bir tur varken ikinci tur beklemez, fallback'e düşer
+        if not session.lock.acquire(blocking=False):
+            raise OllamaBusy(f"Oturumda devam eden bir yanıt var: {session.session_id}")
+
+    def _slot(self):
+        """Üretim isteği için zamanlayıcı slotu (zamanlayıcı yoksa no-op)"""
+        return self.scheduler.slot() if self.scheduler is not None else nullcontext()
+
+    def _cache_lookup(self, payload: Dict[str, Any], cache: bool):
+        """
+        (önbellek anahtarı, önbellekteki yanıt) döndür; önbellek kapalıysa veya
+        çağrı önbelleği istemiyorsa (cache=False) (None, None)
+        """
+        if not cache or self.response_cache is None:
+            return None, None
+        key = ResponseCache.make_key(payload)
+        return key, self.response_cache.get(key)
+
+    def _cache_store(self, key: Optional[str], text: str) -> None:
+        if key is not None and text:
+            self.response_cache.set(key, text)
+
+    @staticmethod
+    def replay_chunks(text: str) -> Generator[str, None, None]:
+        """Önbellekteki metni kelime kelime (boşluklar korunarak) stream et"""
+        for chunk in re.findall(r'\s*\S+\s*', text):
+            yield chunk
+
+    def request_generation(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Tek bir stream=False /api/generate (payload'da messages varsa /api/chat) çağrısı.
+
+        Yanıt metnini (yanıtta metin yoksa None) döndürür; bağlantı hatasında
+        requests.RequestException, HTTP hatasında OllamaError, kuyruk bütçesi
+        aşıldığında OllamaBusy fırlatır.
+        """
+        with self._slot(), self._timed('generate'):
+            response = self.session.post(
+                self._endpoint_for(payload),
                 json=payload,
-                timeout=30
+                timeout=(self.connect_timeout, self.read_timeout)
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'Üzgünüm, bir yanıt üretemedi.')
+
+        if response.status_code != 200:
+            OLLAMA_ERRORS.labels('http').inc()
+            raise OllamaError(f"API hatası: {response.status_code} - {response.text}")
+        result = response.json()
+        observe_generation(result)
+        return self.response_text(result)
+
+    def _generate(self, payload: Dict[str, Any], cache: bool = False) -> Optional[str]:
+        cache_key, cached = self._cache_lookup(payload, cache)
+        if cached is not None:
+            return cached
+        text = self.request_generation(payload)
+        if text is not None:
+            self._cache_store(cache_key, text)
+        return text
+
+    def _generate_session_turn(self, session: ChatSession, user_message: str) -> Optional[str]:
+        self._lock_session(session)
+        try:
+            payload = self.build_chat_payload(session.request_messages(user_message), stream=False)
+            text = self._generate(payload)
+            if text is not None:
+                session.append_turn(user_message, text, self.sessions.max_messages)
+            return text
+        finally:
+            session.lock.release()
+
+    def generate_chat_response(self, user_message: str, context: Optional[str] = None,
+                               session: Optional[ChatSession] = None, cache: bool = False) -> str:
+        """
+        Basit chat response üret (streaming olmayan); session verilirse çok turlu /api/chat.
+        cache=True sadece deterministik prompt'lar (sağlık önerileri) için; serbest
+        chat mesajları sıcaklık 0.7 ile örneklenir ve önbelleğe alınmaz
+        """
+        try:
+            if session is not None:
+                text = self._generate_session_turn(session, user_message)
             else:
-                logger.error(f"API hatası: {response.status_code} - {response.text}")
-                return "Şu anda bir teknik sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+                text = self._generate(
+                    self.build_payload(self.build_prompt(user_message, context), stream=False), cache)
+            if text is None:
+                return 'Üzgünüm, bir yanıt üretemedi.'
+            return text
                 
+        except OllamaError as e:
+            logger.error(str(e))
+            return "Şu anda bir teknik sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
         except requests.RequestException as e:
             logger.error(f"İstek hatası: {e}")
+            self.record_failure()
             return "Bağlantı sorunu yaşıyorum. Ollama servisinin çalıştığından emin olun."
+        except OllamaBusy:
+            raise
         except Exception as e:
             logger.error(f"Beklenmeyen hata: {e}")
             return "Bir hata oluştu. Lütfen daha sonra tekrar deneyin."
 
-    def generate_streaming_response(self, user_message: str, context: Optional[str] = None) -> Generator[str, None, None]:
-        """Streaming chat response üret"""
-        try:
-            # Prompt'u hazırla
-            full_prompt = self.system_prompt
-            if context:
-                full_prompt += f"\n\n{context}"
-            full_prompt += f"\n\nKullanıcı Mesajı: {user_message}"
-            
-            payload = {
-                "model": self.model_name,
-                "prompt": full_prompt,
-                "stream": True,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 1000
-                }
-            }
-            
-            response = requests.post(
-                self.api_endpoint,
-                json=payload,
-                stream=True,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
+    def _stream_payload(self, payload: Dict[str, Any], cache: bool = False) -> Generator[str, None, Optional[str]]:
+        """
+        Önbellekten (cache=True ise) veya Ollama NDJSON stream'inden parçaları üret.
+
+        Generator'ın dönüş değeri tamamlanan yanıtın tam metnidir; stream
+        yarıda kaldıysa veya HTTP hatası döndüyse None.
+        """
+        cache_key, cached = self._cache_lookup(payload, cache)
+        if cached is not None:
+            yield from self.replay_chunks(cached)
+            return cached
+
+        # Slot stream bitene kadar tutulur (Ollama o süre boyunca üretim yapıyor)
+        start = time.perf_counter()
+        with self._slot():
+            # İlk byte'a kadar geçen süre ölçülür; with bloğu bağlantıyı havuza iade eder
+            with self._timed('stream_first_byte'):
+                response = self.session.post(
+                    self._endpoint_for(payload),
+                    json=payload,
+                    stream=True,
+                    timeout=(self.connect_timeout, self.stream_read_timeout)
+                )
+
+            with response:
+                if response.status_code != 200:
+                    OLLAMA_ERRORS.labels('http').inc()
+                    yield "Teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+                    return None
+
+                parts = []
                 for line in response.iter_lines():
-                    if line:
-                        try:
-                            json_response = json.loads(line.decode('utf-8'))
-                            if 'response' in json_response:
-                                yield json_response['response']
-                                
-                            # Stream tamamlandı kontrolü
-                            if json_response.get('done', False):
-                                break
-                                
-                        except json.JSONDecodeError:
-                            continue
+                    if not line:
+                        continue
+                    try:
+                        json_response = json.loads(line.decode('utf-8'))
+                    except json.JSONDecodeError:
+                        continue
+                    text = self.response_text(json_response)
+                    if text:
+                        if not parts:
+                            LLM_TTFT_SECONDS.observe(time.perf_counter() - start)
+                        parts.append(text)
+                        yield text
+
+                    # Stream tamamlandı kontrolü: sadece tamamlanan yanıtlar önbelleğe girer
+                    if json_response.get('done', False):
+                        observe_generation(json_response)
+                        full_text = ''.join(parts)
+                        self._cache_store(cache_key, full_text)
+                        return full_text
+        return None
+
+    def _stream_session_turn(self, session: ChatSession, user_message: str) -> Generator[str, None, None]:
+        self._lock_session(session)
+        try:
+            payload = self.build_chat_payload(session.request_messages(user_message), stream=True)
+            text = yield from self._stream_payload(payload)
+            # İstemci yarıda koparsa (GeneratorExit) tur geçmişe eklenmez
+            if text:
+                session.append_turn(user_message, text, self.sessions.max_messages)
+        finally:
+            session.lock.release()
+
+    def generate_streaming_response(self, user_message: str, context: Optional[str] = None,
+                                    session: Optional[ChatSession] = None) -> Generator[str, None, None]:
+        """
+        Streaming chat response üret; session verilirse çok turlu /api/chat
+
+        Kuyruk bütçesi aşılırsa ilk chunk'tan önce OllamaBusy fırlatılır.
+        """
+        try:
+            if session is not None:
+                yield from self._stream_session_turn(session, user_message)
             else:
-                yield "Teknik bir sorun yaşıyorum. Lütfen daha sonra tekrar deneyin."
+                yield from self._stream_payload(
+                    self.build_payload(self.build_prompt(user_message, context), stream=True))
                 
         except requests.RequestException as e:
             logger.error(f"Streaming hatası: {e}")
+            self.record_failure()
             yield "Bağlantı sorunu yaşıyorum. Ollama servisinin çalıştığından emin olun."
+        except OllamaBusy:
+            raise
         except Exception as e:
             logger.error(f"Beklenmeyen streaming hatası: {e}")
             yield "Bir hata oluştu. Lütfen daha sonra tekrar deneyin."
@@ -213,21 +869,86 @@ Bu bilgilere dayanarak kişiselleştirilmiş sağlık önerileri ver.
         """Obezite tahmin sonuçlarına özel sağlık önerileri üret"""
         context = self.format_health_context(prediction_data, user_input)
         
-        message = """Yukarıdaki sağlık profilime göre:
-1. Durumumu nasıl değerlendiriyorsun?
-2. Beslenme konusunda hangi önerilerin var?
-3. Hangi egzersizleri yapmalıyım?
-4. Yaşam tarzımda hangi değişiklikleri yapmalıyım?
-5. Motivasyonel tavsiyeler ver.
-
-Lütfen detaylı ve kişiselleştirilmiş öneriler ver."""
+        return self.generate_chat_response(RECOMMENDATION_MESSAGE, context, cache=True)
 
-        return self.generate_chat_response(message, context)
+def bot_metrics(bot: LlamaHealthBot):
+    """/metrics collector'ı: önbellek, zamanlayıcı ve oturum istatistikleri (sorgu anında okunur)"""
+    health = bot.health_snapshot()
+    yield ('ollama_available', 'gauge', 'Ollama çalışıyor ve model yüklü mü (1/0)',
+           [({}, 1 if health['ollama_running'] and health['model_available'] else 0)])
+    yield ('ollama_circuit_open', 'gauge', 'Circuit breaker açık mı (1/0)', [({}, 1 if health['circuit_open'] else 0)])
+    if bot.response_cache is not None:
+        stats = bot.response_cache.stats()
+        yield ('llm_response_cache_lookups_total', 'counter', 'LLM yanıt önbelleği aramaları',
+               [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+    if bot.scheduler is not None:
+        stats = bot.scheduler.stats()
+        yield ('ollama_in_flight', 'gauge', "Ollama'da süren üretim istekleri", [({}, stats['in_flight'])])
+        yield ('ollama_queue_depth', 'gauge', 'Ollama kuyruğunda bekleyen istekler', [({}, stats['queue_depth'])])
+        yield ('ollama_scheduler_rejections_total', 'counter', 'Zamanlayıcının reddettiği istekler',
+               [({'reason': reason}, stats[key]) for reason, key in (('queue_full', 'rejected_queue_full'),
+                                                                     ('expected_wait', 'rejected_expected_wait'),
+                                                                     ('expired', 'expired_in_queue'))])
+    if bot.sessions is not None:
+        yield ('chat_sessions_active', 'gauge', 'Açık sohbet oturumları', [({}, bot.sessions.stats()['active'])])
 
 # Yardımcı fonksiyonlar
-def create_bot_instance() -> LlamaHealthBot:
-    """Yeni bot instance'ı oluştur"""
-    return LlamaHealthBot()
+def create_response_cache() -> Optional[ResponseCache]:
+    """Ortam değişkenlerinden yanıt önbelleği kur (RESPONSE_CACHE_SIZE=0 kapatır)"""
+    max_entries = int(os.environ.get('RESPONSE_CACHE_SIZE', 512))
+    if max_entries <= 0:
+        return None
+    return ResponseCache(
+        max_entries=max_entries,
+        ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 24 * 3600)),
+        sqlite_path=os.environ.get('RESPONSE_CACHE_DB') or None
+    )
+
+def create_scheduler() -> Optional[OllamaScheduler]:
+    """Ortam değişkenlerinden Ollama zamanlayıcısı kur (OLLAMA_MAX_CONCURRENCY=0 kapatır)"""
+    max_concurrency = int(os.environ.get('OLLAMA_MAX_CONCURRENCY', 2))
+    if max_concurrency <= 0:
+        return None
+    return OllamaScheduler(
+        max_concurrency=max_concurrency,
+        max_queue=int(os.environ.get('OLLAMA_QUEUE_SIZE', 64)),
+        default_budget=float(os.environ.get('OLLAMA_QUEUE_BUDGET', 10))
+    )
+
+def create_session_store() -> Optional[ChatSessionStore]:
+    """Ortam değişkenlerinden sohbet oturum deposu kur (CHAT_SESSION_MAX=0 kapatır)"""
+    max_sessions = int(os.environ.get('CHAT_SESSION_MAX', 1000))
+    if max_sessions <= 0:
+        return None
+    return ChatSessionStore(
+        max_sessions=max_sessions,
+        idle_ttl=float(os.environ.get('CHAT_SESSION_TTL', 1800)),
+        max_messages=int(os.environ.get('CHAT_SESSION_MAX_MESSAGES', 20))
+    )
+
+def create_bot_instance(bot_class: type = LlamaHealthBot) -> LlamaHealthBot:
+    """Yeni bot instance'ı oluştur (bağlantı ayarları ortam değişkenlerinden okunur)"""
+    return bot_class(
+        response_cache=create_response_cache(),
+        scheduler=create_scheduler(),
+        sessions=create_session_store(),
+        keep_alive=os.environ.get('OLLAMA_KEEP_ALIVE', '30m'),
+        ollama_url=os.environ.get('OLLAMA_URL', 'http://localhost:11434'),
+        model_name=os.environ.get('OLLAMA_MODEL', 'llama3.1'),
+        pool_size=int(os.environ.get('OLLAMA_POOL_SIZE', 10)),
+        max_retries=int(os.environ.get('OLLAMA_MAX_RETRIES', 2)),
+        connect_timeout=float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', 3.05)),
+        read_timeout=float(os.environ.get('OLLAMA_READ_TIMEOUT', 30)),
+        stream_read_timeout=float(os.environ.get('OLLAMA_STREAM_READ_TIMEOUT', 60))
+    )
+
+def get_fallback_response(context: Optional[Dict[str, Any]], default_message: str) -> str:
+    """Ollama yokken: tahmin bağlamı varsa hızlı ipuçları, yoksa varsayılan mesaj"""
+    if context and 'predicted_class' in context:
+        bmi = context.get('bmi', 0)
+        obesity_class = context.get('predicted_class', 'Normal Weight')
+        return get_quick_health_tips(obesity_class, bmi)
+    return default_message
 
 def get_quick_health_tips(obesity_class: str, bmi: float) -> str:
     """Hızlı sağlık ipuçları (Ollama olmadan da çalışacak fallback)"""
@@ -0,0 +1,230 @@
+"""
+Prometheus metin formatında hafif metrikler (/metrics)
+prometheus_client bağımlılığı olmadan sayaçlar, etiketli histogramlar ve
+sorgu anında çağrılan collector'lar (önbellek/zamanlayıcı istatistikleri gibi
+zaten tutulan sayılar). Sıcak yolda sadece kilit altında birkaç toplama yapılır;
+etiket kombinasyonları ilk kullanımda bir kez oluşturulur.
+"""
+
+import bisect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Saniye cinsinden kovalar
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                 0.05, 0.25, 1)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Collector çıktısı: (isim, tip, açıklama, [(etiketler, değer), ...])
+Sample = Tuple[Dict[str, Any], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+
+class Histogram:
+    """Kümülatif kovalı basit histogram (Prometheus histogram formatı)"""
+
+    def __init__(self, buckets):
+        self.bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.bounds) + 1)  # son kova: +Inf
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(üst sınır, kümülatif sayı) çiftleri; son sınır +Inf"""
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float('inf'),), self._counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return buckets
+
+    def snapshot(self) -> Dict[str, Any]:
+        # [üst sınır, kümülatif sayı] çiftleri (JSON'da sıra korunur)
+        buckets = [['+Inf' if bound == float('inf') else str(bound), count] for bound, count in self.cumulative()]
+        return {"buckets": buckets, "sum": round(self._sum, 6), "count": self._count}
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', 'histogram')
+
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float]):
+        self._lock = lock
+        self.histogram = Histogram(buckets)
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.histogram.observe(value)
+
+
+class _Metric:
+    """Etiket değerleri -> çocuk metrik; çocuklar bir kez oluşturulup tekrar kullanılır"""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class Counter(_Metric):
+    """Monoton artan sayaç"""
+
+    type_name = 'counter'
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild(threading.Lock())
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Etiketsiz sayaç için kısayol"""
+        self.labels().inc(amount)
+
+    def render(self) -> Iterable[str]:
+        for key, child in self._items():
+            yield f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(child.value)}"
+
+
+class LatencyHistogram(_Metric):
+    """Etiketli histogram (süreler saniye cinsinden)"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(threading.Lock(), self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Etiketsiz histogram için kısayol"""
+        self.labels().observe(value)
+
+    def render(self) -> Iterable[str]:
+        for key, child in self._items():
+            labels = dict(zip(self.labelnames, key))
+            with child._lock:
+                buckets = child.histogram.cumulative()
+                total, count = child.histogram._sum, child.histogram._count
+            for bound, cumulative in buckets:
+                yield f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class MetricsRegistry:
+    """Süreç içi metrik kayıt defteri; render() Prometheus metin formatı üretir"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[MetricFamily]]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modül tekrar import edilirse aynı metrik kullanılır
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> LatencyHistogram:
+        return self._register(LatencyHistogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, name: str, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Sorgu anında çağrılan fonksiyon; aynı isimle tekrar eklenirse eskisinin yerine geçer"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, type_name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {_escape(documentation)}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# Süreç genelindeki varsayılan kayıt defteri (Flask uygulaması ve aiohttp gateway'i ayrı süreçlerdir)
+METRICS = MetricsRegistry()
+
+HTTP_REQUESTS = METRICS.counter(
+    'http_requests_total', 'HTTP istekleri (endpoint, metot, durum kodu)', ('endpoint', 'method', 'status'))
+HTTP_REQUEST_SECONDS = METRICS.histogram(
+    'http_request_duration_seconds',
+    'İstek süresi; stream yanıtlarında ilk byte hazır olana kadar', ('endpoint', 'method'))
+PREDICTION_STAGE_SECONDS = METRICS.histogram(
+    'prediction_stage_seconds', 'Tahmin aşamalarının süresi (validation, encode, scale, forest)', ('stage',),
+    STAGE_BUCKETS)
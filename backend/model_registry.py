@@ -0,0 +1,480 @@
+"""
+Sürümlü model kayıt dizini (registry) ve çalışma anında model yenileme
+Her sürüm models/registry/<sürüm>/ altında model, scaler, düzleştirilmiş orman,
+holdout örneği ve manifest.json ile yayınlanır; CURRENT dosyası aktif sürümü
+gösterir. Sunucu dizini arka planda izler, yeni sürümü yükler, holdout
+örneğinde doğrular ve tek bir referans atamasıyla devreye alır. Süren
+istekler başladıkları sürümün referansını tuttuğu için kesilmez.
+
+Dizin düzeni:
+    models/registry/CURRENT                 -> "20261018-153000"
+    models/registry/<sürüm>/manifest.json   -> sürüm, metrikler, dosya özetleri
+    models/registry/<sürüm>/obesity_model.pkl, scaler.pkl, encoder.json, holdout.json
+    models/registry/<sürüm>/flat/           -> pickle'sız, memory-map ile açılan orman + scaler
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+from features import DEFAULT_ENCODER, FeatureEncoder, load_encoder
+from forest import FlatForest
+from inference import ScoringService, create_engine, load_flat_artifacts, save_flat_artifacts
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+MODEL_FILE = 'obesity_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+FLAT_FOREST_FILE = 'forest_flat.npz'
+FLAT_DIR = 'flat'
+HOLDOUT_FILE = 'holdout.json'
+ENCODER_FILE = 'encoder.json'
+
+LEGACY_VERSION = 'legacy'
+
+
+class ModelValidationError(RuntimeError):
+    """Yeni sürüm holdout doğrulamasından geçemedi; aktif sürüm değişmez"""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _artifact_files(directory: str) -> List[str]:
+    """Manifest'te özetlenen dosyalar (alt dizinler dahil, göreli yol)"""
+    files = []
+    for base, _, names in os.walk(directory):
+        for name in names:
+            if name != MANIFEST_FILE:
+                files.append(os.path.relpath(os.path.join(base, name), directory).replace(os.sep, '/'))
+    return sorted(files)
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Yarım yazılmış dosya okunmasın diye geçici dosya + os.replace"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _reserve_version(root: str, version: Optional[str]) -> str:
+    """
+    Sürüm dizinini boş olarak atomik oluştur (os.mkdir). Ad verilmediyse zaman
+    damgası kullanılır; aynı saniyedeki yayınlar -02, -03 ... ekiyle ayrışır
+    """
+    if version is not None:
+        try:
+            os.mkdir(os.path.join(root, version))
+        except FileExistsError:
+            raise FileExistsError(f"Model version already exists: {version}")
+        return version
+    base = datetime.now().strftime('%Y%m%d-%H%M%S')
+    for attempt in range(1, 100):
+        version = base if attempt == 1 else f"{base}-{attempt:02d}"
+        try:
+            os.mkdir(os.path.join(root, version))
+            return version
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"Could not reserve a model version name for {base}")
+
+
+def _write_version(tmp_dir: str, version: str, model, scaler, holdout_records: List[Dict[str, Any]],
+                   metrics: Optional[Dict[str, Any]], encoder: FeatureEncoder,
+                   holdout_labels: Optional[List[int]]) -> None:
+    """Sürüm dosyalarını (model, scaler, encoder, flat/, holdout, manifest) dizine yaz"""
+    os.makedirs(tmp_dir)
+    joblib.dump(model, os.path.join(tmp_dir, MODEL_FILE))
+    joblib.dump(scaler, os.path.join(tmp_dir, SCALER_FILE))
+    encoder.save(os.path.join(tmp_dir, ENCODER_FILE))
+    if FlatForest.supports(model):
+        save_flat_artifacts(os.path.join(tmp_dir, FLAT_DIR), model, scaler)
+
+    _, results, errors = ScoringService(model, scaler, encoder).score_records(holdout_records)
+    if errors:
+        raise ValueError(f"Holdout sample contains invalid records: {errors[:3]}")
+    with open(os.path.join(tmp_dir, HOLDOUT_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'records': holdout_records,
+                   'expected': [result.class_label for result in results],
+                   'labels': [int(label) for label in holdout_labels] if holdout_labels is not None else None}, f)
+
+    files = {name: _sha256(os.path.join(tmp_dir, name)) for name in _artifact_files(tmp_dir)}
+    manifest = {
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'model_type': type(model).__name__,
+        'metrics': metrics or {},
+        'holdout_size': len(holdout_records),
+        'files': files
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def publish_version(root: str, model, scaler, holdout_records: List[Dict[str, Any]],
+                    metrics: Optional[Dict[str, Any]] = None, version: Optional[str] = None,
+                    activate: bool = True, encoder: FeatureEncoder = DEFAULT_ENCODER,
+                    holdout_labels: Optional[List[int]] = None, keep: Optional[int] = None) -> str:
+    """
+    Eğitilmiş modeli yeni bir registry sürümü olarak yayınla (create_models.py kullanır).
+
+    Holdout kayıtları yayınlama anında skorlanır; sunucu aynı sınıfları
+    üretemeyen (bozuk/eksik dosya, kütüphane uyumsuzluğu) sürümü devreye almaz.
+    holdout_labels (gerçek sınıflar) verilirse doğrulamada doğruluk da raporlanır.
+    Sürüm adı boş dizinle ayrılır (aynı ad varsa FileExistsError), içerik geçici
+    dizine yazılıp tek rename ile bu dizinin yerine geçer.
+    keep verilirse en yeni keep sürüm dışındakiler silinir (prune_versions).
+    """
+    os.makedirs(root, exist_ok=True)
+    version = _reserve_version(root, version)
+    final_dir = os.path.join(root, version)
+    tmp_dir = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+    try:
+        _write_version(tmp_dir, version, model, scaler, holdout_records, metrics, encoder, holdout_labels)
+        # Boş dizinin üzerine rename (POSIX): sürüm tek adımda eksiksiz görünür
+        os.rename(tmp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.isdir(final_dir) and not os.listdir(final_dir):
+            os.rmdir(final_dir)
+        raise
+
+    if activate:
+        _write_atomic(os.path.join(root, CURRENT_FILE), version + '\n')
+    if keep:
+        prune_versions(root, keep)
+    return version
+
+
+def prune_versions(root: str, keep: int) -> List[str]:
+    """
+    En yeni keep sürümü tut, eskileri sil. CURRENT'ın gösterdiği sürüm
+    (geri alınmış olsa bile) silinmez. CURRENT'ı reddedip eski bir sürümle
+    devam eden sunucu etkilenmez: flat diziler memory-map ile açık kalır,
+    büyük matrisler için pickle yüklenemezse asıl motor kullanılır
+    (ScoringService.engine_for). Dönüş: silinen sürümler
+    """
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding='utf-8') as f:
+            current = f.read().strip()
+    except FileNotFoundError:
+        current = None
+    versions = sorted((name for name in os.listdir(root) if not name.startswith('.')
+                       and os.path.isfile(os.path.join(root, name, MANIFEST_FILE))), reverse=True)
+    removed = [version for version in versions[max(keep, 1):] if version != current]
+    for version in removed:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+    return removed
+
+
+def _accuracy(valid_index, results, labels: List[int]) -> float:
+    """Gerçek sınıflarla eşleşen tahmin oranı (skorlanamayan kayıtlar yanlış sayılır)"""
+    matches = sum(result.class_label == labels[index] for index, result in zip(valid_index, results))
+    return matches / len(labels)
+
+
+@dataclass
+class LoadedModel:
+    """Devrede olan (veya yüklenen) sürüm: skorlama servisi ve yükleme bilgileri"""
+    version: str
+    scoring: ScoringService
+    path: str
+    manifest: Dict[str, Any] = field(default_factory=dict)
+    loaded_at: str = ''
+    load_seconds: float = 0.0
+    artifact_format: str = 'pickle'
+    validation: Optional[Dict[str, Any]] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "created_at": self.manifest.get('created_at'),
+            "metrics": self.manifest.get('metrics', {}),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "artifact_format": self.artifact_format,
+            "validation": self.validation
+        }
+
+
+class ModelRegistry:
+    """
+    Registry dizinini izleyen ve aktif modeli atomik olarak değiştiren yönetici.
+
+    root:          sürüm dizinlerinin bulunduğu klasör
+    engine_name:   inference motoru ('flat' veya 'sklearn')
+    legacy_dir:    registry boşsa models/*.pkl dosyalarının bulunduğu klasör
+    poll_interval: dizin kontrol aralığı (saniye)
+    min_agreement: holdout örneğinde yayınlama anındaki sınıflarla en az uyum oranı
+    min_accuracy:  holdout gerçek sınıflarına göre en az doğruluk
+    max_accuracy_drop: aynı holdout'ta aktif sürüme göre izin verilen doğruluk düşüşü
+                   (None: karşılaştırma yapılmaz)
+    """
+
+    def __init__(self, root: str, engine_name: str = 'flat', legacy_dir: Optional[str] = None,
+                 poll_interval: float = 10.0, min_agreement: float = 0.99, min_accuracy: float = 0.0,
+                 max_accuracy_drop: Optional[float] = 0.01):
+        self.root = root
+        self.engine_name = engine_name
+        self.legacy_dir = legacy_dir
+        self.poll_interval = poll_interval
+        self.min_agreement = min_agreement
+        self.min_accuracy = min_accuracy
+        self.max_accuracy_drop = max_accuracy_drop
+        self.active: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+        self._failed: Dict[str, str] = {}
+        self._history = deque(maxlen=10)
+        self._checked_at = 0.0
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def latest_version(self) -> Optional[str]:
+        """CURRENT dosyasının gösterdiği sürüm; yoksa manifest'i olan en yeni sürüm"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), encoding='utf-8') as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return None
+        versions = [name for name in names if not name.startswith('.')
+                    and os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))]
+        return max(versions) if versions else None
+
+    def _load_scoring(self, directory: str):
+        """
+        'flat' motorunda flat/ dizini varsa joblib/sklearn olmadan memory-map ile
+        yükle; yoksa (veya 'sklearn' motorunda) pickle'lardan yükle. 'flat'
+        motorunda büyük matrisler (BATCH_ENGINE_MIN_ROWS) sklearn modeline gider. Encoder
+        modelin yanındaki encoder.json'dan (yoksa DEFAULT_ENCODER) gelir.
+        Dönüş: (ScoringService, artefakt formatı)
+        """
+        encoder = load_encoder(os.path.join(directory, ENCODER_FILE))
+        flat_dir = os.path.join(directory, FLAT_DIR)
+        model_path = os.path.join(directory, MODEL_FILE)
+        if self.engine_name == 'flat' and os.path.isdir(flat_dir):
+            engine, scaler = load_flat_artifacts(flat_dir)
+            # Büyük matrisler için pickle ilk toplu istekte yüklenir (açılış sklearn'süz kalır)
+            batch_engine = (lambda: joblib.load(model_path)) if os.path.exists(model_path) else None
+            return ScoringService(engine, scaler, encoder, batch_engine=batch_engine), 'mmap'
+        model = joblib.load(model_path)
+        scaler = joblib.load(os.path.join(directory, SCALER_FILE))
+        engine = create_engine(self.engine_name, model, os.path.join(directory, FLAT_FOREST_FILE))
+        batch_engine = (lambda: model) if engine is not model else None
+        return ScoringService(engine, scaler, encoder, batch_engine=batch_engine), 'pickle'
+
+    def _load_version(self, version: str) -> LoadedModel:
+        path = os.path.join(self.root, version)
+        with open(os.path.join(path, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+        for name, digest in manifest.get('files', {}).items():
+            if _sha256(os.path.join(path, name)) != digest:
+                raise ModelValidationError(f"Checksum mismatch for {name}")
+
+        start = time.perf_counter()
+        scoring, artifact_format = self._load_scoring(path)
+        load_seconds = time.perf_counter() - start
+
+        loaded = LoadedModel(version, scoring, path, manifest, datetime.now().isoformat(), load_seconds,
+                             artifact_format)
+        loaded.validation = self.validate(loaded)
+        return loaded
+
+    def _load_legacy(self) -> Optional[LoadedModel]:
+        """Registry'de sürüm yoksa eski models/obesity_model.pkl düzeni (doğrulamasız)"""
+        if not self.legacy_dir or not os.path.exists(os.path.join(self.legacy_dir, MODEL_FILE)):
+            return None
+        start = time.perf_counter()
+        scoring, artifact_format = self._load_scoring(self.legacy_dir)
+        return LoadedModel(LEGACY_VERSION, scoring, self.legacy_dir, {}, datetime.now().isoformat(),
+                           time.perf_counter() - start, artifact_format)
+
+    def load(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Verilen (yoksa registry'deki güncel) sürümü doğrulayarak yükle; devreye
+        almaz. Registry boşsa eski düzendeki dosyalar. Toplu skorlama gibi
+        sunucu dışı araçlar için.
+        """
+        version = version or self.latest_version()
+        if version is None or version == LEGACY_VERSION:
+            loaded = self._load_legacy()
+        else:
+            loaded = self._load_version(version)
+        if loaded is None:
+            raise FileNotFoundError(f"No model found in {self.root} or {self.legacy_dir}")
+        return loaded
+
+    def validate(self, loaded: LoadedModel) -> Dict[str, Any]:
+        """
+        Holdout örneğini yeni sürümle skorla: olasılıklar geçerli olmalı ve
+        sınıflar yayınlama anında kaydedilenlerle en az min_agreement oranında uyuşmalı.
+        Holdout gerçek sınıfları içeriyorsa doğruluk en az min_accuracy olmalı ve
+        aynı kayıtlarda aktif sürümün doğruluğundan max_accuracy_drop'tan fazla düşmemeli
+        """
+        start = time.perf_counter()
+        with open(os.path.join(loaded.path, HOLDOUT_FILE), encoding='utf-8') as f:
+            holdout = json.load(f)
+        records, expected = holdout['records'], holdout['expected']
+        if not records:
+            raise ModelValidationError("Holdout sample is empty")
+
+        valid_index, results, errors = loaded.scoring.score_records(records)
+        if errors:
+            raise ModelValidationError(f"{len(errors)} holdout records could not be scored")
+        for result in results:
+            total = sum(result.probabilities.values())
+            if not math.isfinite(total) or abs(total - 100.0) > 0.01:
+                raise ModelValidationError(f"Invalid probability distribution (sum={total})")
+
+        matches = sum(result.class_label == expected[index] for index, result in zip(valid_index, results))
+        agreement = matches / len(records)
+        if agreement < self.min_agreement:
+            raise ModelValidationError(
+                f"Holdout agreement {agreement:.3f} below threshold {self.min_agreement:.3f}")
+        labels = holdout.get('labels')
+        accuracy = active_accuracy = None
+        if labels:
+            accuracy = _accuracy(valid_index, results, labels)
+            if accuracy < self.min_accuracy:
+                raise ModelValidationError(
+                    f"Holdout accuracy {accuracy:.3f} below threshold {self.min_accuracy:.3f}")
+            active = self.active
+            if self.max_accuracy_drop is not None and active is not None and active is not loaded:
+                active_index, active_results, _ = active.scoring.score_records(records)
+                active_accuracy = _accuracy(active_index, active_results, labels)
+                if accuracy < active_accuracy - self.max_accuracy_drop:
+                    raise ModelValidationError(
+                        f"Holdout accuracy {accuracy:.3f} regressed from {active_accuracy:.3f} "
+                        f"(active version {active.version}, max drop {self.max_accuracy_drop:.3f})")
+        return {
+            "holdout_size": len(records),
+            "agreement": round(agreement, 4),
+            "accuracy": round(accuracy, 4) if accuracy is not None else None,
+            "active_accuracy": round(active_accuracy, 4) if active_accuracy is not None else None,
+            "validation_seconds": round(time.perf_counter() - start, 4)
+        }
+
+    def _record(self, version: str, ok: bool, seconds: float, error: Optional[str] = None) -> None:
+        self._history.append({
+            "version": version,
+            "ok": ok,
+            "error": error,
+            "seconds": round(seconds, 4),
+            "at": datetime.now().isoformat()
+        })
+
+    def check(self) -> bool:
+        """
+        Registry'de yeni sürüm varsa yükle, doğrula ve devreye al.
+        Başarısız sürümler tekrar denenmez; aktif sürüm korunur. Dönüş: değişti mi
+        """
+        self._checked_at = time.monotonic()
+        version = self.latest_version()
+        active = self.active
+        if version is None:
+            if active is None:
+                self._swap(self._load_legacy())
+            return False
+        if (active is not None and active.version == version) or version in self._failed:
+            return False
+
+        start = time.perf_counter()
+        try:
+            loaded = self._load_version(version)
+        except Exception as e:
+            self._failed[version] = str(e)
+            self._record(version, False, time.perf_counter() - start, str(e))
+            logger.error(f"Model version {version} rejected: {e}")
+            if active is None:
+                # Hiç model yoksa en azından eski düzendeki dosyaları dene
+                self._swap(self._load_legacy())
+            return False
+
+        self._record(version, True, time.perf_counter() - start)
+        self._swap(loaded)
+        logger.info(f"Model version {version} activated (previous: {active.version if active else None})")
+        return True
+
+    def _swap(self, loaded: Optional[LoadedModel]) -> None:
+        if loaded is None:
+            return
+        # Tek referans ataması: yeni istekler yeni sürümü, süren istekler eskisini kullanır
+        with self._lock:
+            self.active = loaded
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Model registry check failed: {e}")
+
+    def start_watcher(self) -> None:
+        """Registry'yi poll_interval aralıklarla kontrol eden daemon thread'i başlat"""
+        if self._watcher is None and self.poll_interval > 0:
+            self._watcher = threading.Thread(target=self._watch_loop, name='model-registry', daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        """/api/status için aktif sürüm, yükleme süreleri ve son yükleme denemeleri"""
+        active = self.active
+        return {
+            "root": self.root,
+            "active": active.describe() if active is not None else None,
+            "watching": self._watcher is not None,
+            "poll_interval_seconds": self.poll_interval,
+            "checked_seconds_ago": round(time.monotonic() - self._checked_at, 1) if self._checked_at else None,
+            "rejected_versions": dict(self._failed),
+            "history": list(self._history)
+        }
+
+
+def _optional_float(value: str) -> Optional[float]:
+    """Boş değer veya 'none' karşılaştırmayı kapatır"""
+    return None if value.strip().lower() in ('', 'none') else float(value)
+
+
+def create_model_registry(engine_name: str = 'flat') -> ModelRegistry:
+    """Ortam değişkenlerinden registry kur ve ilk modeli senkron yükle"""
+    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+    registry = ModelRegistry(
+        root=os.environ.get('MODEL_REGISTRY_DIR', os.path.join(models_dir, 'registry')),
+        engine_name=engine_name,
+        legacy_dir=models_dir,
+        poll_interval=float(os.environ.get('MODEL_RELOAD_INTERVAL', 10)),
+        min_agreement=float(os.environ.get('MODEL_MIN_AGREEMENT', 0.99)),
+        min_accuracy=float(os.environ.get('MODEL_MIN_ACCURACY', 0.0)),
+        max_accuracy_drop=_optional_float(os.environ.get('MODEL_MAX_ACCURACY_DROP', '0.01'))
+    )
+    try:
+        registry.check()
+    except Exception as e:
+        logger.error(f"Initial model load failed: {e}")
+    return registry
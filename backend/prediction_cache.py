@@ -0,0 +1,72 @@
+"""
+Tahmin sonuçları için LRU önbellek (/quick-predict)
+Anahtar: encode edilmiş feature vektörünün byte'ları; büyük/küçük harf,
+cm/m gibi yazım farkları encode sırasında normalize olur. Önbellek tek bir
+model sürümüne bağlıdır, sürüm değişince tüm kayıtlar silinir.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class PredictionCache:
+    """Model sürümüne bağlı, boyut sınırlı LRU tahmin önbelleği"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._version: Optional[str] = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    def _sync_version_locked(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+            if self._version is not None:
+                self._stats["invalidations"] += 1
+            self._version = version
+
+    def get(self, version: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            self._sync_version_locked(version)
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, version: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            # Arada yeni sürümle okunduysa eski sürümün sonucu saklanmaz
+            if version != self._version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "model_version": self._version
+            }
+
+
+def create_prediction_cache() -> Optional[PredictionCache]:
+    """Ortam değişkenlerinden tahmin önbelleği kur (QUICK_PREDICT_CACHE_SIZE=0 kapatır)"""
+    max_entries = int(os.environ.get('QUICK_PREDICT_CACHE_SIZE', 4096))
+    if max_entries <= 0:
+        return None
+    return PredictionCache(max_entries=max_entries)
@@ -0,0 +1,285 @@
+"""
+/quick-predict için önceden hesaplanmış olasılık ızgarası
+/quick-predict sadece gender, age, height ve weight alır (diğer alanlar
+QUICK_PREDICT_DEFAULTS), bu yüzden model bu dört girdi üzerinde tablo haline
+getirilebilir. build_quick_grid.py ızgarayı aktif modelle üretir; backend
+dosyaları memory-map eder ve ızgara içindeki istekleri dizi index'iyle yanıtlar.
+Izgara dışındaki istekler (veya ızgaranın üretildiği modelle uyuşmayan bir
+sürüm aktifse) gerçek modele düşer.
+
+Dizin düzeni:
+    models/quick_grid/grid.json          -> eksenler, sınıf adları, model sürümü
+    models/quick_grid/probabilities.npy  -> float16 [gender, age, height(cm), weight, sınıf]
+    models/quick_grid/labels.npy         -> uint8 tahmin edilen sınıf index'i (tam olasılıklardan)
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features import COLUMN_INDEX, QUICK_PREDICT_DEFAULTS, QUICK_PREDICT_FIELDS
+from inference import ScoringResult, ScoringService
+
+logger = logging.getLogger(__name__)
+
+GRID_FILE = 'grid.json'
+PROBABILITIES_FILE = 'probabilities.npy'
+LABELS_FILE = 'labels.npy'
+GRID_FORMAT_VERSION = 1
+
+# Izgara eksenleri (gender ayrı eksendir); height santimetre cinsindendir
+AXES = ('age', 'height', 'weight')
+LOOKUP_MODES = ('nearest', 'linear')
+# Izgara dışı girdilerde ızgaranın modelle en az uyuşma oranı (build_quick_grid.py)
+MIN_AGREEMENT = 0.95
+
+# Yüklemede ızgara hücreleri gerçek modelle bu kadar örnekte karşılaştırılır
+PROBE_CELLS = 64
+PROBE_TOLERANCE = 2e-3
+
+
+@dataclass
+class GridAxis:
+    """Eşit aralıklı eksen: start, start + step, ..., start + (size - 1) * step"""
+    start: float
+    step: float
+    size: int
+
+    @property
+    def end(self) -> float:
+        return self.start + (self.size - 1) * self.step
+
+    def values(self) -> np.ndarray:
+        return self.start + np.arange(self.size) * self.step
+
+    def position(self, value: float) -> Optional[float]:
+        """Değerin kesirli index'i; eksen dışındaysa None"""
+        position = (value - self.start) / self.step
+        if not -1e-9 <= position <= self.size - 1 + 1e-9:
+            return None
+        return min(max(position, 0.0), self.size - 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'start': self.start, 'step': self.step, 'size': self.size}
+
+
+def quick_record(gender: str, age: float, height: float, weight: float) -> Dict[str, Any]:
+    """/quick-predict'in modele gönderdiği tam kayıt"""
+    return {'gender': gender, 'age': age, 'height': height, 'weight': weight, **QUICK_PREDICT_DEFAULTS}
+
+
+def grid_matrix(scoring: ScoringService, gender: str, axes: Dict[str, GridAxis]) -> np.ndarray:
+    """
+    Bir cinsiyet için ızgaranın tüm hücrelerini (age, height, weight sırasıyla)
+    encode edilmiş matris olarak kur; sabit alanlar tek satırdan kopyalanır,
+    height/BMI FeatureEncoder.encode_row_into ile aynı şekilde hesaplanır.
+    """
+    template = np.empty(len(COLUMN_INDEX), dtype=np.float64)
+    scoring.encoder.encode_row_into(quick_record(gender, 0, 170, 70), template)
+
+    age, height_cm, weight = np.meshgrid(*(axes[name].values() for name in AXES), indexing='ij')
+    X = np.tile(template, (age.size, 1))
+    height = height_cm.ravel() / 100
+    X[:, COLUMN_INDEX['Age']] = age.ravel()
+    X[:, COLUMN_INDEX['Height']] = height
+    X[:, COLUMN_INDEX['Weight']] = weight.ravel()
+    X[:, COLUMN_INDEX['BMI']] = weight.ravel() / (height ** 2)
+    return X
+
+
+def build_grid(scoring: ScoringService, axes: Dict[str, GridAxis],
+               batch_size: int = 10000) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Izgarayı modelle değerlendir.
+
+    Dönüş: (cinsiyet değerleri, float32 olasılıklar [gender, age, height,
+    weight, sınıf] - scoring.names sırasında, uint8 tahmin index'leri)
+    """
+    genders = list(scoring.encoder.categories['gender'])
+    shape = tuple(axes[name].size for name in AXES)
+    probabilities = np.empty((len(genders), *shape, len(scoring.names)), dtype=np.float32)
+    labels = np.empty((len(genders), *shape), dtype=np.uint8)
+    for g, gender in enumerate(genders):
+        X = grid_matrix(scoring, gender, axes)
+        out = probabilities[g].reshape(-1, len(scoring.names))
+        out_labels = labels[g].reshape(-1)
+        for start in range(0, len(X), batch_size):
+            batch = scoring.rows.scale_in_place(X[start:start + batch_size])
+            proba = scoring.engine_for(len(batch)).predict_proba(batch)
+            out[start:start + batch_size] = proba
+            out_labels[start:start + batch_size] = proba.argmax(axis=1)
+    return genders, probabilities, labels
+
+
+def save_grid(directory: str, model_version: str, names: List[str], genders: List[str],
+              axes: Dict[str, GridAxis], probabilities: np.ndarray, labels: np.ndarray) -> None:
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, PROBABILITIES_FILE), probabilities.astype(np.float16))
+    np.save(os.path.join(directory, LABELS_FILE), labels)
+    meta = {
+        'format_version': GRID_FORMAT_VERSION,
+        'model_version': model_version,
+        'classes': names,
+        'genders': genders,
+        'axes': {name: axes[name].to_dict() for name in AXES},
+        'defaults': QUICK_PREDICT_DEFAULTS
+    }
+    with open(os.path.join(directory, GRID_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+class QuickPredictGrid:
+    """
+    Memory-map edilmiş quick-predict ızgarası.
+
+    nearest: en yakın hücrenin (hücre için kaydedilmiş) sınıfı ve olasılıkları
+    linear:  8 komşu hücrenin olasılıklarının trilineer interpolasyonu
+    """
+
+    def __init__(self, directory: str, meta: Dict[str, Any], probabilities: np.ndarray,
+                 labels: np.ndarray, mode: str = 'nearest'):
+        if mode not in LOOKUP_MODES:
+            raise ValueError(f"Unknown grid lookup mode: {mode} (expected one of {LOOKUP_MODES})")
+        self.directory = directory
+        self.meta = meta
+        self.model_version = meta['model_version']
+        self.names = list(meta['classes'])
+        self.genders = {gender: index for index, gender in enumerate(meta['genders'])}
+        self.axes = [GridAxis(**meta['axes'][name]) for name in AXES]
+        self.probabilities = probabilities
+        self.labels = labels
+        self.mode = mode
+
+        # Sürüm başına bir kez yapılan uyum kontrolünün sonucu: version -> bool
+        self._lock = threading.Lock()
+        self._checked: Dict[str, bool] = {}
+        self._stats = {"hits": 0, "out_of_grid": 0, "version_mismatch": 0}
+
+    @classmethod
+    def load(cls, directory: str, mode: str = 'nearest', mmap_mode: str = 'r') -> 'QuickPredictGrid':
+        with open(os.path.join(directory, GRID_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != GRID_FORMAT_VERSION:
+            raise ValueError(f"Unsupported quick-predict grid format: {directory}")
+        if meta.get('defaults') != QUICK_PREDICT_DEFAULTS:
+            raise ValueError(f"Quick-predict grid was built with different default values: {directory}")
+        probabilities = np.load(os.path.join(directory, PROBABILITIES_FILE), mmap_mode=mmap_mode)
+        labels = np.load(os.path.join(directory, LABELS_FILE), mmap_mode=mmap_mode)
+        return cls(directory, meta, probabilities, labels, mode)
+
+    def __len__(self) -> int:
+        return int(self.labels.size)
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def matches(self, version: str, scoring: ScoringService) -> bool:
+        """
+        Izgara bu model sürümüne ait mi: sürüm ve sınıf adları aynı olmalı ve
+        rastgele hücreler gerçek modelle aynı sonucu vermeli (sürüm başına bir kez)
+        """
+        checked = self._checked.get(version)
+        if checked is not None:
+            return checked
+
+        ok = version == self.model_version and scoring.names == self.names
+        if ok:
+            rng = np.random.default_rng(0)
+            cells = [tuple(int(rng.integers(n)) for n in self.labels.shape) for _ in range(PROBE_CELLS)]
+            genders = list(self.genders)
+            records = [quick_record(genders[cell[0]],
+                                    *(float(axis.values()[i]) for axis, i in zip(self.axes, cell[1:])))
+                       for cell in cells]
+            _, results, errors = scoring.score_records(records)
+            ok = not errors and all(
+                self.names[self.labels[cell]] == result.predicted_class and
+                np.allclose(self.probabilities[cell], [result.probabilities[name] / 100 for name in self.names],
+                            atol=PROBE_TOLERANCE)
+                for cell, result in zip(cells, results))
+            if not ok:
+                logger.warning(f"Quick-predict grid does not match model version {version}, not used")
+
+        with self._lock:
+            self._checked[version] = ok
+        return ok
+
+    def lookup(self, gender: str, age: float, height: float, weight: float) -> Optional[Tuple[int, np.ndarray]]:
+        """(tahmin index'i, olasılıklar) ya da ızgara dışındaysa None; height cm veya metre"""
+        if height <= 10:  # encoder ile aynı cm/m kuralı
+            height = height * 100
+        g = self.genders.get(str(gender).lower(), 0)  # encoder gibi: bilinmeyen cinsiyet = 0
+        positions = [axis.position(value) for axis, value in zip(self.axes, (age, height, weight))]
+        if any(position is None for position in positions):
+            return None
+
+        if self.mode == 'nearest':
+            cell = (g, *(int(round(position)) for position in positions))
+            return int(self.labels[cell]), np.asarray(self.probabilities[cell], dtype=np.float64)
+
+        # linear: 8 köşenin ağırlıklı ortalaması
+        lower = [min(int(position), axis.size - 2) if axis.size > 1 else 0
+                 for position, axis in zip(positions, self.axes)]
+        frac = [position - low for position, low in zip(positions, lower)]
+        block = np.asarray(self.probabilities[g, lower[0]:lower[0] + 2, lower[1]:lower[1] + 2,
+                                              lower[2]:lower[2] + 2], dtype=np.float64)
+        for axis_frac in frac:
+            if block.shape[0] == 2:
+                block = block[0] * (1 - axis_frac) + block[1] * axis_frac
+            else:
+                block = block[0]
+        probabilities = block / block.sum()
+        return int(probabilities.argmax()), probabilities
+
+    def predict(self, version: str, scoring: ScoringService, data: Dict[str, Any]) -> Optional[ScoringResult]:
+        """/quick-predict isteğini ızgaradan yanıtla; mümkün değilse None (gerçek model kullanılır)"""
+        if not self.matches(version, scoring):
+            self._count("version_mismatch")
+            return None
+        try:
+            gender = data['gender'].lower()
+            age, height, weight = (float(data[field]) for field in QUICK_PREDICT_FIELDS[1:])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+        found = self.lookup(gender, age, height, weight)
+        if found is None:
+            self._count("out_of_grid")
+            return None
+        self._count("hits")
+
+        index, probabilities = found
+        height_m = height / 100 if height > 10 else height
+        return ScoringResult(
+            class_label=scoring.labels[index],
+            predicted_class=self.names[index],
+            confidence=float(probabilities[index] * 100),
+            probabilities={name: float(p * 100) for name, p in zip(self.names, probabilities)},
+            bmi=round(weight / (height_m ** 2), 2)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "model_version": self.model_version,
+                "mode": self.mode,
+                "cells": len(self),
+                "axes": {name: axis.to_dict() for name, axis in zip(AXES, self.axes)},
+                "matches": dict(self._checked)
+            }
+
+
+def load_quick_grid(directory: str, mode: str = 'nearest') -> Optional[QuickPredictGrid]:
+    """Izgara dizini varsa yükle; yoksa veya bozuksa None (quick-predict modeli kullanır)"""
+    if not os.path.exists(os.path.join(directory, GRID_FILE)):
+        return None
+    try:
+        return QuickPredictGrid.load(directory, mode)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Quick-predict grid could not be loaded from {directory}: {e}")
+        return None
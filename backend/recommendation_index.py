@@ -0,0 +1,129 @@
+"""
+Önceden üretilmiş sağlık önerileri için indeksli, memory-map edilen dosya
+warm_recommendations.py tarafından yazılır; backend açılışta mmap ile açar
+ve (tahmin sınıfı, BMI aralığı, temel yaşam tarzı cevapları) kovasına göre
+öneri metnini ağ çağrısı olmadan döndürür.
+
+Dosya formatı:
+    MAGIC | uint32 header uzunluğu | JSON header | zlib ile sıkıştırılmış metinler
+Header: {"meta": {...}, "entries": {kova anahtarı: [offset, uzunluk]}}
+"""
+
+import json
+import mmap
+import struct
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+MAGIC = b'RECIDX1\n'
+_HEADER_LENGTH = struct.Struct('<I')
+
+# BMI aralıkları (WHO sınıfları): üst sınır -> etiket
+BMI_BANDS = [(18.5, 'lt18.5'), (25.0, '18.5-25'), (30.0, '25-30'),
+             (35.0, '30-35'), (40.0, '35-40'), (float('inf'), 'ge40')]
+
+UNKNOWN = 'unknown'
+
+
+def bmi_band(bmi: Any) -> str:
+    try:
+        bmi = float(bmi)
+    except (TypeError, ValueError):
+        return UNKNOWN
+    if bmi <= 0:
+        return UNKNOWN
+    for upper, label in BMI_BANDS:
+        if bmi < upper:
+            return label
+    return UNKNOWN
+
+
+def _yes_no(value: Any) -> str:
+    if isinstance(value, str) and value.lower() in ('yes', 'no'):
+        return value.lower()
+    return UNKNOWN
+
+
+def activity_band(faf: Any) -> str:
+    """Fiziksel aktivite sıklığı (FAF, 0-3): low < 1 <= moderate < 2 <= high"""
+    if isinstance(faf, bool) or not isinstance(faf, (int, float)):
+        return UNKNOWN
+    if faf < 1:
+        return 'low'
+    return 'moderate' if faf < 2 else 'high'
+
+
+def bucket_key(prediction_data: Dict[str, Any], user_input: Dict[str, Any]) -> str:
+    """Öneri isteğinin ait olduğu kova: sınıf|BMI aralığı|aile geçmişi|FAVC|aktivite"""
+    return '|'.join((
+        str(prediction_data.get('predicted_class', UNKNOWN)),
+        bmi_band(prediction_data.get('bmi')),
+        _yes_no(user_input.get('family_history')),
+        _yes_no(user_input.get('favc')),
+        activity_band(user_input.get('faf')),
+    ))
+
+
+def write_index(path: str, texts: Dict[str, str], meta: Dict[str, Any]) -> None:
+    """Kova -> metin eşlemesini indeks dosyasına yaz"""
+    entries = {}
+    blobs = []
+    offset = 0
+    for key in sorted(texts):
+        blob = zlib.compress(texts[key].encode('utf-8'), 9)
+        entries[key] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({'meta': meta, 'entries': entries}, ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+
+
+class RecommendationIndex:
+    """Memory-map edilmiş öneri indeksi (salt okunur, thread'ler arasında paylaşılabilir)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a recommendation index: {path}")
+        header_start = len(MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack(self._mmap[len(MAGIC):header_start])
+        header = json.loads(self._mmap[header_start:header_start + header_length].decode('utf-8'))
+
+        self.meta = header['meta']
+        self._entries: Dict[str, Tuple[int, int]] = header['entries']
+        self._data_start = header_start + header_length
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prediction_data: Dict[str, Any], user_input: Dict[str, Any]) -> Optional[str]:
+        """İsteğin kovası için önceden üretilmiş metin; yoksa None"""
+        entry = self._entries.get(bucket_key(prediction_data, user_input))
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return zlib.decompress(self._mmap[start:start + length]).decode('utf-8')
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def load_index(path: str) -> Optional[RecommendationIndex]:
+    """İndeks dosyası varsa aç; yoksa veya bozuksa None"""
+    try:
+        return RecommendationIndex(path)
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        print(f"⚠️ Öneri indeksi yüklenemedi ({path}): {e}")
+        return None
@@ -0,0 +1,114 @@
+"""
+LLM yanıtları için içerik adresli önbellek
+Anahtar: model adı + generation ayarları + normalize edilmiş prompt'un (veya
+/api/chat mesaj geçmişinin) SHA-256 özeti.
+Bellek içi LRU katmanı, opsiyonel SQLite disk katmanı ve TTL ile süre aşımı.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """Bellek (LRU) + opsiyonel SQLite katmanlı, TTL'li yanıt önbelleği"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 3600, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+                       "stores": 0, "evictions": 0, "expirations": 0}
+
+        self._db = None
+        if sqlite_path:
+            # Flask thread'leri aynı bağlantıyı kilit altında paylaşır
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Ollama isteğinden içerik adresli anahtar üret (stream bayrağı anahtara girmez)"""
+        normalized = {
+            "model": payload.get("model"),
+            "options": payload.get("options", {}),
+            "system": " ".join(str(payload.get("system", "")).split()),
+            "prompt": " ".join(str(payload.get("prompt", "")).split()),
+        }
+        if "messages" in payload:
+            # /api/chat: anahtar tüm sohbet geçmişini kapsar
+            normalized["messages"] = [[message.get("role"), " ".join(str(message.get("content", "")).split())]
+                                      for message in payload["messages"]]
+        encoded = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                text, created = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return text
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    text, created = row
+                    if not self._expired(created, now):
+                        self._put_memory_locked(key, text, created)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return text
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def _put_memory_locked(self, key: str, text: str, created: float) -> None:
+        self._memory[key] = (text, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def set(self, key: str, text: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_memory_locked(key, text, now)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, text, created) VALUES (?, ?, ?)",
+                                 (key, text, now))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "sqlite_path": self.sqlite_path
+            }
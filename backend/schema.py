@@ -0,0 +1,270 @@
+"""
+Tahmin ve chat istekleri için deklaratif şemalar
+Şema (Field listesi) bir kez derlenir: her alan için tipine özel bir dönüştürücü
+hazırlanır ve gövde tek geçişte parse edilir, tipler ve aralıklar kontrol
+edilir, kategoriler küçük harfe normalize edilir ve varsayılanlar uygulanır.
+Hatalar ilk hatada durmadan alan bazında liste olarak döner:
+[{"field": "age", "message": "must be a number"}, ...]
+
+Kategori değerleri modelin encoder'ından gelir, bu yüzden tahmin şemaları
+encoder başına bir kez derlenir (prediction_schema / quick_predict_schema).
+"""
+
+import json
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from features import QUICK_PREDICT_DEFAULTS, QUICK_PREDICT_FIELDS, REQUIRED_FIELDS, FeatureEncoder
+
+_MISSING = object()
+
+
+class _Invalid(Exception):
+    """Dönüştürücünün reddettiği değer (mesaj alan adı olmadan)"""
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    Tek bir istek alanı.
+
+    kind: 'number' (int/float, sayısal string'ler float'a çevrilir),
+          'category' (choices içinden, büyük/küçük harf duyarsız; küçük harf döner),
+          'string', 'object' veya 'any'
+    """
+    name: str
+    kind: str
+    required: bool = True
+    default: Any = _MISSING
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Sequence[str] = ()
+    max_length: Optional[int] = None
+    non_empty: bool = False
+    # Sayısal alanlar için ek kontrol: geçersizse hata mesajı, geçerliyse None
+    check: Optional[Callable[[float], Optional[str]]] = None
+
+
+def _number_converter(field: Field) -> Callable[[Any], Any]:
+    minimum, maximum, check = field.minimum, field.maximum, field.check
+    if minimum is not None and maximum is not None:
+        range_message = f"must be between {minimum:g} and {maximum:g}"
+    elif minimum is not None:
+        range_message = f"must be at least {minimum:g}"
+    else:
+        range_message = f"must be at most {maximum:g}" if maximum is not None else None
+    # Tek karşılaştırma zinciri: NaN her iki sınırda da reddedilir, sınırlar sonluysa inf de
+    low = -math.inf if minimum is None else minimum
+    high = math.inf if maximum is None else maximum
+    bounded = math.isfinite(low) and math.isfinite(high)
+
+    def convert(value):
+        kind = type(value)
+        if kind is not int and kind is not float:
+            if kind is not str:
+                raise _Invalid("must be a number")
+            try:
+                value = float(value.strip())
+            except ValueError:
+                raise _Invalid("must be a number")
+        if not low <= value <= high:
+            raise _Invalid(range_message if value == value else "must be a finite number")
+        if not bounded and not math.isfinite(value):
+            raise _Invalid("must be a finite number")
+        if check is not None:
+            message = check(value)
+            if message:
+                raise _Invalid(message)
+        return value
+
+    return convert
+
+
+def _category_converter(field: Field) -> Callable[[Any], Any]:
+    # Hem küçük harf hem de yaygın yazımlar (Male, Public_Transportation) tek dict aramasıyla çözülür
+    table = {}
+    for choice in field.choices:
+        value = str(choice).lower()
+        for spelling in (value, value.title(), value.upper(), value.capitalize()):
+            table.setdefault(spelling, value)
+    message = f"must be one of {sorted(set(table.values()))}"
+    get = table.get
+
+    def convert(value):
+        if type(value) is not str:
+            raise _Invalid(message)
+        normalized = get(value)
+        if normalized is None:
+            normalized = get(value.lower())
+            if normalized is None:
+                raise _Invalid(message)
+        return normalized
+
+    return convert
+
+
+def _string_converter(field: Field) -> Callable[[Any], Any]:
+    max_length, non_empty = field.max_length, field.non_empty
+
+    def convert(value):
+        if type(value) is not str:
+            raise _Invalid("must be a string")
+        if non_empty and not value.strip():
+            raise _Invalid("must not be empty")
+        if max_length is not None and len(value) > max_length:
+            raise _Invalid(f"must be at most {max_length} characters")
+        return value
+
+    return convert
+
+
+def _object_converter(field: Field) -> Callable[[Any], Any]:
+    def convert(value):
+        if type(value) is not dict:
+            raise _Invalid("must be a JSON object")
+        return value
+
+    return convert
+
+
+_CONVERTERS = {
+    'number': _number_converter,
+    'category': _category_converter,
+    'string': _string_converter,
+    'object': _object_converter,
+    'any': lambda field: None,
+}
+
+
+def format_errors(errors: List[Dict[str, Any]]) -> str:
+    """Hata listesinden kullanıcıya gösterilecek tek satırlık mesaj"""
+    return '; '.join(f"'{error['field']}' {error['message']}" if error['field'] else error['message']
+                     for error in errors)
+
+
+class RequestSchema:
+    """
+    Derlenmiş şema: decode() ham gövdeyi, validate() parse edilmiş dict'i işler.
+    constants: doğrulamadan sonra istemcinin gönderdiği değerlerin üzerine yazılan alanlar
+    """
+
+    def __init__(self, fields: Sequence[Field], constants: Optional[Dict[str, Any]] = None):
+        self.fields = tuple(fields)
+        self.constants = dict(constants or {})
+        for field in self.fields:
+            if field.kind not in _CONVERTERS:
+                raise ValueError(f"Unknown field kind: {field.kind}")
+        # Alan başına (isim, zorunlu mu, varsayılan, dönüştürücü) planı
+        self._plan = [(field.name, field.required, field.default, _CONVERTERS[field.kind](field))
+                      for field in self.fields]
+
+    def validate(self, data: Any) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Dönüş: (normalize edilmiş değerler, hatalar); hata varsa değerler None"""
+        if type(data) is not dict:
+            return None, [{"field": None, "message": "Body must be a JSON object"}]
+
+        values = {}
+        errors = []
+        get = data.get
+        for name, required, default, convert in self._plan:
+            value = get(name, _MISSING)
+            if value is _MISSING or value is None:
+                if required:
+                    errors.append({"field": name, "message": "is required"})
+                elif default is not _MISSING:
+                    values[name] = default
+                continue
+            if convert is None:
+                values[name] = value
+                continue
+            try:
+                values[name] = convert(value)
+            except _Invalid as e:
+                errors.append({"field": name, "message": str(e)})
+
+        if errors:
+            return None, errors
+        values.update(self.constants)
+        return values, errors
+
+    def decode(self, body: bytes) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Ham istek gövdesini parse edip doğrula"""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None, [{"field": None, "message": "Body must be valid JSON"}]
+        return self.validate(data)
+
+
+def _height_check(value: float) -> Optional[str]:
+    # encoder ile aynı kural: 10'dan büyük değerler santimetre kabul edilir
+    meters = value / 100 if value > 10 else value
+    if not 0.5 <= meters <= 2.5:
+        return "must be between 0.5 and 2.5 (m) or 50 and 250 (cm)"
+    return None
+
+
+# Sayısal alan aralıkları (yaşam tarzı ölçekleri veri setindeki tanım aralıklarıdır)
+NUMERIC_RANGES = {
+    'age': dict(minimum=1, maximum=120),
+    'height': dict(minimum=0.5, maximum=250, check=_height_check),
+    'weight': dict(minimum=10, maximum=500),
+    'fcvc': dict(minimum=1, maximum=3),
+    'ncp': dict(minimum=1, maximum=4),
+    'ch2o': dict(minimum=1, maximum=3),
+    'faf': dict(minimum=0, maximum=3),
+    'tue': dict(minimum=0, maximum=2),
+}
+
+
+def prediction_fields(encoder: FeatureEncoder, defaults: Optional[Dict[str, Any]] = None) -> List[Field]:
+    """/predict alanları; defaults verilen alanlar opsiyonel olur"""
+    defaults = defaults or {}
+    fields = []
+    for name in REQUIRED_FIELDS:
+        common = dict(required=name not in defaults, default=defaults.get(name, _MISSING))
+        if name in encoder.categories:
+            fields.append(Field(name, 'category', choices=encoder.categories[name], **common))
+        else:
+            fields.append(Field(name, 'number', **NUMERIC_RANGES[name], **common))
+    return fields
+
+
+@lru_cache(maxsize=16)
+def prediction_schema(encoder: FeatureEncoder) -> RequestSchema:
+    """Encoder başına bir kez derlenen /predict şeması"""
+    return RequestSchema(prediction_fields(encoder))
+
+
+@lru_cache(maxsize=16)
+def quick_predict_schema(encoder: FeatureEncoder) -> RequestSchema:
+    """
+    /quick-predict: gender/age/height/weight zorunlu; diğer alanlar istemci ne
+    gönderirse göndersin QUICK_PREDICT_DEFAULTS olur (quick-predict ızgarası da
+    sadece bu dört girdiye bakar)
+    """
+    fields = [field for field in prediction_fields(encoder) if field.name in QUICK_PREDICT_FIELDS]
+    return RequestSchema(fields, constants=QUICK_PREDICT_DEFAULTS)
+
+
+# Chat mesajı üst sınırı (karakter)
+MAX_MESSAGE_LENGTH = 8000
+
+CHAT_SCHEMA = RequestSchema([
+    Field('message', 'string', non_empty=True, max_length=MAX_MESSAGE_LENGTH),
+    Field('context', 'any', required=False),
+    Field('session_id', 'string', required=False, max_length=128),
+])
+
+HEALTH_RECOMMENDATIONS_SCHEMA = RequestSchema([
+    Field('prediction', 'object'),
+    Field('user_input', 'object'),
+])
+
+# /predict/what-if: profile prediction_schema ile, sweep what_if.parse_sweep ile ayrıca doğrulanır
+WHAT_IF_SCHEMA = RequestSchema([
+    Field('profile', 'object'),
+    Field('sweep', 'any'),
+])
@@ -0,0 +1,182 @@
+"""
+Chat stream'leri için Server-Sent Events yazıcısı
+Ollama'dan gelen token parçalarını boyut (max_bytes) veya zaman penceresi
+(max_delay) dolana kadar biriktirip tek bir `data:` frame'i olarak yazar;
+böylece her token için ayrı frame, json.dumps ve socket yazımı yapılmaz.
+İstemci destekliyorsa (Accept-Encoding) frame'ler gzip ile sıkıştırılır;
+her flush Z_SYNC_FLUSH ile yapıldığı için tarayıcı parçaları beklemeden alır.
+
+Frame formatı değişmez: {"chunk": "...", "done": false} ve son olarak
+{"chunk": "", "done": true, ...} (hata durumunda {"error": "...", "done": true}).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_PREFIX = b'data: {"chunk": '
+_CHUNK_SUFFIX = b', "done": false}\n\n'
+
+
+def sse_event(payload: Dict[str, Any]) -> bytes:
+    """Tek bir SSE frame'i (genel amaçlı, örn. done/error olayları)"""
+    return f"data: {json.dumps(payload)}\n\n".encode('utf-8')
+
+
+def chunk_frame(text: str) -> bytes:
+    """{'chunk': text, 'done': False} frame'i; sadece metin JSON string olarak kodlanır"""
+    return _CHUNK_PREFIX + json.dumps(text).encode('utf-8') + _CHUNK_SUFFIX
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Accept-Encoding başlığı gzip'e izin veriyor mu (q=0 reddi dahil)"""
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class _GzipEncoder:
+    """Frame'leri tek bir gzip akışına yazar; her flush'ta tarayıcıya iletilebilir blok üretir"""
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def encode(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Identity:
+    @staticmethod
+    def encode(data: bytes) -> bytes:
+        return data
+
+    @staticmethod
+    def finish() -> bytes:
+        return b''
+
+
+class SSEWriter:
+    """
+    Token parçalarını birleştirerek SSE frame'lerine çeviren yazıcı.
+
+    İlk parça ilk token süresini (TTFT) uzatmamak için beklemeden yazılır.
+    max_bytes: biriken metin bu boyuta (UTF-8 byte) ulaşınca frame yazılır
+    max_delay: ilk biriken parçadan bu kadar saniye sonra frame yazılır
+               (senkron akışta bir sonraki parça geldiğinde kontrol edilir)
+    gzip:      istemci kabul ediyorsa gzip kullanılmasına izin ver
+    """
+
+    def __init__(self, max_bytes: int = 256, max_delay: float = 0.02, gzip: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.gzip = gzip
+        self.clock = clock
+
+    def content_encoding(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Yanıt için kullanılacak Content-Encoding (None: sıkıştırma yok)"""
+        return 'gzip' if self.gzip and accepts_gzip(accept_encoding) else None
+
+    @staticmethod
+    def _encoder(content_encoding: Optional[str]):
+        return _GzipEncoder() if content_encoding == 'gzip' else _Identity()
+
+    def stream(self, chunks: Iterable[str], done_event: Dict[str, Any],
+               content_encoding: Optional[str] = None) -> Iterator[bytes]:
+        """Senkron (Flask) akış: birleştirilmiş chunk frame'leri + done (veya error) frame'i"""
+        encoder = self._encoder(content_encoding)
+        buffer = []
+        buffered_bytes = 0
+        started = 0.0
+        first = True
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if not buffer:
+                    started = self.clock()
+                buffer.append(chunk)
+                buffered_bytes += len(chunk.encode('utf-8'))
+                if first or buffered_bytes >= self.max_bytes or self.clock() - started >= self.max_delay:
+                    yield encoder.encode(chunk_frame(''.join(buffer)))
+                    buffer, buffered_bytes, first = [], 0, False
+            tail = chunk_frame(''.join(buffer)) if buffer else b''
+            yield encoder.encode(tail + sse_event(done_event)) + encoder.finish()
+        except Exception as e:
+            logger.error(f"SSE stream hatası: {e}")
+            tail = chunk_frame(''.join(buffer)) if buffer else b''
+            yield encoder.encode(tail + sse_event({'error': str(e), 'done': True})) + encoder.finish()
+        finally:
+            # İstemci koptuysa kaynak generator'ı da kapat (Ollama bağlantısı, oturum kilidi)
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    async def stream_async(self, chunks: AsyncIterator[str], done_event: Dict[str, Any],
+                           content_encoding: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Asenkron (aiohttp) akış: zaman penceresi gerçek zamanlayıcıyla uygulanır,
+        Ollama duraksasa bile biriken metin en geç max_delay sonra gönderilir.
+        """
+        encoder = self._encoder(content_encoding)
+        iterator = chunks.__aiter__()
+        buffer = []
+        buffered_bytes = 0
+        deadline = None
+        pending = None
+        first = True
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = None if deadline is None else max(deadline - self.clock(), 0)
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    # Pencere doldu, parça hâlâ bekleniyor: birikeni gönder
+                    yield encoder.encode(chunk_frame(''.join(buffer)))
+                    buffer, buffered_bytes, deadline = [], 0, None
+                    continue
+                try:
+                    chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                if not chunk:
+                    continue
+                if not buffer:
+                    deadline = self.clock() + self.max_delay
+                buffer.append(chunk)
+                buffered_bytes += len(chunk.encode('utf-8'))
+                if first or buffered_bytes >= self.max_bytes:
+                    yield encoder.encode(chunk_frame(''.join(buffer)))
+                    buffer, buffered_bytes, deadline, first = [], 0, None, False
+            tail = chunk_frame(''.join(buffer)) if buffer else b''
+            yield encoder.encode(tail + sse_event(done_event)) + encoder.finish()
+        except Exception as e:
+            logger.error(f"SSE stream hatası: {e}")
+            tail = chunk_frame(''.join(buffer)) if buffer else b''
+            yield encoder.encode(tail + sse_event({'error': str(e), 'done': True})) + encoder.finish()
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+
+def create_sse_writer() -> SSEWriter:
+    """Ortam değişkenlerinden SSE yazıcısı kur (SSE_COALESCE_BYTES, SSE_COALESCE_MS, SSE_GZIP)"""
+    return SSEWriter(
+        max_bytes=int(os.environ.get('SSE_COALESCE_BYTES', 256)),
+        max_delay=float(os.environ.get('SSE_COALESCE_MS', 20)) / 1000,
+        gzip=os.environ.get('SSE_GZIP', '0') == '1'
+    )
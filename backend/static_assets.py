@@ -0,0 +1,112 @@
+"""
+build_assets.py çıktısından (frontend/dist) statik dosya sunumu
+manifest.json açılışta bir kez okunur; istek başına sadece dict araması ve
+Accept-Encoding seçimi yapılır. Dosyalar send_file ile gönderilir: WSGI
+sunucusu file_wrapper destekliyorsa (gunicorn) sendfile ile kopyasız,
+STATIC_X_SENDFILE=1 ise gövde önündeki proxy'ye (nginx/apache) bırakılır.
+
+- Hash'li dosyalar (css/styles.<hash>.css): 1 yıl, immutable
+- HTML sayfaları ve hash'siz eski yollar: no-cache, ETag ile 304
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from flask import send_file
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+# Sıkıştırılmış varyantların dosya uzantıları (tercih sırasıyla)
+ENCODING_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# text/* türlerine send_file charset=utf-8 ekler
+MIMETYPES = {
+    '.html': 'text/html',
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.json': 'application/json',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.ico': 'image/x-icon',
+}
+
+
+@dataclass
+class StaticAsset:
+    """Bir URL yolu için sunulacak dosya ve varyantları"""
+    path: str
+    mimetype: str
+    etag: str
+    cache_control: str
+    # kodlama -> dosya yolu (manifest'teki tercih sırası korunur)
+    variants: Dict[str, str] = field(default_factory=dict)
+
+
+class StaticAssets:
+    """Manifest'ten kurulan URL yolu -> StaticAsset tablosu"""
+
+    def __init__(self, directory: str, manifest: Dict):
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported static manifest version: {manifest.get('version')}")
+        self.directory = directory
+        self.assets: Dict[str, StaticAsset] = {}
+        for source_path, entry in manifest['files'].items():
+            target = entry['path']
+            extension = os.path.splitext(source_path)[1].lower()
+            variants = {encoding: os.path.join(directory, f"{target}.{suffix}")
+                        for encoding, suffix in ENCODING_SUFFIXES.items() if encoding in entry['encodings']}
+            common = dict(path=os.path.join(directory, target),
+                          mimetype=MIMETYPES.get(extension, 'application/octet-stream'),
+                          etag=entry['hash'], variants=variants)
+            cache_control = IMMUTABLE_CACHE_CONTROL if entry['immutable'] else REVALIDATE_CACHE_CONTROL
+            self.assets[target] = StaticAsset(cache_control=cache_control, **common)
+            if target != source_path:
+                # Eski HTML'ler hash'siz yolu isteyebilir: aynı içerik, her seferinde doğrulanarak
+                self.assets[source_path] = StaticAsset(cache_control=REVALIDATE_CACHE_CONTROL, **common)
+
+    @classmethod
+    def load(cls, directory: str) -> 'StaticAssets':
+        with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+            return cls(directory, json.load(f))
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path)
+
+    @staticmethod
+    def select_encoding(asset: StaticAsset, accept_encodings) -> Tuple[Optional[str], str]:
+        """İstemcinin kabul ettiği en iyi varyant: (kodlama veya None, dosya yolu)"""
+        for encoding, path in asset.variants.items():
+            if accept_encodings[encoding]:
+                return encoding, path
+        return None, asset.path
+
+    def response(self, asset: StaticAsset, request):
+        """Seçilen varyantı ETag, Cache-Control ve Vary başlıklarıyla gönder (If-None-Match -> 304)"""
+        encoding, path = self.select_encoding(asset, request.accept_encodings)
+        # Her varyantın ayrı ETag'i olmalı (RFC 9110 8.8.3)
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+        response = send_file(path, mimetype=asset.mimetype, etag=etag, conditional=True, max_age=None)
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.variants:
+            response.headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def load_static_assets(directory: str) -> Optional[StaticAssets]:
+    """Build çıktısı varsa yükle; yoksa None (frontend/ dizini doğrudan sunulur)"""
+    if not directory or not os.path.exists(os.path.join(directory, MANIFEST_FILE)):
+        return None
+    try:
+        assets = StaticAssets.load(directory)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Static assets could not be loaded from {directory}: {e}")
+        return None
+    print(f"Static assets: {len(assets.assets)} paths from {directory}")
+    return assets
@@ -0,0 +1,243 @@
+"""
+/predict/what-if: bir profil etrafında bir veya iki sayısal alanın taranması
+Izgaranın tüm noktaları profilin encode edilmiş satırından tek matris olarak
+kurulur (taranan kolonlar değiştirilir, BMI her satır için yeniden hesaplanır),
+profilin kendisi son satır olarak eklenir ve matris tek orman geçişiyle
+skorlanır. Sabit kolonlardaki bölmeler profile göre önceden çözüldüğü için
+(FlatForest.specialize) orman sadece taranan alanlar ve BMI üzerinden yürür.
+Yanıt: sınıf olasılık yüzeyi ve tahmin edilen sınıfı Normal Weight'e
+yaklaştıran en küçük değişiklik.
+
+İstek:
+    {"profile": {... /predict alanları ...},
+     "sweep": [{"field": "weight", "min": 60, "max": 110, "steps": 51},
+               {"field": "faf", "values": [0, 1, 2, 3]}]}
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features import COLUMN_INDEX, NUMERIC_FIELDS
+from forest import FlatForest
+from inference import ScoringResult, ScoringService
+from schema import NUMERIC_RANGES, Field, RequestSchema
+
+# Izgara noktası üst sınırı (eksenlerin çarpımı)
+MAX_WHAT_IF_POINTS = int(os.environ.get('MAX_WHAT_IF_POINTS', 10000))
+MAX_AXES = 2
+DEFAULT_STEPS = 21
+
+# Sınıfların ağırlık sırası; "iyileşme" Normal Weight'e olan uzaklığın azalmasıdır
+# (kilolu/obez profillerde bir alt sınıf, Insufficient Weight'te Normal Weight)
+CLASS_ORDER = ['Insufficient Weight', 'Normal Weight', 'Overweight Level I', 'Overweight Level II',
+               'Obesity Type I', 'Obesity Type II', 'Obesity Type III']
+TARGET_CLASS = 'Normal Weight'
+
+
+def _integer(value: float) -> Optional[str]:
+    return None if float(value).is_integer() else "must be an integer"
+
+
+# Eksen tanımı: field + min/max/steps (eşit aralıklı) veya values (açık liste)
+_AXIS_SCHEMA = RequestSchema([
+    Field('field', 'category', choices=sorted(NUMERIC_FIELDS)),
+    Field('min', 'number', required=False),
+    Field('max', 'number', required=False),
+    Field('steps', 'number', required=False, default=DEFAULT_STEPS, minimum=2, maximum=MAX_WHAT_IF_POINTS,
+          check=_integer),
+    Field('values', 'any', required=False),
+])
+# Eksen değerleri /predict ile aynı aralık kontrollerinden geçer
+_VALUE_CONVERTERS = {name: RequestSchema([Field(name, 'number', **NUMERIC_RANGES[name])])
+                     for name in NUMERIC_FIELDS}
+
+
+@dataclass
+class SweepAxis:
+    field: str
+    values: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.values)
+
+
+def _axis_values(name: str, spec: Dict[str, Any]) -> Tuple[Optional[np.ndarray], List[str]]:
+    """Eksen değerleri ve hata mesajları"""
+    if spec.get('values') is not None:
+        values = spec['values']
+        if type(values) is not list or not values:
+            return None, ["'values' must be a non-empty array"]
+        if len(values) > MAX_WHAT_IF_POINTS:
+            return None, [f"'values' must have at most {MAX_WHAT_IF_POINTS} items"]
+    else:
+        if 'min' not in spec or 'max' not in spec:
+            return None, ["needs either 'values' or 'min' and 'max'"]
+        if spec['min'] > spec['max']:
+            return None, ["'min' must not be greater than 'max'"]
+        values = np.linspace(spec['min'], spec['max'], int(spec['steps'])).tolist()
+
+    schema = _VALUE_CONVERTERS[name]
+    converted = []
+    for value in values:
+        result, errors = schema.validate({name: value})
+        if errors:
+            return None, [f"value {value!r} {errors[0]['message']}"]
+        converted.append(result[name])
+    return np.array(converted, dtype=np.float64), []
+
+
+def parse_sweep(sweep: Any) -> Tuple[Optional[List[SweepAxis]], List[Dict[str, Any]]]:
+    """
+    "sweep" listesini eksenlere çevir (listedeki sıra eksen sırasıdır).
+    Dönüş: (eksenler, şema formatında hatalar); hata varsa eksenler None
+    """
+    if type(sweep) is not list or not 1 <= len(sweep) <= MAX_AXES:
+        return None, [{"field": "sweep", "message": f"must be an array of 1 to {MAX_AXES} axes"}]
+
+    axes, errors = [], []
+    for i, spec in enumerate(sweep):
+        field = f"sweep[{i}]"
+        if type(spec) is not dict:
+            errors.append({"field": field, "message": "must be a JSON object"})
+            continue
+        spec, spec_errors = _AXIS_SCHEMA.validate(spec)
+        if not spec_errors:
+            if spec['field'] in (axis.field for axis in axes):
+                spec_errors = [{"field": 'field', "message": "is swept more than once"}]
+            else:
+                values, messages = _axis_values(spec['field'], spec)
+                spec_errors = [{"field": None, "message": message} for message in messages]
+        if spec_errors:
+            errors.extend({"field": f"{field}.{error['field']}" if error['field'] else field,
+                           "message": error['message']} for error in spec_errors)
+            continue
+        axes.append(SweepAxis(spec['field'], values))
+
+    if not errors:
+        points = int(np.prod([axis.size for axis in axes]))
+        if points > MAX_WHAT_IF_POINTS:
+            errors.append({"field": "sweep", "message": f"grid has {points} points (max {MAX_WHAT_IF_POINTS})"})
+    return (None, errors) if errors else (axes, errors)
+
+
+def _meters(height: np.ndarray) -> np.ndarray:
+    # FeatureEncoder ile aynı kural: 10'dan büyük değerler santimetredir
+    return np.where(height > 10, height / 100, height)
+
+
+def sweep_matrix(scoring: ScoringService, profile: Dict[str, Any], axes: List[SweepAxis]) -> np.ndarray:
+    """
+    Izgara noktalarını (eksen sırasıyla, C düzeninde) ve son satırda profilin
+    kendisini içeren encode edilmiş matris; BMI her satır için yeniden hesaplanır
+    """
+    grids = np.meshgrid(*(axis.values for axis in axes), indexing='ij')
+    X = np.empty((grids[0].size + 1, len(COLUMN_INDEX)), dtype=np.float64)
+    scoring.encoder.encode_row_into(profile, X[-1])
+    X[:-1] = X[-1]
+
+    for axis, grid in zip(axes, grids):
+        values = grid.ravel()
+        X[:-1, COLUMN_INDEX[NUMERIC_FIELDS[axis.field]]] = _meters(values) if axis.field == 'height' else values
+    height = X[:-1, COLUMN_INDEX['Height']]
+    X[:-1, COLUMN_INDEX['BMI']] = X[:-1, COLUMN_INDEX['Weight']] / (height ** 2)
+    return X
+
+
+def sweep_engine(engine, X: np.ndarray):
+    """
+    Düzleştirilmiş ormanı, profil satırından (son satır) farklı olmayan
+    kolonlar için önceden çözülmüş haliyle döndür (FlatForest.specialize);
+    diğer motorlar olduğu gibi kullanılır
+    """
+    if not isinstance(engine, FlatForest):
+        return engine
+    # Orman kolonları float32 olarak karşılaştırır
+    X32 = X.astype(np.float32)
+    return engine.specialize(X32[-1], (X32 != X32[-1]).any(axis=0))
+
+
+def _class_distance(names: List[str]) -> np.ndarray:
+    """scoring.names sırasında her sınıfın Normal Weight'e uzaklığı (bilinmeyen sınıf: 0)"""
+    target = CLASS_ORDER.index(TARGET_CLASS)
+    return np.array([abs(CLASS_ORDER.index(name) - target) if name in CLASS_ORDER else 0 for name in names])
+
+
+def smallest_change(axes: List[SweepAxis], profile: Dict[str, Any], best: np.ndarray,
+                    probabilities: np.ndarray, distance: np.ndarray, base_index: int,
+                    names: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Tahmin edilen sınıfı Normal Weight'e yaklaştıran ızgara noktalarından
+    profile en yakın olanı. Uzaklık, her eksende değişikliğin eksen aralığına
+    oranının toplamıdır; eşitlikte yeni sınıfın olasılığı yüksek olan seçilir.
+    """
+    improved = np.flatnonzero(distance[best] < distance[base_index])
+    if not len(improved):
+        return None
+
+    grids = np.meshgrid(*(axis.values for axis in axes), indexing='ij')
+    cost = np.zeros(len(improved))
+    deltas = []
+    for axis, grid in zip(axes, grids):
+        values = grid.ravel()[improved]
+        base = profile[axis.field]
+        if axis.field == 'height':
+            # Değişiklik eksenin birimiyle (cm veya m) raporlanır
+            scale = 100.0 if axis.values.max() > 10 else 1.0
+            base = float(_meters(np.array(base))) * scale
+        delta = values - base
+        span = axis.values.max() - axis.values.min()
+        cost += np.abs(delta) / span if span else 0.0
+        deltas.append(delta)
+
+    confidence = probabilities[improved, best[improved]]
+    choice = np.lexsort((-confidence, cost))[0]
+    point = improved[choice]
+    return {
+        "changes": {axis.field: round(float(delta[choice]), 4) for axis, delta in zip(axes, deltas)},
+        "values": {axis.field: round(float(grid.ravel()[point]), 4) for axis, grid in zip(axes, grids)},
+        "predicted_class": names[best[point]],
+        "confidence": round(float(confidence[choice] * 100), 1)
+    }
+
+
+def run_sweep(scoring: ScoringService, profile: Dict[str, Any],
+              axes: List[SweepAxis]) -> Tuple[ScoringResult, Dict[str, Any]]:
+    """
+    Izgarayı tek orman geçişiyle skorla.
+
+    Dönüş: (profilin kendi sonucu, yanıtın "sweep" objesi - olasılıklar
+    yüzde, ızgara şeklinde iç içe listeler)
+    """
+    start = time.perf_counter()
+    X = sweep_matrix(scoring, profile, axes)
+    bmi = np.round(X[:, COLUMN_INDEX['BMI']], 2)
+    encoded = time.perf_counter()
+    scoring.rows.scale_in_place(X)
+    scaled = time.perf_counter()
+    probabilities = sweep_engine(scoring.engine, X).predict_proba(X)
+    done = time.perf_counter()
+    scoring.timings.record(encoded - start, scaled - encoded, done - scaled, rows=len(X))
+
+    base = scoring.results(probabilities[-1:], bmi[-1:])[0]
+
+    names = scoring.names
+    shape = tuple(axis.size for axis in axes)
+    grid = probabilities[:-1]
+    best = grid.argmax(axis=1)
+    percent = np.round(grid * 100, 2)
+    sweep = {
+        "axes": [{"field": axis.field, "values": axis.values.tolist()} for axis in axes],
+        "points": len(grid),
+        "classes": names,
+        "probabilities": {name: percent[:, i].reshape(shape).tolist() for i, name in enumerate(names)},
+        "predicted_class": best.reshape(shape).tolist(),
+        "bmi": bmi[:-1].reshape(shape).tolist(),
+        "smallest_change": smallest_change(axes, profile, best, grid, _class_distance(names),
+                                           int(probabilities[-1].argmax()), names)
+    }
+    return base, sweep
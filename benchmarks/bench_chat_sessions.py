@@ -0,0 +1,88 @@
+"""
+Çok turlu sohbet benchmark'ı: tek seferlik /api/generate vs oturumlu /api/chat
+Prompt token başına maliyet uygulayan sahte Ollama'ya aynı sağlık bağlamıyla
+--turns turluk bir konuşma gönderir ve her tur için ilk chunk'a kadar geçen
+süreyi (TTFT) ve Ollama'nın işlediği prompt token sayısını raporlar.
+
+Kullanım: python benchmarks/bench_chat_sessions.py --turns 6 --prompt-token-cost 0.002
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import requests
+
+from bench_utils import start_fake_ollama
+
+from chat_sessions import ChatSessionStore  # noqa: E402
+from llama_integration import LlamaHealthBot  # noqa: E402
+
+QUESTIONS = [
+    "Kilo vermek için nereden başlamalıyım?",
+    "Kahvaltıda ne yemeliyim?",
+    "Haftada kaç gün egzersiz yapmalıyım?",
+    "Akşam atıştırmalarını nasıl azaltırım?",
+    "Su tüketimimi nasıl artırabilirim?",
+    "Motivasyonumu nasıl korurum?",
+    "Uyku düzeni kiloyu etkiler mi?",
+    "Dışarıda yemek yerken nelere dikkat etmeliyim?",
+]
+
+CONTEXT = {'predicted_class': 'Obesity Type I', 'bmi': 31.2, 'confidence': 87.5}
+
+
+def run_conversation(bot: LlamaHealthBot, url: str, turns: int, use_session: bool):
+    """Her tur için (TTFT, işlenen prompt token) listesi"""
+    requests.get(f"{url}/_reset", timeout=1)
+    session = bot.open_session(None, CONTEXT) if use_session else None
+    results = []
+    for turn in range(turns):
+        before = requests.get(f"{url}/_stats", timeout=1).json()['prompt_tokens_evaluated']
+        start = time.perf_counter()
+        ttft = None
+        for _ in bot.generate_streaming_response(QUESTIONS[turn % len(QUESTIONS)], CONTEXT, session=session):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        after = requests.get(f"{url}/_stats", timeout=1).json()['prompt_tokens_evaluated']
+        results.append((ttft, after - before))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--turns', type=int, default=6)
+    parser.add_argument('--ttft', type=float, default=0.05, help='Prompt dışı sabit ilk token süresi')
+    parser.add_argument('--prompt-token-cost', type=float, default=0.002, help='Prompt token başına saniye')
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--tokens-per-sec', type=float, default=400.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_ollama(ttft=args.ttft, prompt_token_cost=args.prompt_token_cost,
+                                    tokens=args.tokens, tokens_per_sec=args.tokens_per_sec)
+    try:
+        stateless = run_conversation(LlamaHealthBot(ollama_url=url), url, args.turns, use_session=False)
+        sessions = ChatSessionStore()
+        chat = run_conversation(LlamaHealthBot(ollama_url=url, sessions=sessions), url, args.turns,
+                                use_session=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'turn':<6}{'generate TTFT':>15}{'tokens':>8}{'session TTFT':>15}{'tokens':>8}")
+    for turn, ((g_ttft, g_tokens), (c_ttft, c_tokens)) in enumerate(zip(stateless, chat), 1):
+        print(f"{turn:<6}{g_ttft * 1000:>13.1f}ms{g_tokens:>8}{c_ttft * 1000:>13.1f}ms{c_tokens:>8}")
+
+    follow_up_generate = np.array([ttft for ttft, _ in stateless[1:]])
+    follow_up_session = np.array([ttft for ttft, _ in chat[1:]])
+    if len(follow_up_generate):
+        print(f"\nFollow-up TTFT mean: generate={follow_up_generate.mean() * 1000:.1f}ms "
+              f"session={follow_up_session.mean() * 1000:.1f}ms "
+              f"({follow_up_generate.mean() / follow_up_session.mean():.1f}x faster)")
+    print(f"Session store: {sessions.stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Feature atıfı: doğruluk kontrolü ve mikro benchmark
+Referans: sklearn ağaçları üzerinde ağaç ağaç decision_path ile hesaplanan
+Saabas katkıları (treeinterpreter'ın yaptığı gibi). FlatForest.contributions
+aynı katkıları vermeli ve bias + katkılar predict_proba'ya eşit olmalı;
+aksi halde script hata koduyla çıkar.
+
+Kullanım: python benchmarks/bench_explain.py [--rows 300]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from bench_utils import dataset_records, load_artifacts, summarize, time_calls
+from forest import FlatForest
+from inference import RowPredictor, ScoringService
+
+warnings.filterwarnings('ignore')
+
+
+def reference_contributions(model, X):
+    """Ağaç başına decision_path üzerinden katkılar (Python döngüsü)"""
+    n_rows, n_features = X.shape
+    contributions = np.zeros((n_rows, n_features, len(model.classes_)))
+    bias = np.zeros(len(model.classes_))
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        bias += value[0]
+        paths = estimator.decision_path(X.astype(np.float32))
+        for row in range(n_rows):
+            nodes = paths.indices[paths.indptr[row]:paths.indptr[row + 1]]
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                contributions[row, tree.feature[parent]] += value[child] - value[parent]
+    n_trees = len(model.estimators_)
+    return bias / n_trees, contributions / n_trees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=300, help='Kullanılacak veri seti satırı')
+    args = parser.parse_args()
+
+    model, scaler = load_artifacts()
+    forest = FlatForest.from_sklearn(model)
+    predictor = RowPredictor(forest, scaler)
+    records = dataset_records(args.rows)
+    X = np.vstack([predictor.transform(record)[0].copy() for record in records])
+
+    start = time.perf_counter()
+    expected_bias, expected = reference_contributions(model, X)
+    reference_ms = (time.perf_counter() - start) / len(X) * 1000
+    bias, contributions = forest.contributions(X)
+
+    contribution_error = float(np.abs(contributions - expected).max())
+    bias_error = float(np.abs(bias - expected_bias).max())
+    additivity_error = float(np.abs(bias + contributions.sum(axis=1) - model.predict_proba(X)).max())
+    print(f"Max difference vs per-tree reference: contributions {contribution_error:.2e}, bias {bias_error:.2e}")
+    print(f"Max |bias + sum(contributions) - predict_proba|: {additivity_error:.2e}")
+
+    # Her iki motorda da ScoringService.score(explain=True) aynı açıklamayı vermeli
+    flat_service, sklearn_service = ScoringService(forest, scaler), ScoringService(model, scaler)
+    service_mismatches = sum(flat_service.score(record, explain=True).explanation
+                             != sklearn_service.score(record, explain=True).explanation
+                             for record in records[:50])
+    print(f"flat vs sklearn engine explanations: {service_mismatches} mismatches")
+
+    print(f"\nReference (per-tree decision_path): {reference_ms:.2f}ms per row")
+    rows = [(X[i:i + 1],) for i in range(len(X))]
+    summarize('predict_proba (1 row)', time_calls(forest.predict_proba, rows))
+    summarize('contributions (1 row)', time_calls(forest.contributions, rows))
+    summarize('score (1 row)', time_calls(flat_service.score, [(record,) for record in records]))
+    summarize('score explain (1 row)', time_calls(lambda record: flat_service.score(record, explain=True),
+                                                  [(record,) for record in records]))
+    batch = time_calls(forest.contributions, [(X,)], repeat=5)
+    print(f"contributions ({len(X)} rows): {batch.mean() * 1000:.1f}ms "
+          f"({batch.mean() / len(X) * 1e6:.0f}us per row)")
+
+    ok = contribution_error < 1e-9 and bias_error < 1e-12 and additivity_error < 1e-9 and not service_mismatches
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
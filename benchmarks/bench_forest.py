@@ -0,0 +1,51 @@
+"""
+Inference motorları karşılaştırması: sklearn predict_proba vs FlatForest
+Tek satır ve toplu tahmin için p50/p99 gecikme; olasılıkların eşitliği de kontrol edilir.
+
+Kullanım: python benchmarks/bench_forest.py [--rows 500] [--batch 1000]
+"""
+
+import argparse
+import sys
+import warnings
+import numpy as np
+
+from bench_utils import dataset_records, load_artifacts, summarize, time_calls
+from features import DEFAULT_ENCODER
+from forest import FlatForest
+
+warnings.filterwarnings('ignore')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500, help='Tek satır ölçümü için satır sayısı')
+    parser.add_argument('--batch', type=int, default=1000, help='Toplu ölçüm için batch boyutu')
+    args = parser.parse_args()
+
+    model, scaler = load_artifacts()
+    flat = FlatForest.from_sklearn(model)
+
+    X, _, _, _ = DEFAULT_ENCODER.encode_records(dataset_records())
+    X_scaled = (X - scaler.mean_) / scaler.scale_
+
+    expected = model.predict_proba(X_scaled)
+    actual = flat.predict_proba(X_scaled)
+    max_diff = float(np.abs(expected - actual).max())
+    same_class = bool((expected.argmax(axis=1) == actual.argmax(axis=1)).all())
+    print(f"Equivalence: max |p_sklearn - p_flat| = {max_diff:.2e}, same predicted class: {same_class}")
+    print(f"Forest: {flat.n_trees} trees, {len(flat.feature)} nodes, max depth {flat.max_depth}\n")
+
+    rows = [(X_scaled[i:i + 1],) for i in range(min(args.rows, len(X_scaled)))]
+    summarize('sklearn single-row', time_calls(model.predict_proba, rows))
+    summarize('flat single-row', time_calls(flat.predict_proba, rows))
+
+    batch = [(X_scaled[:args.batch],)]
+    summarize(f'sklearn batch={len(batch[0][0])}', time_calls(model.predict_proba, batch, repeat=20))
+    summarize(f'flat batch={len(batch[0][0])}', time_calls(flat.predict_proba, batch, repeat=20))
+
+    return 0 if same_class and max_diff < 1e-9 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Tek satırlık tahmin yolu: eşdeğerlik kontrolü ve mikro benchmark
+Eski yol (dict -> pd.DataFrame -> scaler.transform, eğitimdeki LabelEncoder
+kodlarıyla) ile RowPredictor aynı olasılıkları üretmeli; fark varsa script
+hata koduyla çıkar.
+
+Kullanım: python benchmarks/bench_inference.py [--rows 300]
+"""
+
+import argparse
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+
+from bench_utils import dataset_records, load_artifacts, summarize, time_calls
+from features import FEATURE_COLUMNS
+from inference import RowPredictor
+
+warnings.filterwarnings('ignore')
+
+
+def legacy_process_input_data(data):
+    """app.py'deki eski process_input_data, eğitimle aynı kodlara düzeltilmiş (referans)"""
+    height_m = data['height'] / 100 if data['height'] > 10 else data['height']
+    bmi = data['weight'] / (height_m ** 2)
+    features = {
+        'Age': data['age'],
+        'Gender': 1 if data['gender'].lower() == 'male' else 0,
+        'Height': height_m,
+        'Weight': data['weight'],
+        'CALC': {'always': 0, 'frequently': 1, 'sometimes': 2, 'no': 3}[data['calc'].lower()],
+        'FAVC': 1 if data['favc'].lower() == 'yes' else 0,
+        'FCVC': data['fcvc'],
+        'NCP': data['ncp'],
+        'SCC': 1 if data['scc'].lower() == 'yes' else 0,
+        'SMOKE': 1 if data['smoke'].lower() == 'yes' else 0,
+        'CH2O': data['ch2o'],
+        'family_history_with_overweight': 1 if data['family_history'].lower() == 'yes' else 0,
+        'FAF': data['faf'],
+        'TUE': data['tue'],
+        'CAEC': {'always': 0, 'frequently': 1, 'sometimes': 2, 'no': 3}[data['caec'].lower()],
+        'MTRANS': {'automobile': 0, 'bike': 1, 'motorbike': 2,
+                   'public_transportation': 3, 'walking': 4}[data['mtrans'].lower()],
+        'BMI': bmi
+    }
+    return features, round(bmi, 2)
+
+
+def legacy_predict_proba(model, scaler, data):
+    features, bmi = legacy_process_input_data(data)
+    input_df = pd.DataFrame([features])[FEATURE_COLUMNS]
+    return model.predict_proba(scaler.transform(input_df))[0], bmi
+
+
+def legacy_transform(scaler, data):
+    features, _ = legacy_process_input_data(data)
+    return scaler.transform(pd.DataFrame([features])[FEATURE_COLUMNS])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=300, help='Kullanılacak veri seti satırı')
+    args = parser.parse_args()
+
+    model, scaler = load_artifacts()
+    predictor = RowPredictor(model, scaler)
+    records = dataset_records(args.rows)
+
+    # Eşdeğerlik: ölçekli satır ve olasılıklar birebir aynı olmalı
+    mismatches = 0
+    for data in records:
+        expected_proba, expected_bmi = legacy_predict_proba(model, scaler, data)
+        expected_row = legacy_transform(scaler, data)
+        row, bmi = predictor.transform(data)
+        row = row.copy()
+        proba, _ = predictor.predict_proba(data)
+        if bmi != expected_bmi or not np.array_equal(row, expected_row) \
+                or not np.array_equal(proba, expected_proba):
+            mismatches += 1
+    print(f"Equivalence: {len(records) - mismatches}/{len(records)} rows identical")
+
+    # Sadece encode + scale maliyeti (forest hariç)
+    calls = [(data,) for data in records]
+    summarize('legacy encode+scale', time_calls(lambda d: legacy_transform(scaler, d), calls))
+    summarize('RowPredictor encode+scale', time_calls(predictor.transform, calls))
+
+    # Uçtan uca tek satır tahmin
+    summarize('legacy predict_proba', time_calls(lambda d: legacy_predict_proba(model, scaler, d), calls))
+    summarize('RowPredictor predict_proba', time_calls(predictor.predict_proba, calls))
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+İstek şeması: eşdeğerlik kontrolü ve parse + doğrulama mikro benchmark'ı
+Eski yol (json.loads, elle eksik alan listesi, /quick-predict için
+{**data, **QUICK_PREDICT_DEFAULTS} kopyası) ile derlenmiş şemanın decode()
+maliyeti istek başına karşılaştırılır. Şema veri setindeki her kaydı kabul
+etmeli ve encoder aynı feature satırını üretmeli; aksi halde script hata
+koduyla çıkar.
+
+Kullanım: python benchmarks/bench_schema.py [--rows 300] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from bench_utils import dataset_records, summarize, time_calls
+from features import COLUMN_INDEX, DEFAULT_ENCODER, QUICK_PREDICT_DEFAULTS, QUICK_PREDICT_FIELDS, REQUIRED_FIELDS
+from schema import prediction_schema, quick_predict_schema
+
+
+def legacy_predict_validate(body):
+    """app.py'deki eski /predict doğrulaması: sadece eksik alanlar, tip/aralık kontrolü yok"""
+    data = json.loads(body)
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in data]
+    return data, missing_fields
+
+
+def legacy_quick_validate(body):
+    data = json.loads(body)
+    missing_fields = [field for field in QUICK_PREDICT_FIELDS if field not in data]
+    return {**data, **QUICK_PREDICT_DEFAULTS}, missing_fields
+
+
+def encoded(encoder, data):
+    buffer = np.empty(len(COLUMN_INDEX))
+    encoder.encode_row_into(data, buffer)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=300, help='Kullanılacak veri seti satırı')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    encoder = DEFAULT_ENCODER
+    schema = prediction_schema(encoder)
+    quick_schema = quick_predict_schema(encoder)
+    records = dataset_records(args.rows)
+    # Gerçek istemciler gibi karışık büyük/küçük harf
+    bodies = [json.dumps({**record, 'gender': record['gender'].title()}).encode() for record in records]
+    quick_bodies = [json.dumps({field: record[field] for field in QUICK_PREDICT_FIELDS}).encode()
+                    for record in records]
+
+    # Eşdeğerlik: şemadan geçen değerler eski yolla aynı feature satırını vermeli
+    mismatches = 0
+    for decode, legacy, payloads in ((schema.decode, legacy_predict_validate, bodies),
+                                     (quick_schema.decode, legacy_quick_validate, quick_bodies)):
+        for payload in payloads:
+            values, errors = decode(payload)
+            expected, _ = legacy(payload)
+            if errors or not np.array_equal(encoded(encoder, values), encoded(encoder, expected)):
+                mismatches += 1
+    print(f"Equivalence: {mismatches} mismatches over {len(bodies)} records")
+
+    invalid = json.dumps({**records[0], 'age': 'abc', 'gender': 'x', 'weight': -5}).encode()
+    _, errors = schema.decode(invalid)
+    print(f"Invalid body -> {len(errors)} errors: {errors}")
+
+    print("\nPer-request parse + validate:")
+    results = {
+        'legacy /predict': summarize('legacy /predict', time_calls(
+            legacy_predict_validate, [(b,) for b in bodies], args.repeat)),
+        'schema /predict': summarize('schema /predict', time_calls(
+            schema.decode, [(b,) for b in bodies], args.repeat)),
+        'legacy /quick-predict': summarize('legacy /quick-predict', time_calls(
+            legacy_quick_validate, [(b,) for b in quick_bodies], args.repeat)),
+        'schema /quick-predict': summarize('schema /quick-predict', time_calls(
+            quick_schema.decode, [(b,) for b in quick_bodies], args.repeat)),
+    }
+    for name in ('/predict', '/quick-predict'):
+        legacy, compiled = results[f'legacy {name}'], results[f'schema {name}']
+        print(f"{name}: schema p50 {compiled['p50_us']:.1f}us vs legacy {legacy['p50_us']:.1f}us "
+              f"(+{compiled['p50_us'] - legacy['p50_us']:.1f}us for type, range and category checks)")
+
+    return 1 if mismatches or len(errors) != 3 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+SSE çıktı benchmark'ı: token başına frame vs birleştirilmiş (ve gzip'li) frame
+Gerçekçi bir Türkçe yanıtı LLM token'larına (~4 karakter) böler ve
+/api/chat/stream'in eski çıktısıyla SSEWriter çıktısını karşılaştırır:
+frame (yazma çağrısı) sayısı, byte sayısı ve yanıt başına serileştirme süresi.
+
+Senaryolar:
+- live:   token'lar --tokens-per-sec hızında gelir (sahte saat ile, beklemeden)
+- replay: önbellek/fallback yanıtı, tüm parçalar aynı anda hazır
+
+Kullanım: python benchmarks/bench_sse.py --tokens-per-sec 40 --repeat 200
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+
+import bench_utils  # noqa: F401  (backend modüllerini sys.path'e ekler)
+
+from llama_integration import DEFAULT_ASSISTANT_MESSAGE, get_quick_health_tips  # noqa: E402
+from sse import SSEWriter  # noqa: E402
+
+
+def sample_tokens():
+    """Birkaç fallback metninden ~600 token'lık yanıt"""
+    text = '\n'.join([get_quick_health_tips(name, 31.2) for name in
+                      ('Normal Weight', 'Overweight Level I', 'Obesity Type I')] + [DEFAULT_ASSISTANT_MESSAGE])
+    return re.findall(r'\s*\S{1,4}', text)
+
+
+def legacy_frames(tokens, done_event):
+    """Bugünkü çıktı: her token ayrı json.dumps ile ayrı frame"""
+    frames = [f"data: {json.dumps({'chunk': token, 'done': False})}\n\n".encode('utf-8') for token in tokens]
+    frames.append(f"data: {json.dumps(done_event)}\n\n".encode('utf-8'))
+    return frames
+
+
+def legacy_fallback_frames(text, done_event):
+    """Bugünkü fallback çıktısı: kelime kelime frame"""
+    return legacy_frames([word + ' ' for word in text.split()], done_event)
+
+
+class FakeClock:
+    """Token gelişlerini beklemeden simüle eden saat"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def writer_frames(writer, tokens, done_event, interval, encoding=None):
+    clock = writer.clock
+
+    def arrivals():
+        for token in tokens:
+            if isinstance(clock, FakeClock):
+                clock.now += interval
+            yield token
+
+    return list(writer.stream(arrivals(), done_event, encoding))
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tokens-per-sec', type=float, default=40.0, help='live senaryosunda token hızı')
+    parser.add_argument('--max-bytes', type=int, default=256)
+    parser.add_argument('--max-delay-ms', type=float, default=20.0)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    tokens = sample_tokens()
+    text = ''.join(tokens)
+    done_event = {'chunk': '', 'done': True, 'session_id': '0' * 32}
+    interval = 1.0 / args.tokens_per_sec
+    print(f"Response: {len(tokens)} tokens, {len(text.encode('utf-8'))} bytes of text\n")
+    print(f"{'scenario':<10}{'output':<22}{'frames':>8}{'bytes':>10}{'serialize':>14}")
+
+    def row(scenario, name, frames, micros):
+        print(f"{scenario:<10}{name:<22}{len(frames):>8}{sum(map(len, frames)):>10}{micros:>12.1f}us")
+
+    for scenario, step in (('live', interval), ('replay', 0.0)):
+        row(scenario, 'per-token (before)', legacy_frames(tokens, done_event),
+            timed(lambda: legacy_frames(tokens, done_event), args.repeat))
+        if scenario == 'replay':
+            words_frames = legacy_fallback_frames(text, done_event)
+            row(scenario, 'per-word fallback', words_frames,
+                timed(lambda: legacy_fallback_frames(text, done_event), args.repeat))
+
+        for encoding in (None, 'gzip'):
+            def run():
+                writer = SSEWriter(args.max_bytes, args.max_delay_ms / 1000, gzip=True, clock=FakeClock())
+                return writer_frames(writer, tokens, done_event, step, encoding)
+            frames = [frame for frame in run() if frame]
+            row(scenario, 'coalesced' + (' + gzip' if encoding else ''), frames, timed(run, args.repeat))
+
+    # Birleştirilmiş çıktının metni kaybetmediğini doğrula
+    writer = SSEWriter(args.max_bytes, args.max_delay_ms / 1000, clock=FakeClock())
+    rebuilt = ''.join(json.loads(line[6:])['chunk']
+                      for frame in writer_frames(writer, tokens, done_event, interval)
+                      for line in frame.decode('utf-8').split('\n') if line.startswith('data: '))
+    assert rebuilt == text, 'coalesced output does not match the token stream'
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Worker başlangıç benchmark'ı: pickle (joblib.load) vs memory-map edilmiş flat artefaktlar
+Her mod için --workers adet ayrı Python süreci (gunicorn worker'ları gibi) aynı
+anda başlatılır; her süreç modeli yükler, veri setini bir kez skorlar ve
+bekler. Bu sırada her sürecin /proc/<pid>/smaps_rollup değerleri okunur:
+RSS süreç başına görünen bellek, PSS ise paylaşılan sayfaların süreçlere
+bölünmüş payıdır (toplam PSS ~ gerçek fiziksel bellek kullanımı).
+
+Modlar:
+- pickle: joblib.load(obesity_model.pkl, scaler.pkl) + FlatForest.load(forest_flat.npz)
+- mmap:   load_flat_artifacts(flat/) (sklearn/joblib import edilmez)
+
+Kullanım: python benchmarks/bench_startup.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+MODES = ('pickle', 'mmap')
+
+
+def run_worker(mode: str, artifacts_dir: str) -> None:
+    """Worker süreci: sadece ölçülen modun ihtiyaç duyduğu modülleri import eder"""
+    start = time.perf_counter()
+    sys.path.insert(0, BACKEND_DIR)
+    from features import load_encoder
+    from inference import ScoringService, load_flat_artifacts
+
+    if mode == 'pickle':
+        import joblib
+        from forest import FlatForest
+        joblib.load(os.path.join(artifacts_dir, 'obesity_model.pkl'))
+        scaler = joblib.load(os.path.join(artifacts_dir, 'scaler.pkl'))
+        engine = FlatForest.load(os.path.join(artifacts_dir, 'forest_flat.npz'))
+    else:
+        engine, scaler = load_flat_artifacts(os.path.join(artifacts_dir, 'flat'))
+    scoring = ScoringService(engine, scaler, load_encoder(os.path.join(artifacts_dir, 'encoder.json')))
+    loaded = time.perf_counter()
+
+    with open(os.path.join(artifacts_dir, 'records.json'), encoding='utf-8') as f:
+        records = json.load(f)
+    scoring.score_records(records)
+
+    print(json.dumps({'load_seconds': loaded - start}), flush=True)
+    sys.stdin.read()  # ölçüm bitene kadar bekle
+
+
+def memory_kb(pid: int) -> dict:
+    """smaps_rollup'tan RSS/PSS/paylaşılan değerleri (kB)"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+
+def prepare_artifacts(directory: str) -> None:
+    """models/*.pkl'den iki formatı ve skorlanacak kayıtları üret"""
+    import joblib
+    from bench_utils import dataset_records, load_artifacts
+    from forest import FlatForest
+    from inference import save_flat_artifacts
+
+    model, scaler = load_artifacts()
+    joblib.dump(model, os.path.join(directory, 'obesity_model.pkl'))
+    joblib.dump(scaler, os.path.join(directory, 'scaler.pkl'))
+    FlatForest.from_sklearn(model).save(os.path.join(directory, 'forest_flat.npz'))
+    save_flat_artifacts(os.path.join(directory, 'flat'), model, scaler)
+    with open(os.path.join(directory, 'records.json'), 'w', encoding='utf-8') as f:
+        json.dump(dataset_records(), f)
+
+
+def measure(mode: str, artifacts_dir: str, workers: int) -> list:
+    """workers adet süreci aynı anda çalıştır; hepsi hazırken belleklerini oku"""
+    processes = []
+    for _ in range(workers):
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-W', 'ignore', os.path.abspath(__file__),
+                                    '--worker', mode, artifacts_dir],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        processes.append((process, started))
+
+    results = []
+    try:
+        for process, started in processes:
+            line = process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{mode} worker exited with code {process.wait()}")
+            report = json.loads(line)
+            report['ready_seconds'] = time.perf_counter() - started
+            results.append(report)
+        for (process, _), report in zip(processes, results):
+            report['memory'] = memory_kb(process.pid)
+    finally:
+        for process, _ in processes:
+            process.stdin.close()
+            process.wait()
+    return results
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        run_worker(sys.argv[2], sys.argv[3])
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4, help='Aynı anda çalışan worker süreci sayısı')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as artifacts_dir:
+        prepare_artifacts(artifacts_dir)
+        sizes = {name: os.path.getsize(os.path.join(artifacts_dir, name))
+                 for name in ('obesity_model.pkl', 'forest_flat.npz')}
+        flat_size = sum(os.path.getsize(os.path.join(base, name))
+                        for base, _, names in os.walk(os.path.join(artifacts_dir, 'flat')) for name in names)
+        print(f"Artifacts: pickle {sizes['obesity_model.pkl'] / 1e6:.1f}MB + npz "
+              f"{sizes['forest_flat.npz'] / 1e6:.1f}MB, flat/ {flat_size / 1e6:.1f}MB\n")
+        print(f"{'mode':<8}{'load':>10}{'ready':>10}{'RSS/worker':>13}{'PSS/worker':>13}"
+              f"{'shared':>10}{'total PSS':>12}")
+
+        for mode in MODES:
+            measure(mode, artifacts_dir, 1)  # page cache'i ısıt
+            results = measure(mode, artifacts_dir, args.workers)
+            n = len(results)
+            load = sum(r['load_seconds'] for r in results) / n
+            ready = sum(r['ready_seconds'] for r in results) / n
+            rss = sum(r['memory']['Rss'] for r in results) / n
+            pss = sum(r['memory']['Pss'] for r in results)
+            shared = sum(r['memory'].get('Shared_Clean', 0) for r in results) / n
+            print(f"{mode:<8}{load * 1000:>8.0f}ms{ready * 1000:>8.0f}ms{rss / 1024:>11.1f}MB"
+                  f"{pss / n / 1024:>11.1f}MB{shared / 1024:>8.1f}MB{pss / 1024:>10.1f}MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
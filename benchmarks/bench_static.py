@@ -0,0 +1,114 @@
+"""
+Statik dosya sunumu: sayfa yükü başına aktarılan byte ve istek gecikmesi
+Eski yol (frontend/ dizininden send_from_directory, sıkıştırma/uzun cache yok)
+ile build_assets.py çıktısı (minify, hash'li isimler, gzip/br, immutable
+cache) Flask test client üzerinden karşılaştırılır. Sayfa yükü: HTML + CSS +
+JS. Tekrar ziyarette eski yol her dosyayı If-None-Match ile doğrular, yeni
+yolda hash'li dosyalar tarayıcı önbelleğinden gelir ve sadece HTML doğrulanır.
+
+Önce: python build_assets.py
+Kullanım: python benchmarks/bench_static.py [--repeat 500]
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import warnings
+
+from bench_utils import ROOT_DIR, summarize, time_calls
+
+warnings.filterwarnings('ignore')
+
+import app as app_module  # noqa: E402
+from static_assets import IMMUTABLE_CACHE_CONTROL, load_static_assets  # noqa: E402
+
+PAGES = ('/', '/chat')
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+
+def page_assets(html):
+    return ['/' + path.lstrip('/') for path in re.findall(r'(?:href|src)="([^"]+\.(?:css|js))"', html)]
+
+
+def load_page(client, page, cache):
+    """
+    Tarayıcı gibi sayfayı ve CSS/JS dosyalarını iste. cache: yol -> (ETag,
+    immutable mı, gövde); dolu ise tekrar ziyaret. Dönüş: (istek sayısı, aktarılan byte)
+    """
+    requests_made, transferred = 0, 0
+
+    def fetch(path):
+        nonlocal requests_made, transferred
+        cached = cache.get(path)
+        if cached and cached[1]:
+            return cached[2]
+        headers = dict(BROWSER_HEADERS)
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        response = client.get(path, headers=headers)
+        body = response.get_data()
+        requests_made += 1
+        transferred += len(body)
+        if response.status_code == 200:
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            cache[path] = (response.headers.get('ETag'),
+                           response.headers.get('Cache-Control') == IMMUTABLE_CACHE_CONTROL, body)
+        response.close()
+        return cache[path][2]
+
+    html = fetch(page).decode('utf-8')
+    for path in page_assets(html):
+        fetch(path)
+    return requests_made, transferred
+
+
+def measure(client, label):
+    cold_requests = cold_bytes = warm_requests = warm_bytes = 0
+    for page in PAGES:
+        cache = {}
+        requests_made, transferred = load_page(client, page, cache)
+        cold_requests, cold_bytes = cold_requests + requests_made, cold_bytes + transferred
+        requests_made, transferred = load_page(client, page, cache)
+        warm_requests, warm_bytes = warm_requests + requests_made, warm_bytes + transferred
+    print(f"{label:<10} first visit: {cold_requests} requests, {cold_bytes:>7,}B | "
+          f"repeat visit: {warm_requests} requests, {warm_bytes:>5,}B (both pages)")
+    return cold_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    assets = app_module.static_assets or load_static_assets(os.path.join(ROOT_DIR, 'frontend', 'dist'))
+    if assets is None:
+        print("frontend/dist bulunamadı, önce: python build_assets.py")
+        return 1
+    client = app_module.app.test_client()
+
+    print("Payload per page load:")
+    app_module.static_assets = None
+    legacy_bytes = measure(client, 'legacy')
+    app_module.static_assets = assets
+    built_bytes = measure(client, 'built')
+    print(f"First-visit payload: {legacy_bytes:,}B -> {built_bytes:,}B ({built_bytes / legacy_bytes:.0%})")
+
+    def get(path):
+        client.get(path, headers=BROWSER_HEADERS).close()
+
+    hashed_js = next(path for path in page_assets(client.get('/').get_data(as_text=True)) if path.endswith('.js'))
+    print("\nStatic request latency (Flask test client, full body):")
+    app_module.static_assets = None
+    summarize('legacy /js/app.js', time_calls(get, [('/js/app.js',)] * args.repeat))
+    summarize('legacy /', time_calls(get, [('/',)] * args.repeat))
+    app_module.static_assets = assets
+    summarize(f'built {hashed_js}', time_calls(get, [(hashed_js,)] * args.repeat))
+    summarize('built /', time_calls(get, [('/',)] * args.repeat))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
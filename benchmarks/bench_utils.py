@@ -0,0 +1,97 @@
+"""
+Benchmark scriptleri için ortak yardımcılar
+Model/scaler yükleme, veri setinden istek kayıtları üretme ve gecikme özetleri
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+DATA_PATH = os.path.join(ROOT_DIR, 'data', 'ObesityDataSet_raw_and_data_sinthetic.csv')
+
+# Backend modülleri düz import edilir (from features import ...)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from features import records_from_dataset  # noqa: E402
+
+
+def free_port() -> int:
+    """Yerel sahte sunucular için boş bir TCP portu"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_ollama(**options):
+    """
+    benchmarks/fake_ollama.py'yi ayrı süreçte başlat ve hazır olmasını bekle.
+
+    options komut satırı argümanlarıdır (ttft=0.5 -> --ttft 0.5).
+    (süreç, temel URL) döndürür; süreç çağıran tarafından sonlandırılır.
+    """
+    port = free_port()
+    command = [sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'fake_ollama.py'), '--port', str(port)]
+    for name, value in options.items():
+        command += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command)
+    url = f'http://127.0.0.1:{port}'
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/tags", timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"Sahte Ollama hazır olmadı: {url}")
+
+
+def load_artifacts():
+    """Eğitilmiş model ve scaler'ı yükle"""
+    model = joblib.load(os.path.join(MODELS_DIR, 'obesity_model.pkl'))
+    scaler = joblib.load(os.path.join(MODELS_DIR, 'scaler.pkl'))
+    return model, scaler
+
+
+def dataset_records(limit=None):
+    """Veri setindeki satırları /predict istek gövdesi formatına çevir"""
+    df = pd.read_csv(DATA_PATH)
+    if limit:
+        df = df.head(limit)
+    return records_from_dataset(df)
+
+
+def time_calls(fn, args_list, repeat=1):
+    """Her çağrının süresini ölç, saniye cinsinden numpy dizisi döndür"""
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def summarize(name, timings):
+    """p50/p99/ortalama gecikmeyi mikro saniye olarak yazdır"""
+    us = timings * 1e6
+    print(f"{name:<28} p50={np.percentile(us, 50):9.1f}us  "
+          f"p99={np.percentile(us, 99):9.1f}us  mean={us.mean():9.1f}us  n={len(us)}")
+    return {
+        'p50_us': float(np.percentile(us, 50)),
+        'p99_us': float(np.percentile(us, 99)),
+        'mean_us': float(us.mean()),
+        'n': int(len(us)),
+    }
@@ -0,0 +1,95 @@
+"""
+What-if taraması: doğruluk kontrolü ve tek geçiş vs ardışık /predict karşılaştırması
+Eski yol: ızgaranın her noktası için ayrı bir /predict isteği (frontend'in
+yapmak zorunda kalacağı gibi). Yeni yol: tek /predict/what-if isteği; bütün
+ızgara tek matriste skorlanır. Izgara olasılıkları ve BMI'lar nokta nokta
+/predict yanıtlarıyla aynı olmalı; aksi halde script hata koduyla çıkar.
+Flask test client üzerinden ölçülür (JSON serileştirme dahil).
+
+Kullanım: python benchmarks/bench_what_if.py [--points 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import sys
+import warnings
+
+import numpy as np
+
+from bench_utils import dataset_records, summarize, time_calls
+
+warnings.filterwarnings('ignore')
+
+import app as app_module  # noqa: E402
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def sweep_body(profile, points):
+    """weight (ve 100'den büyük ızgaralarda faf) ekseni; nokta sayısı yaklaşık points"""
+    if points <= 100:
+        sweep = [{"field": "weight", "min": 40, "max": 160, "steps": points}]
+    else:
+        sweep = [{"field": "weight", "min": 40, "max": 160, "steps": points // 10},
+                 {"field": "faf", "min": 0, "max": 3, "steps": 10}]
+    return {"profile": profile, "sweep": sweep}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--points', type=int, default=1000, help='Izgara noktası sayısı')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    # En küçük değişiklik aramasının da çalışması için kilolu bir profil
+    profile = next(record for record in dataset_records() if record['weight'] >= 100)
+    body = sweep_body(profile, args.points)
+    payload = json.dumps(body).encode()
+
+    response = client.post('/predict/what-if', data=payload, headers=JSON_HEADERS).get_json()
+    if not response.get('success'):
+        print(f"What-if failed: {response.get('error')}")
+        return 1
+    sweep = response['sweep']
+    axes = sweep['axes']
+    grids = np.meshgrid(*(axis['values'] for axis in axes), indexing='ij')
+    points = [dict(profile, **{axis['field']: float(grid.ravel()[i]) for axis, grid in zip(axes, grids)})
+              for i in range(sweep['points'])]
+    shape = ' x '.join(f"{axis['field']}[{len(axis['values'])}]" for axis in axes)
+    print(f"Grid: {shape} = {len(points)} points")
+
+    # Doğruluk: her nokta /predict ile aynı olasılıkları (2 ondalık) ve BMI'ı vermeli
+    probabilities = {name: np.ravel(values) for name, values in sweep['probabilities'].items()}
+    bmi = np.ravel(sweep['bmi'])
+    bodies = [json.dumps(point).encode() for point in points]
+    mismatches = 0
+    for i, point_body in enumerate(bodies):
+        prediction = client.post('/predict', data=point_body, headers=JSON_HEADERS).get_json()['prediction']
+        if (prediction['bmi'] != bmi[i] or
+                any(abs(probabilities[name][i] - value) > 0.005 for name, value in prediction['all_probabilities'].items())):
+            mismatches += 1
+    print(f"what-if vs /predict per point: {mismatches} mismatches")
+    print(f"Smallest change: {sweep['smallest_change']}")
+    print(f"Response size: {len(json.dumps(response)):,}B")
+
+    def post(path, data):
+        client.post(path, data=data, headers=JSON_HEADERS).close()
+
+    def sequential():
+        for point_body in bodies:
+            post('/predict', point_body)
+
+    print()
+    single = summarize('/predict (1 point)', time_calls(post, [('/predict', bodies[0])] * 200))
+    loop = time_calls(sequential, [()], repeat=3)
+    print(f"{'/predict x ' + str(len(bodies)):<28} mean={loop.mean() * 1000:9.1f}ms")
+    what_if = summarize(f'/predict/what-if ({len(points)})',
+                        time_calls(post, [('/predict/what-if', payload)] * args.repeat))
+    print(f"\nSpeedup vs sequential: {loop.mean() * 1e6 / what_if['mean_us']:.0f}x, "
+          f"one sweep = {what_if['mean_us'] / single['mean_us']:.1f} single predictions")
+    return 0 if not mismatches else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Benchmark ve yük testleri için sahte Ollama sunucusu (aiohttp)
+/api/tags, /api/generate ve /api/chat (stream ve non-stream) uçlarını taklit
+eder; ilk token süresi, token hızı, prompt token başına işleme maliyeti ve
+aynı anda işlenen üretim sayısı (gerçek Ollama'daki OLLAMA_NUM_PARALLEL gibi)
+ve hata oranı (üretim isteklerinin bu kadarı HTTP 500 döner) ayarlanabilir.
+
+Prompt maliyeti modeli (token = boşlukla ayrılmış kelime):
+- /api/generate: `context` gönderilmediği için prompt'un tamamı her istekte işlenir
+- /api/chat: mesaj dizisi --cache-slots adet KV cache slotundaki en uzun ortak
+  önekle karşılaştırılır, sadece önekten sonraki tokenlar işlenir
+
+Kullanım: python benchmarks/fake_ollama.py --port 11500 --ttft 0.2 --tokens-per-sec 50 --tokens 100 \
+              [--parallel 2] [--prompt-token-cost 0.002] [--cache-slots 4] [--failure-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+MODEL_NAME = 'llama3.1'
+
+
+def message_tokens(messages):
+    """/api/chat mesajlarını (rol işareti + kelimeler) token dizisine çevir"""
+    tokens = []
+    for message in messages:
+        tokens.append(f"<{message.get('role')}>")
+        tokens.extend(str(message.get('content', '')).split())
+    return tokens
+
+
+def common_prefix(a, b) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def create_fake_ollama(ttft: float = 0.2, tokens_per_sec: float = 50.0, tokens: int = 100,
+                       model_name: str = MODEL_NAME, parallel: int = 0,
+                       prompt_token_cost: float = 0.0, cache_slots: int = 4,
+                       failure_rate: float = 0.0, seed: int = 0) -> web.Application:
+    """
+    Ayarlanabilir gecikmeli sahte Ollama uygulaması
+
+    parallel > 0 ise en fazla bu kadar üretim aynı anda işlenir, fazlası
+    sunucu içinde sırada bekler (istemci açısından yanıt gecikir).
+    İlk token süresi = ttft + prompt_token_cost * işlenen prompt token sayısı.
+    failure_rate: üretim isteklerinin bu oranı ilk token süresinden sonra
+    HTTP 500 ile döner (seed ile tekrarlanabilir).
+    """
+    app = web.Application()
+    app['stats'] = {'generate': 0, 'chat': 0, 'active_streams': 0, 'peak_streams': 0,
+                    'active_generations': 0, 'peak_generations': 0, 'queued': 0, 'peak_queued': 0,
+                    'prompt_tokens': 0, 'prompt_tokens_evaluated': 0, 'failures': 0}
+    token_delay = 1.0 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+    slots = asyncio.Semaphore(parallel) if parallel > 0 else None
+    kv_cache = []  # en son kullanılan sonda: işlenmiş token dizileri
+    rng = random.Random(seed)
+
+    @asynccontextmanager
+    async def generation_slot(stats):
+        stats['queued'] += 1
+        stats['peak_queued'] = max(stats['peak_queued'], stats['queued'])
+        if slots is not None:
+            await slots.acquire()
+        stats['queued'] -= 1
+        stats['active_generations'] += 1
+        stats['peak_generations'] = max(stats['peak_generations'], stats['active_generations'])
+        try:
+            yield
+        finally:
+            stats['active_generations'] -= 1
+            if slots is not None:
+                slots.release()
+
+    def evaluate_prompt(stats, prompt_tokens, use_cache: bool) -> float:
+        """İşlenecek prompt token sayısına göre gecikme; KV cache slotunu güncelle"""
+        cached = 0
+        if use_cache and kv_cache:
+            best = max(range(len(kv_cache)), key=lambda i: common_prefix(kv_cache[i], prompt_tokens))
+            cached = common_prefix(kv_cache[best], prompt_tokens)
+            if cached:
+                kv_cache.pop(best)
+        evaluated = len(prompt_tokens) - cached
+        stats['prompt_tokens'] += len(prompt_tokens)
+        stats['prompt_tokens_evaluated'] += evaluated
+        return prompt_token_cost * evaluated
+
+    def remember(prompt_tokens, reply_words):
+        if cache_slots <= 0:
+            return
+        kv_cache.append(prompt_tokens + ['<assistant>'] + [word.strip() for word in reply_words])
+        del kv_cache[:-cache_slots]
+
+    async def tags(request):
+        return web.json_response({'models': [{'name': f'{model_name}:latest'}]})
+
+    async def respond(request, body, prompt_tokens, use_cache, chunk):
+        """Ortak üretim: prompt işleme gecikmesi + token token yanıt"""
+        stats = request.app['stats']
+        words = [f'kelime{i} ' for i in range(tokens)]
+        # Gerçek Ollama'daki gibi son yanıtta üretim istatistikleri (nanosaniye)
+        eval_stats = {'eval_count': tokens, 'eval_duration': int(token_delay * tokens * 1e9)}
+
+        if failure_rate > 0 and rng.random() < failure_rate:
+            # Ollama model hatası (ör. bellek yetersiz): yanıt başlamadan 500
+            async with generation_slot(stats):
+                await asyncio.sleep(ttft)
+            stats['failures'] += 1
+            return web.json_response({'error': 'simulated model failure'}, status=500)
+
+        if not body.get('stream', True):
+            async with generation_slot(stats):
+                await asyncio.sleep(ttft + evaluate_prompt(stats, prompt_tokens, use_cache) + token_delay * tokens)
+                if use_cache:
+                    remember(prompt_tokens, words)
+            return web.json_response({'model': body.get('model'), **chunk(''.join(words)), 'done': True,
+                                      **eval_stats})
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        stats['active_streams'] += 1
+        stats['peak_streams'] = max(stats['peak_streams'], stats['active_streams'])
+        try:
+            async with generation_slot(stats):
+                await asyncio.sleep(ttft + evaluate_prompt(stats, prompt_tokens, use_cache))
+                for word in words:
+                    await response.write(json.dumps({**chunk(word), 'done': False}).encode() + b'\n')
+                    await asyncio.sleep(token_delay)
+                await response.write(json.dumps({**chunk(''), 'done': True, **eval_stats}).encode() + b'\n')
+                if use_cache:
+                    remember(prompt_tokens, words)
+        finally:
+            stats['active_streams'] -= 1
+        return response
+
+    async def generate(request):
+        body = await request.json()
+        request.app['stats']['generate'] += 1
+        return await respond(request, body, str(body.get('prompt', '')).split(), False,
+                             lambda text: {'response': text})
+
+    async def chat(request):
+        body = await request.json()
+        request.app['stats']['chat'] += 1
+        return await respond(request, body, message_tokens(body.get('messages', [])), True,
+                             lambda text: {'message': {'role': 'assistant', 'content': text}})
+
+    async def stats(request):
+        return web.json_response(request.app['stats'])
+
+    async def reset(request):
+        """Sayaçları ve tepe değerlerini sıfırla (aynı sunucuyla ardışık koşular için)"""
+        stats = request.app['stats']
+        for key in ('generate', 'chat', 'peak_streams', 'peak_generations', 'peak_queued',
+                    'prompt_tokens', 'prompt_tokens_evaluated', 'failures'):
+            stats[key] = 0
+        kv_cache.clear()
+        return web.json_response(stats)
+
+    app.router.add_get('/api/tags', tags)
+    app.router.add_post('/api/generate', generate)
+    app.router.add_post('/api/chat', chat)
+    app.router.add_get('/_stats', stats)
+    app.router.add_get('/_reset', reset)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=11500)
+    parser.add_argument('--ttft', type=float, default=0.2, help='İlk token süresi (saniye)')
+    parser.add_argument('--tokens-per-sec', type=float, default=50.0)
+    parser.add_argument('--tokens', type=int, default=100, help='Yanıt başına token sayısı')
+    parser.add_argument('--parallel', type=int, default=0, help='Aynı anda işlenen üretim sayısı (0: sınırsız)')
+    parser.add_argument('--prompt-token-cost', type=float, default=0.0,
+                        help='İşlenen prompt token başına gecikme (saniye)')
+    parser.add_argument('--cache-slots', type=int, default=4, help='/api/chat KV cache slot sayısı')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='HTTP 500 dönen üretim isteği oranı')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_fake_ollama(args.ttft, args.tokens_per_sec, args.tokens, parallel=args.parallel,
+                             prompt_token_cost=args.prompt_token_cost, cache_slots=args.cache_slots,
+                             failure_rate=args.failure_rate, seed=args.seed)
+    web.run_app(app, host='127.0.0.1', port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
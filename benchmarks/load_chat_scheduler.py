@@ -0,0 +1,100 @@
+"""
+Ollama zamanlayıcısı yük testi: eşzamanlı /api/chat isteği patlaması
+Aynı anda en fazla --parallel üretim işleyen sahte Ollama'yı başlatır ve
+N thread'den aynı anda LlamaHealthBot.generate_chat_response çağırır
+(Flask'ın thread başına isteğini taklit eder). Zamanlayıcı kapalı ve açık
+iki koşuyu karşılaştırır: yanıt süreleri, timeout, fallback sayıları ve
+Ollama'daki eşzamanlı üretim/kuyruk tepe değerleri.
+
+Kullanım: python benchmarks/load_chat_scheduler.py --clients 60 --parallel 2 --ttft 0.5 --tokens 20
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from bench_utils import start_fake_ollama
+
+from llama_integration import LlamaHealthBot, OllamaBusy, OllamaScheduler  # noqa: E402
+
+
+def call(bot: LlamaHealthBot, i: int):
+    """Tek istek: (süre, sonuç türü)"""
+    start = time.perf_counter()
+    try:
+        text = bot.generate_chat_response(f"Soru {i}")
+        outcome = 'llama' if text.startswith('kelime') else 'error'
+    except OllamaBusy:
+        outcome = 'fallback'
+    return time.perf_counter() - start, outcome
+
+
+def run(url: str, clients: int, scheduler, read_timeout: float):
+    requests.get(f"{url}/_reset", timeout=1)
+    bot = LlamaHealthBot(ollama_url=url, pool_size=clients, read_timeout=read_timeout,
+                         max_retries=0, scheduler=scheduler)
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda i: call(bot, i), range(clients)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed, requests.get(f"{url}/_stats", timeout=1).json()
+
+
+def report(name, results, elapsed, server_stats, scheduler):
+    durations = {}
+    for duration, outcome in results:
+        durations.setdefault(outcome, []).append(duration)
+    print(f"\n== {name} ==")
+    print(f"Wall time:               {elapsed:.2f}s")
+    for outcome in ('llama', 'fallback', 'error'):
+        values = np.array(durations.get(outcome, []))
+        if len(values):
+            print(f"{outcome:<10} n={len(values):<4} p50={np.percentile(values, 50):6.2f}s "
+                  f"p99={np.percentile(values, 99):6.2f}s max={values.max():6.2f}s")
+    print(f"Ollama peak generations: {server_stats['peak_generations']} "
+          f"(peak queued inside Ollama: {server_stats['peak_queued']})")
+    if scheduler is not None:
+        stats = scheduler.stats()
+        print(f"Scheduler:               admitted={stats['admitted']} "
+              f"rejected_expected_wait={stats['rejected_expected_wait']} "
+              f"rejected_queue_full={stats['rejected_queue_full']} "
+              f"expired_in_queue={stats['expired_in_queue']} max_queue_depth={stats['max_queue_depth']}")
+        print(f"Queue wait histogram:    {dict(stats['wait_seconds']['buckets'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=60, help='Eşzamanlı istek sayısı')
+    parser.add_argument('--parallel', type=int, default=2, help='Sahte Ollama\'nın paralel üretim sayısı')
+    parser.add_argument('--ttft', type=float, default=0.5)
+    parser.add_argument('--tokens', type=int, default=20)
+    parser.add_argument('--tokens-per-sec', type=float, default=40.0)
+    parser.add_argument('--read-timeout', type=float, default=30.0, help='Ollama okuma timeout\'u (saniye)')
+    parser.add_argument('--budget', type=float, default=5.0, help='Kuyruk bekleme bütçesi (saniye)')
+    args = parser.parse_args()
+
+    server, url = start_fake_ollama(ttft=args.ttft, tokens=args.tokens, tokens_per_sec=args.tokens_per_sec,
+                                    parallel=args.parallel)
+    try:
+        results, elapsed, server_stats = run(url, args.clients, None, args.read_timeout)
+        report('Without scheduler', results, elapsed, server_stats, None)
+
+        scheduler = OllamaScheduler(max_concurrency=args.parallel, max_queue=args.clients,
+                                    default_budget=args.budget)
+        # Servis süresi tahmini ilk tamamlanan isteklerden öğrenilir; ısınma turu
+        run(url, args.parallel, scheduler, args.read_timeout)
+        results, elapsed, server_stats = run(url, args.clients, scheduler, args.read_timeout)
+        report(f'With scheduler (concurrency={args.parallel}, budget={args.budget}s)',
+               results, elapsed, server_stats, scheduler)
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
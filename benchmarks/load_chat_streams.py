@@ -0,0 +1,126 @@
+"""
+Async chat gateway yük testi: çok sayıda eşzamanlı SSE stream
+Sahte Ollama sunucusunu ve backend/async_app.py gateway'ini ayrı süreçlerde
+başlatır, ardından aynı anda N adet /api/chat/stream isteği açar ve
+eşzamanlı açık kalan stream sayısını, ilk chunk ve toplam süreleri raporlar.
+
+Kullanım: python benchmarks/load_chat_streams.py --streams 300 --ttft 0.5 --tokens 50 --tokens-per-sec 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+from bench_utils import BACKEND_DIR, ROOT_DIR, free_port
+
+
+async def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    """Gateway Ollama'yı görene kadar /api/chat/status'u yokla"""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    status = (await response.json())['status']
+                    if status['ollama_running'] and status['model_available']:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Gateway hazır olmadı: {url}")
+
+
+async def run_stream(session, url, state, results):
+    """Tek bir SSE stream'i sonuna kadar oku"""
+    start = time.perf_counter()
+    first_chunk = None
+    chunks = 0
+    async with session.post(url, json={'message': 'Merhaba'}) as response:
+        state['open'] += 1
+        state['peak'] = max(state['peak'], state['open'])
+        try:
+            async for line in response.content:
+                if not line.startswith(b'data: '):
+                    continue
+                event = json.loads(line[6:])
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                if event.get('done'):
+                    break
+                chunks += 1
+        finally:
+            state['open'] -= 1
+    results.append({'ttfc': first_chunk, 'total': time.perf_counter() - start, 'chunks': chunks})
+
+
+async def drive(base_url: str, streams: int):
+    await wait_until_ready(f"{base_url}/api/chat/status")
+
+    state = {'open': 0, 'peak': 0}
+    results = []
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=120)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(run_stream(session, f"{base_url}/api/chat/stream", state, results) for _ in range(streams)),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    return state, results, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--streams', type=int, default=300, help='Eşzamanlı stream sayısı')
+    parser.add_argument('--ttft', type=float, default=0.5)
+    parser.add_argument('--tokens', type=int, default=50)
+    parser.add_argument('--tokens-per-sec', type=float, default=20.0)
+    args = parser.parse_args()
+
+    ollama_port, gateway_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        'OLLAMA_URL': f'http://127.0.0.1:{ollama_port}',
+        'OLLAMA_POOL_SIZE': str(args.streams),
+        'ASYNC_CHAT_PORT': str(gateway_port),
+    }
+    processes = [
+        subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'fake_ollama.py'),
+                          '--port', str(ollama_port), '--ttft', str(args.ttft),
+                          '--tokens', str(args.tokens), '--tokens-per-sec', str(args.tokens_per_sec)]),
+        subprocess.Popen([sys.executable, 'async_app.py'], cwd=BACKEND_DIR, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+    ]
+    try:
+        state, results, failures, elapsed = asyncio.run(drive(f'http://127.0.0.1:{gateway_port}', args.streams))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    ideal = args.ttft + args.tokens / args.tokens_per_sec
+    ttfc = np.array([r['ttfc'] for r in results if r['ttfc'] is not None])
+    total = np.array([r['total'] for r in results])
+    print(f"Streams requested:      {args.streams}")
+    print(f"Streams completed:      {len(results)} (failed: {len(failures)})")
+    print(f"Peak concurrent open:   {state['peak']}")
+    print(f"Wall time:              {elapsed:.2f}s (single stream ideal {ideal:.2f}s)")
+    if len(total):
+        print(f"Time to first chunk:    p50={np.percentile(ttfc, 50):.3f}s p99={np.percentile(ttfc, 99):.3f}s")
+        print(f"Stream duration:        p50={np.percentile(total, 50):.3f}s p99={np.percentile(total, 99):.3f}s")
+        print(f"Chunks per stream:      {int(np.mean([r['chunks'] for r in results]))}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""
+Uçtan uca yük testi: Flask API'sine karışık trafik ve regresyon kontrolü
+Sahte Ollama sunucusunu (ilk token süresi, token hızı ve hata oranı
+ayarlanabilir) ve backend/app.py'yi ayrı süreçlerde başlatır. Ardından
+--concurrency adet istemci thread'i --duration saniye boyunca /predict,
+/quick-predict, /api/chat, /api/chat/stream ve /api/health-recommendations
+uçlarına --mix ağırlıklarıyla istek gönderir (kapalı döngü: her istemci
+yanıtı aldıktan sonra yeni istek atar).
+
+Rapor endpoint bazında throughput, hata oranı ve p50/p95/p99 gecikmeyi
+(stream için ayrıca ilk event süresini) içerir ve --output JSON dosyasına
+yazılır. --baseline verilirse sonuçlar önceki bir raporla karşılaştırılır;
+gecikme veya throughput --threshold oranından fazla kötüleşirse script
+hata koduyla çıkar. API Ollama hatalarını başarılı yanıt içinde döndürdüğü için
+Ollama'ya giden istek başına hata oranı ayrıca uygulamanın ollama_errors_total
+sayacından hesaplanır ve --error-margin ile kontrol edilir. --save-baseline
+raporu baseline olarak kaydeder.
+
+Kullanım: python benchmarks/load_mixed_traffic.py --duration 20 --concurrency 8 \\
+              [--mix predict=40,quick-predict=30,chat=10,chat-stream=10,health-recommendations=10] \\
+              [--ttft 0.05 --tokens-per-sec 200 --tokens 20 --failure-rate 0.05] \\
+              [--output report.json] [--baseline baseline.json [--threshold 0.2]] [--save-baseline baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from bench_utils import BACKEND_DIR, dataset_records, free_port, start_fake_ollama
+from features import QUICK_PREDICT_FIELDS
+
+ENDPOINTS = {
+    'predict': '/predict',
+    'quick-predict': '/quick-predict',
+    'chat': '/api/chat',
+    'chat-stream': '/api/chat/stream',
+    'health-recommendations': '/api/health-recommendations',
+}
+DEFAULT_MIX = 'predict=40,quick-predict=30,chat=10,chat-stream=10,health-recommendations=10'
+
+CHAT_MESSAGES = [
+    'Kilo vermek için nereden başlamalıyım?',
+    'Günde kaç litre su içmeliyim?',
+    'Haftada kaç gün egzersiz yapmalıyım?',
+    'Akşam yemeğinde nelere dikkat etmeliyim?',
+    'Fast food tüketimini nasıl azaltabilirim?',
+]
+
+# Ollama'ya giden uçlar; API Ollama hatalarını 200 ve özür metniyle döndürdüğü için
+# bunların hata oranı uygulamanın ollama_errors_total sayacından hesaplanır
+OLLAMA_ENDPOINTS = ('chat', 'chat-stream', 'health-recommendations')
+
+# Regresyon kontrolünde karşılaştırılan gecikme yüzdelikleri
+CHECKED_PERCENTILES = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def parse_mix(text):
+    """'predict=40,chat=10' -> {'predict': 40.0, 'chat': 10.0}"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name} (choices: {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def start_flask(env_overrides):
+    """backend/app.py'yi debug kapalı başlat ve / yanıt verene kadar bekle"""
+    port = free_port()
+    env = {**os.environ, 'FLASK_PORT': str(port), 'FLASK_DEBUG': '0', **env_overrides}
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Flask uygulaması başlamadı (çıkış kodu {process.returncode})")
+        try:
+            status = requests.get(f"{url}/api/chat/status", timeout=1).json()['status']
+            if status['ollama_running'] and status['model_available']:
+                return process, url
+        except (requests.RequestException, ValueError, KeyError):
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Flask uygulaması hazır olmadı: {url}")
+
+
+class Payloads:
+    """Veri setinden üretilen istek gövdeleri; health/chat bağlamı gerçek /predict yanıtlarından gelir"""
+
+    def __init__(self, url, records, count=50):
+        self.records = records
+        self.quick = [{field: record[field] for field in QUICK_PREDICT_FIELDS} for record in records]
+        self.recommendations = []
+        for record in records[:count]:
+            prediction = requests.post(f"{url}/predict", json=record, timeout=10).json()['prediction']
+            self.recommendations.append({'prediction': prediction, 'user_input': record})
+
+    def body(self, endpoint, rng):
+        if endpoint == 'predict':
+            return rng.choice(self.records)
+        if endpoint == 'quick-predict':
+            return rng.choice(self.quick)
+        if endpoint in ('chat', 'chat-stream'):
+            return {'message': rng.choice(CHAT_MESSAGES),
+                    'context': rng.choice(self.recommendations)['prediction']}
+        return rng.choice(self.recommendations)
+
+
+def send(session, url, endpoint, body):
+    """Tek istek: (süre, ilk event süresi, başarılı mı, fallback mı)"""
+    start = time.perf_counter()
+    if endpoint == 'chat-stream':
+        first_event = None
+        done = False
+        with session.post(url, json=body, stream=True, timeout=120) as response:
+            for line in response.iter_lines():
+                if not line.startswith(b'data: '):
+                    continue
+                if first_event is None:
+                    first_event = time.perf_counter() - start
+                if json.loads(line[6:]).get('done'):
+                    done = True
+                    break
+            ok = response.status_code == 200 and done
+        return time.perf_counter() - start, first_event, ok, False
+
+    response = session.post(url, json=body, timeout=120)
+    elapsed = time.perf_counter() - start
+    try:
+        data = response.json()
+    except ValueError:
+        return elapsed, None, False, False
+    ok = response.status_code == 200 and data.get('success', False)
+    # Ollama kullanılamadığında (hata, kuyruk dolu) temel ipuçlarına düşülen yanıtlar
+    fallback = (endpoint == 'chat' and not data.get('llama_used', True)) or \
+        (endpoint == 'health-recommendations' and not (data.get('personalized', True) or data.get('precomputed')))
+    return elapsed, None, ok, fallback
+
+
+def drive(base_url, payloads, mix, concurrency, duration, seed):
+    """Kapalı döngü istemciler: duration saniye boyunca gönderilen isteklerin örnekleri"""
+    names, weights = list(mix), list(mix.values())
+    samples = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(worker):
+        rng = random.Random(seed + worker)
+        local = []
+        with requests.Session() as session:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                endpoint = rng.choices(names, weights)[0]
+                try:
+                    result = send(session, base_url + ENDPOINTS[endpoint], endpoint, payloads.body(endpoint, rng))
+                except requests.RequestException:
+                    result = (time.perf_counter() - now, None, False, False)
+                local.append((endpoint, *result))
+        with lock:
+            samples.extend(local)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def scrape_counter(url, name):
+    """/metrics'ten bir sayacın örnekleri: {'{kind="http"}': 3.0, ...}"""
+    samples = {}
+    for line in requests.get(f"{url}/metrics", timeout=5).text.splitlines():
+        if line.startswith(name + '{') or line.startswith(name + ' '):
+            labels, _, value = line[len(name):].rpartition(' ')
+            samples[labels or '{}'] = float(value)
+    return samples
+
+
+def percentiles_ms(values):
+    ms = np.array(values) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'mean_ms': round(float(ms.mean()), 3),
+    }
+
+
+def summarize(samples, elapsed, ollama_errors):
+    """
+    Örneklerden endpoint bazında ve toplam rapor. ollama_errors: ölçüm
+    süresince ollama_errors_total artışı; health_check dışındakiler Ollama'ya
+    giden istek başına oran olarak raporlanır
+    """
+    endpoints = {}
+    for name in ENDPOINTS:
+        rows = [sample for sample in samples if sample[0] == name]
+        if not rows:
+            continue
+        durations = [row[1] for row in rows]
+        errors = sum(1 for row in rows if not row[3])
+        summary = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 2),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4),
+            'fallbacks': sum(1 for row in rows if row[4]),
+            **percentiles_ms(durations),
+        }
+        first_events = [row[2] for row in rows if row[2] is not None]
+        if first_events:
+            summary['first_event'] = percentiles_ms(first_events)
+        endpoints[name] = summary
+
+    errors = sum(1 for sample in samples if not sample[3])
+    ollama_requests = sum(1 for sample in samples if sample[0] in OLLAMA_ENDPOINTS)
+    request_errors = sum(value for labels, value in ollama_errors.items() if 'health_check' not in labels)
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        **(percentiles_ms([sample[1] for sample in samples]) if samples else {}),
+        'ollama_requests': ollama_requests,
+        'ollama_errors': int(request_errors),
+        'ollama_error_rate': round(request_errors / ollama_requests, 4) if ollama_requests else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def compare(report, baseline, threshold, min_delta_ms, error_margin):
+    """Baseline'a göre regresyonlar (boş liste: regresyon yok)"""
+    regressions = []
+
+    def check_latency(name, current, previous):
+        for key in CHECKED_PERCENTILES:
+            if key in current and key in previous:
+                limit = max(previous[key] * (1 + threshold), previous[key] + min_delta_ms)
+                if current[key] > limit:
+                    regressions.append(f"{name} {key}: {current[key]:.2f} > {limit:.2f} "
+                                       f"(baseline {previous[key]:.2f})")
+
+    def check_rates(name, current, previous):
+        floor = previous['throughput_rps'] * (1 - threshold)
+        if current['throughput_rps'] < floor:
+            regressions.append(f"{name} throughput_rps: {current['throughput_rps']:.1f} < {floor:.1f} "
+                               f"(baseline {previous['throughput_rps']:.1f})")
+        if current['error_rate'] > previous['error_rate'] + error_margin:
+            regressions.append(f"{name} error_rate: {current['error_rate']:.2%} > "
+                               f"{previous['error_rate'] + error_margin:.2%} (baseline {previous['error_rate']:.2%})")
+
+    check_rates('total', report['results'], baseline['results'])
+    current, previous = report['results'], baseline['results']
+    if 'ollama_error_rate' in current and 'ollama_error_rate' in previous:
+        limit = previous['ollama_error_rate'] + error_margin
+        if current['ollama_error_rate'] > limit:
+            regressions.append(f"ollama error_rate: {current['ollama_error_rate']:.2%} > {limit:.2%} "
+                               f"(baseline {previous['ollama_error_rate']:.2%})")
+    for name, current in report['results']['endpoints'].items():
+        previous = baseline['results']['endpoints'].get(name)
+        if previous is None:
+            continue
+        check_rates(name, current, previous)
+        check_latency(name, current, previous)
+        if 'first_event' in current and 'first_event' in previous:
+            check_latency(f"{name} first_event", current['first_event'], previous['first_event'])
+    return regressions
+
+
+def print_report(results):
+    print(f"\n{'endpoint':<24}{'req':>7}{'rps':>9}{'err':>7}{'fallback':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, summary in results['endpoints'].items():
+        print(f"{name:<24}{summary['requests']:>7}{summary['throughput_rps']:>9.1f}{summary['errors']:>7}"
+              f"{summary['fallbacks']:>10}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}"
+              f"{summary['p99_ms']:>10.2f}")
+        if 'first_event' in summary:
+            first_event = summary['first_event']
+            print(f"{'  first event':<57}{first_event['p50_ms']:>10.2f}{first_event['p95_ms']:>10.2f}"
+                  f"{first_event['p99_ms']:>10.2f}")
+    print(f"{'total':<24}{results['requests']:>7}{results['throughput_rps']:>9.1f}{results['errors']:>7}")
+    print(f"Ollama errors: {results['ollama_errors']} in {results['ollama_requests']} LLM requests "
+          f"({results['ollama_error_rate']:.2%})")
+
+
+def write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    print(f"Wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=20.0, help='Ölçüm süresi (saniye)')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Ölçülmeyen ısınma süresi (saniye)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Eşzamanlı istemci sayısı')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='endpoint=ağırlık listesi')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ttft', type=float, default=0.05, help='Sahte Ollama ilk token süresi (saniye)')
+    parser.add_argument('--tokens-per-sec', type=float, default=200.0)
+    parser.add_argument('--tokens', type=int, default=20, help='Yanıt başına token sayısı')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Sahte Ollama HTTP 500 oranı')
+    parser.add_argument('--response-cache', action='store_true',
+                        help='LLM yanıt önbelleğini açık bırak (sadece sağlık önerileri; varsayılan: kapalı)')
+    parser.add_argument('--output', help='Rapor JSON dosyası')
+    parser.add_argument('--baseline', help='Karşılaştırılacak baseline JSON dosyası')
+    parser.add_argument('--save-baseline', help='Raporu bu dosyaya baseline olarak yaz')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='İzin verilen göreli kötüleşme (0.2: gecikme +%%20, throughput -%%20)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='Bundan küçük mutlak gecikme artışları regresyon sayılmaz (ölçüm gürültüsü)')
+    parser.add_argument('--error-margin', type=float, default=0.02,
+                        help='Hata oranında izin verilen mutlak artış')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    ollama, ollama_url = start_fake_ollama(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, tokens=args.tokens,
+                                           failure_rate=args.failure_rate, seed=args.seed)
+    env = {'OLLAMA_URL': ollama_url, 'OLLAMA_POOL_SIZE': str(max(10, args.concurrency))}
+    if not args.response_cache:
+        env['RESPONSE_CACHE_SIZE'] = '0'
+    processes = [ollama]
+    try:
+        flask, url = start_flask(env)
+        processes.append(flask)
+        payloads = Payloads(url, dataset_records())
+        print(f"Driving {url} for {args.duration:g}s (+{args.warmup:g}s warmup) with "
+              f"{args.concurrency} clients, mix {args.mix}")
+        if args.warmup > 0:
+            drive(url, payloads, mix, args.concurrency, args.warmup, args.seed)
+        # Sayaçlar ısınmadan sonra okunur; hata oranı sadece ölçülen isteklere bölünür
+        requests.get(f"{ollama_url}/_reset", timeout=1)
+        errors_before = scrape_counter(url, 'ollama_errors_total')
+        samples, elapsed = drive(url, payloads, mix, args.concurrency, args.duration, args.seed)
+        ollama_stats = requests.get(f"{ollama_url}/_stats", timeout=1).json()
+        # API Ollama hatalarını başarılı yanıt içinde özür metniyle döndürür; uygulamanın kendi sayacı
+        ollama_errors = {labels: value - errors_before.get(labels, 0)
+                         for labels, value in scrape_counter(url, 'ollama_errors_total').items()}
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'config': {
+            'duration': args.duration, 'warmup': args.warmup, 'concurrency': args.concurrency, 'mix': mix,
+            'seed': args.seed, 'ttft': args.ttft, 'tokens_per_sec': args.tokens_per_sec, 'tokens': args.tokens,
+            'failure_rate': args.failure_rate, 'response_cache': args.response_cache,
+        },
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                        'cpus': os.cpu_count()},
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': summarize(samples, elapsed, ollama_errors),
+        'ollama': {key: ollama_stats.get(key, 0) for key in ('generate', 'chat', 'failures', 'peak_generations')},
+        'app_ollama_errors': ollama_errors,
+    }
+    print_report(report['results'])
+    print(f"Fake Ollama: {report['ollama']}")
+    print(f"App ollama_errors_total during the run: {ollama_errors}")
+
+    if args.output:
+        write_json(args.output, report)
+    if args.save_baseline:
+        write_json(args.save_baseline, report)
+
+    if baseline is None:
+        return 0
+    if baseline.get('config') != report['config']:
+        print("Warning: baseline was recorded with a different configuration; comparison may not be meaningful")
+    regressions = compare(report, baseline, args.threshold, args.min_delta_ms, args.error_margin)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond threshold {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
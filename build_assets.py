@@ -0,0 +1,328 @@
+"""
+Frontend statik dosyalarını yayına hazırla (minify + içerik hash'i + sıkıştırma)
+frontend/ altındaki HTML, CSS ve JS dosyaları küçültülür. CSS/JS dosyaları
+içerik hash'li isimlerle yazılır (css/styles.3f2a9c1b7e.css) ve HTML'deki
+referanslar bu isimlere çevrilir. Her dosya için .gz (ve brotli modülü
+kuruluysa .br) varyantı üretilir; varyant orijinalden küçük değilse yazılmaz.
+
+Çıktı dizinindeki manifest.json backend/static_assets.py tarafından okunur:
+hash'li dosyalar 1 yıl immutable, HTML sayfaları her istekte ETag ile
+doğrulanarak (no-cache) sunulur.
+
+Kullanım: python build_assets.py [--source frontend] [--output frontend/dist] [--no-minify]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+from static_assets import ENCODING_SUFFIXES, MANIFEST_FILE, MANIFEST_VERSION  # noqa: E402
+
+# Hash'lenip referansları güncellenen dosya türleri ve giriş sayfaları
+HASHED_EXTENSIONS = ('.css', '.js')
+PAGE_EXTENSIONS = ('.html',)
+HASH_LENGTH = 10
+# Bundan küçük dosyalar sıkıştırılmaz (başlık maliyeti kazancı geçer)
+MIN_COMPRESS_SIZE = 256
+
+# JS'de bu karakterlerin yanındaki boşluklar atılabilir (+, -, /, . bilerek yok: a - -b, a / /re/)
+_JS_PUNCTUATION = set('{}()[];,:=<>?!&|')
+# Öncesinde / görülürse regex literal başlar (bölme değil)
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^') | {''}
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'yield', 'await')
+
+
+def _minify_js(source):
+    """
+    Ayrıştırıcısız, muhafazakar JS küçültücü: yorumları, satır başı
+    girintilerini, boş satırları ve noktalama çevresindeki boşlukları atar.
+    Satır sonları korunur (ASI davranışı değişmez); string, template literal
+    ve regex içerikleri olduğu gibi kopyalanır.
+    """
+    out = []
+    i, n = 0, len(source)
+    # Template literal içindeki ${...} ifadeleri için yığın: her eleman açık '{' sayısı
+    template_stack = []
+    pending_space = False
+
+    def last_char():
+        return out[-1][-1] if out else ''
+
+    def previous_token():
+        # Son anlamlı karakter veya kelime (regex/bölme ayrımı için)
+        text = ''.join(out[-20:]).rstrip()
+        match = re.search(r'[A-Za-z_$][\w$]*$', text)
+        return match.group(0) if match else text[-1:]
+
+    def emit(text):
+        nonlocal pending_space
+        if pending_space:
+            prev = last_char()
+            if prev not in ('', '\n') and prev not in _JS_PUNCTUATION and text[0] not in _JS_PUNCTUATION:
+                out.append(' ')
+            pending_space = False
+        out.append(text)
+
+    def copy_quoted(start, quote):
+        j = start + 1
+        while j < n and source[j] != quote:
+            j += 2 if source[j] == '\\' else 1
+        return j + 1
+
+    def copy_template(start):
+        # start: açılış backtick'i veya } sonrası; ${ görülünce koda döner
+        j = start
+        while j < n:
+            ch = source[j]
+            if ch == '\\':
+                j += 2
+            elif ch == '`':
+                return j + 1, False
+            elif ch == '$' and j + 1 < n and source[j + 1] == '{':
+                return j + 2, True
+            else:
+                j += 1
+        return j, False
+
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+
+        if ch in ' \t\r':
+            pending_space = True
+            i += 1
+        elif ch == '\n':
+            pending_space = False
+            if out and last_char() != '\n':
+                out.append('\n')
+            i += 1
+        elif ch == '/' and nxt == '/':
+            while i < n and source[i] != '\n':
+                i += 1
+        elif ch == '/' and nxt == '*':
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            pending_space = True
+        elif ch in '\'"':
+            end = copy_quoted(i, ch)
+            emit(source[i:end])
+            i = end
+        elif ch == '`':
+            end, in_expression = copy_template(i + 1)
+            emit(source[i:end])
+            i = end
+            if in_expression:
+                template_stack.append(0)
+        elif ch == '}' and template_stack and template_stack[-1] == 0:
+            template_stack.pop()
+            end, in_expression = copy_template(i + 1)
+            emit(source[i:end])
+            i = end
+            if in_expression:
+                template_stack.append(0)
+        elif ch == '/' and (previous_token() in _REGEX_PRECEDERS or previous_token() in _REGEX_KEYWORDS):
+            j, in_class = i + 1, False
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum() or source[j] == '_'):
+                j += 1
+            emit(source[i:j])
+            i = j
+        else:
+            if template_stack:
+                if ch == '{':
+                    template_stack[-1] += 1
+                elif ch == '}':
+                    template_stack[-1] -= 1
+            emit(ch)
+            i += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def _minify_css(source):
+    """Yorumları ve gereksiz boşlukları at (seçicilerdeki ' :' korunur)"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    source = source.replace(';}', '}')
+    return source.strip() + '\n'
+
+
+def _minify_html(source):
+    """
+    Yorumları, satır başı girintilerini ve boş satırları at. Satır sonları
+    korunur (metin arasındaki boşluk anlamı değişmez); <pre>/<textarea>
+    içerikleri dokunulmadan kalır, satır içi <script> blokları JS olarak küçültülür.
+    """
+    parts = re.split(r'(<(pre|textarea|script)\b[^>]*>.*?</\2>)', source, flags=re.S | re.I)
+    out = []
+    # re.split yakalama grupları: [metin, blok, etiket adı, metin, ...]
+    for index in range(0, len(parts), 3):
+        text = re.sub(r'<!--(?!\[if).*?-->', '', parts[index], flags=re.S)
+        lines = (line.strip() for line in text.split('\n'))
+        out.append('\n'.join(line for line in lines if line))
+        if index + 1 < len(parts):
+            block, tag = parts[index + 1], parts[index + 2].lower()
+            if tag == 'script' and not re.match(r'<script\b[^>]*\bsrc=', block, re.I):
+                open_tag, _, rest = block.partition('>')
+                body, _, _ = rest.rpartition('</')
+                block = f"{open_tag}>\n{_minify_js(body)}</script>"
+            out.append('\n' + block + '\n')
+    return re.sub(r'\n{2,}', '\n', ''.join(out)).strip() + '\n'
+
+
+MINIFIERS = {'.js': _minify_js, '.css': _minify_css, '.html': _minify_html}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, digest):
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{digest}{extension}"
+
+
+def compress_variants(data):
+    """{'gzip': bytes, 'br': bytes}; orijinalden küçük olmayan varyantlar atlanır"""
+    variants = {}
+    if len(data) < MIN_COMPRESS_SIZE:
+        return variants
+    # mtime=0: aynı içerik her build'de aynı byte'ları üretir
+    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+def collect_sources(source_dir, output_dir):
+    """Kaynak dizindeki dosyalar (çıktı dizini hariç), '/' ayraçlı göreli yollarla"""
+    output_dir = os.path.abspath(output_dir)
+    files = []
+    for directory, subdirs, names in os.walk(source_dir):
+        subdirs[:] = sorted(d for d in subdirs
+                            if os.path.abspath(os.path.join(directory, d)) != output_dir and not d.startswith('.'))
+        for name in sorted(names):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(directory, name)
+            files.append(os.path.relpath(path, source_dir).replace(os.sep, '/'))
+    return files
+
+
+def rewrite_references(html, renames):
+    """href="css/styles.css" / src="js/app.js" referanslarını hash'li isimlere çevir"""
+    def replace(match):
+        attribute, quote, target = match.group(1), match.group(2), match.group(3)
+        return f"{attribute}={quote}{renames.get(target.lstrip('/'), target)}{quote}"
+    return re.sub(r'\b(href|src)=(["\'])([^"\']+)\2', replace, html)
+
+
+def build(source_dir, output_dir, minify=True):
+    """Dosyaları geçici dizine yazıp manifest ile birlikte output_dir'in yerine koy"""
+    sources = collect_sources(source_dir, output_dir)
+    contents = {}
+    for path in sources:
+        with open(os.path.join(source_dir, path), 'rb') as f:
+            data = f.read()
+        extension = os.path.splitext(path)[1]
+        if minify and extension in MINIFIERS:
+            data = MINIFIERS[extension](data.decode('utf-8')).encode('utf-8')
+        contents[path] = data
+
+    # Önce CSS/JS hash'lenir, sonra HTML referansları güncellenir
+    renames = {path: hashed_name(path, content_hash(data)) for path, data in contents.items()
+               if path.endswith(HASHED_EXTENSIONS)}
+    for path in contents:
+        if path.endswith(PAGE_EXTENSIONS):
+            contents[path] = rewrite_references(contents[path].decode('utf-8'), renames).encode('utf-8')
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='static_', dir=parent)
+    os.chmod(staging, 0o755)
+    manifest = {'version': MANIFEST_VERSION, 'files': {}}
+    totals = {'source': 0, 'identity': 0, 'gzip': 0, 'br': 0}
+    try:
+        for path, data in contents.items():
+            target = renames.get(path, path)
+            variants = compress_variants(data)
+            for suffix, body in [('', data)] + [(f'.{ENCODING_SUFFIXES[e]}', b) for e, b in variants.items()]:
+                destination = os.path.join(staging, target + suffix)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                with open(destination, 'wb') as f:
+                    f.write(body)
+            manifest['files'][path] = {
+                'path': target,
+                'hash': content_hash(data),
+                'size': len(data),
+                'immutable': path in renames,
+                'encodings': {encoding: len(body) for encoding, body in variants.items()},
+            }
+            totals['source'] += os.path.getsize(os.path.join(source_dir, path))
+            totals['identity'] += len(data)
+            for encoding in ('gzip', 'br'):
+                totals[encoding] += len(variants.get(encoding, variants.get('gzip', data)))
+
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(staging, output_dir)
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+    return manifest, totals
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', default=os.path.join(ROOT_DIR, 'frontend'))
+    parser.add_argument('--output', default=os.environ.get('STATIC_DIST_DIR',
+                                                           os.path.join(ROOT_DIR, 'frontend', 'dist')))
+    parser.add_argument('--no-minify', action='store_true', help='Sadece hash ve sıkıştırma')
+    args = parser.parse_args()
+
+    manifest, totals = build(args.source, args.output, minify=not args.no_minify)
+    for path, entry in manifest['files'].items():
+        encodings = ', '.join(f"{encoding} {size:,}B" for encoding, size in entry['encodings'].items())
+        print(f"{path:<20} -> {entry['path']:<28} {entry['size']:>8,}B  {encodings}")
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        print("brotli modülü kurulu değil, sadece gzip varyantları yazıldı (pip install brotli)")
+    print(f"Total: source {totals['source']:,}B, minified {totals['identity']:,}B, "
+          f"gzip {totals['gzip']:,}B, br {totals['br']:,}B (br yoksa gzip)")
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
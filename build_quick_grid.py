@@ -0,0 +1,119 @@
+"""
+/quick-predict için önceden hesaplanmış olasılık ızgarasını üret
+Registry'deki güncel (veya --version ile verilen) model, gender × age ×
+height × weight ızgarasının her hücresinde QUICK_PREDICT_DEFAULTS yaşam
+tarzı değerleriyle değerlendirilir. Olasılıklar float16, tahmin edilen
+sınıflar uint8 dizisi olarak models/quick_grid/ altına yazılır; backend
+bu dizini açılışta memory-map eder.
+
+Yazmadan önce ızgara dışı (hücreler arası, rastgele) örneklerde nearest ve
+linear aramanın gerçek modelle uyuşma oranı ölçülür; seçilen modun oranı
+--min-agreement altındaysa ızgara yazılmaz.
+
+Kullanım: python build_quick_grid.py [--age 14 61 1] [--height 145 198 1] [--weight 39 173 1]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from model_registry import ModelRegistry
+from quick_grid import (AXES, LOOKUP_MODES, MIN_AGREEMENT, GridAxis, QuickPredictGrid, build_grid, quick_record,
+                        save_grid)
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+
+def axis_from_range(start, end, step):
+    return GridAxis(float(start), float(step), int(round((end - start) / step)) + 1)
+
+
+def agreement(grid, scoring, samples, seed=0):
+    """Izgara aralığında rastgele (hücre dışı) girdilerde ızgara ve modelin aynı sınıfı verme oranı"""
+    rng = np.random.default_rng(seed)
+    genders = list(grid.genders)
+    records = [quick_record(genders[rng.integers(len(genders))],
+                            *(float(rng.uniform(axis.start, axis.end)) for axis in grid.axes))
+               for _ in range(samples)]
+    _, results, _ = scoring.score_records(records)
+
+    start = time.perf_counter()
+    found = [grid.lookup(r['gender'], r['age'], r['height'], r['weight']) for r in records]
+    lookup_us = (time.perf_counter() - start) / samples * 1e6
+    same = sum(grid.names[index] == result.predicted_class for (index, _), result in zip(found, results))
+    max_diff = max(float(np.abs(proba * 100 - [result.probabilities[name] for name in grid.names]).max())
+                   for (_, proba), result in zip(found, results))
+    return same / samples, max_diff, lookup_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--age', type=float, nargs=3, default=(14, 61, 1), metavar=('START', 'END', 'STEP'))
+    parser.add_argument('--height', type=float, nargs=3, default=(145, 198, 1), metavar=('START', 'END', 'STEP'),
+                        help='Santimetre')
+    parser.add_argument('--weight', type=float, nargs=3, default=(39, 173, 1), metavar=('START', 'END', 'STEP'))
+    parser.add_argument('--output', default=os.environ.get('QUICK_PREDICT_GRID', os.path.join(MODELS_DIR, 'quick_grid')))
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY_DIR', os.path.join(MODELS_DIR, 'registry')))
+    parser.add_argument('--version', help='Kullanılacak model sürümü (varsayılan: registry\'deki güncel sürüm)')
+    parser.add_argument('--mode', choices=LOOKUP_MODES, default=os.environ.get('QUICK_PREDICT_GRID_MODE', 'nearest'),
+                        help='Backend\'in kullanacağı arama modu (uyuşma eşiği bu moda uygulanır)')
+    parser.add_argument('--samples', type=int, default=5000, help='Uyuşma ölçümü için rastgele örnek sayısı')
+    parser.add_argument('--min-agreement', type=float, default=MIN_AGREEMENT)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry, engine_name=os.environ.get('INFERENCE_ENGINE', 'flat'),
+                             legacy_dir=MODELS_DIR, poll_interval=0)
+    loaded = registry.load(args.version)
+    scoring = loaded.scoring
+    axes = {name: axis_from_range(*getattr(args, name)) for name in AXES}
+    cells = len(scoring.encoder.categories['gender']) * int(np.prod([axis.size for axis in axes.values()]))
+    print(f"Model version {loaded.version}: evaluating {cells:,} cells "
+          + ' × '.join(f"{name} {axis.start:g}..{axis.end:g}/{axis.step:g}" for name, axis in axes.items()))
+
+    start = time.perf_counter()
+    genders, probabilities, labels = build_grid(scoring, axes)
+    print(f"Grid built in {time.perf_counter() - start:.1f}s")
+
+    # Önce geçici dizine yaz, uyuşma ölçümü geçerse hedefe taşı
+    staging = tempfile.mkdtemp(prefix='quick_grid_', dir=os.path.dirname(os.path.abspath(args.output)))
+    os.chmod(staging, 0o755)
+    try:
+        save_grid(staging, loaded.version, scoring.names, genders, axes, probabilities, labels)
+        size_mb = sum(os.path.getsize(os.path.join(staging, name)) for name in os.listdir(staging)) / 1e6
+        print(f"Grid size: {size_mb:.1f}MB")
+
+        rates = {}
+        for mode in LOOKUP_MODES:
+            grid = QuickPredictGrid.load(staging, mode)
+            if not grid.matches(loaded.version, scoring):
+                raise SystemExit("Grid cells do not match the model, not written")
+            rate, max_diff, lookup_us = agreement(grid, scoring, args.samples)
+            rates[mode] = rate
+            print(f"{mode:<8} agreement with the model on {args.samples} off-grid inputs: {rate:.2%} "
+                  f"(max probability difference {max_diff:.1f} points), lookup {lookup_us:.1f}us")
+
+        if rates[args.mode] < args.min_agreement:
+            raise SystemExit(f"{args.mode} agreement {rates[args.mode]:.2%} is below "
+                             f"{args.min_agreement:.2%}, grid not written (use a finer step)")
+
+        if os.path.exists(args.output):
+            shutil.rmtree(args.output)
+        os.replace(staging, args.output)
+        print(f"Wrote {args.output}")
+    finally:
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Büyük CSV/Parquet dosyaları için toplu skorlama
+Girdi veri seti şemasındadır (data/ObesityDataSet_raw_and_data_sinthetic.csv
+kolonları, Height metre veya cm). Dosya parça parça (--chunk-size) okunur, her
+parça bir süreç havuzunda vektörel olarak encode edilip skorlanır ve sonuçlar
+girdi sırasıyla çıktı dosyasına eklenir. Aynı anda en fazla --max-pending
+parça bellekte tutulur; bellek kullanımı dosya boyutundan bağımsızdır.
+
+Model backend ile aynı şekilde registry'den (yoksa models/*.pkl) yüklenir.
+Çıktı kolonları: row, [--id-column], predicted_class, confidence, bmi,
+p_<sınıf> (yüzde olarak olasılıklar) ve error (geçersiz satırlar için).
+
+Kullanım: python bulk_score.py input.csv predictions.csv [--chunk-size 10000] [--workers 4]
+          python bulk_score.py input.parquet predictions.parquet  (pyarrow gerekir)
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from model_registry import ModelRegistry
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+INVALID_ROW = 'invalid or missing values'
+
+# Worker sürecinin skorlama servisi (init_worker ile bir kez yüklenir)
+_scoring = None
+
+
+def load_model(registry_dir, version=None):
+    registry = ModelRegistry(registry_dir, engine_name=os.environ.get('INFERENCE_ENGINE', 'flat'),
+                             legacy_dir=MODELS_DIR, poll_interval=0)
+    return registry.load(version)
+
+
+def init_worker(registry_dir, version):
+    global _scoring
+    _scoring = load_model(registry_dir, version).scoring
+
+
+def probability_column(name):
+    return f"p_{name.replace(' ', '_')}"
+
+
+def score_chunk(offset, chunk, id_column=None):
+    """Bir parçayı skorla; girdi satır sırasını koruyan çıktı DataFrame'i döndür"""
+    valid, probabilities, bmi = _scoring.score_frame(chunk)
+    n = len(chunk)
+    out = {'row': np.arange(offset, offset + n)}
+    if id_column:
+        out[id_column] = chunk[id_column].to_numpy()
+
+    names = np.array(_scoring.names, dtype=object)
+    predicted = np.full(n, None, dtype=object)
+    confidence = np.full(n, np.nan)
+    all_probabilities = np.full((n, len(names)), np.nan)
+    if len(probabilities):
+        best = probabilities.argmax(axis=1)
+        predicted[valid] = names[best]
+        confidence[valid] = probabilities.max(axis=1) * 100
+        all_probabilities[valid] = probabilities * 100
+
+    out['predicted_class'] = predicted
+    out['confidence'] = np.round(confidence, 1)
+    out['bmi'] = np.where(valid, bmi, np.nan)
+    for i, name in enumerate(names):
+        out[probability_column(name)] = np.round(all_probabilities[:, i], 2)
+    out['error'] = np.where(valid, '', INVALID_ROW)
+    return pd.DataFrame(out)
+
+
+def read_chunks(path, chunk_size):
+    """Girdiyi chunk_size satırlık DataFrame parçaları halinde oku"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet desteği için pyarrow gerekli: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class CsvOutput:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetOutput:
+    """Şema sınıf adlarından baştan kurulur (tamamı geçersiz bir ilk parça null tipli kolon üretmesin)"""
+
+    def __init__(self, path, names, id_column=None, id_type=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet desteği için pyarrow gerekli: pip install pyarrow")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.names = names
+        self.id_column = id_column
+        self.id_type = id_type
+        self.writer = None
+
+    def schema(self, frame):
+        pa = self.pa
+        fields = [pa.field('row', pa.int64())]
+        if self.id_column:
+            id_type = self.id_type
+            if id_type is None:
+                # CSV girdisinde tip, kimlik kolonunun dolu değerlerinden çıkarılır
+                id_type = pa.array(frame[self.id_column].dropna(), from_pandas=True).type
+                if pa.types.is_null(id_type):
+                    id_type = pa.string()
+            fields.append(pa.field(self.id_column, id_type))
+        fields += [pa.field('predicted_class', pa.string()),
+                   pa.field('confidence', pa.float64()),
+                   pa.field('bmi', pa.float64())]
+        fields += [pa.field(probability_column(name), pa.float64()) for name in self.names]
+        fields.append(pa.field('error', pa.string()))
+        return pa.schema(fields)
+
+    def write(self, frame):
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema(frame))
+        self.writer.write_table(self.pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def input_column_type(path, column):
+    """Parquet girdisinde kolonun pyarrow tipi (CSV'de None)"""
+    if not column or not path.endswith('.parquet'):
+        return None
+    import pyarrow.parquet as pq
+    return pq.read_schema(path).field(column).type
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('input', help='Girdi dosyası (.csv veya .parquet)')
+    parser.add_argument('output', help='Çıktı dosyası (.csv veya .parquet)')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help='Parça başına satır sayısı (worker belleği ~ satır x ağaç x sınıf x 8 byte)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Süreç havuzu boyutu (0: ana süreçte skorla)')
+    parser.add_argument('--max-pending', type=int, default=0,
+                        help='Bellekte tutulan en fazla parça (varsayılan: 2 x workers)')
+    parser.add_argument('--id-column', help='Çıktıya kopyalanacak kimlik kolonu')
+    parser.add_argument('--registry', default=os.environ.get('MODEL_REGISTRY_DIR', os.path.join(MODELS_DIR, 'registry')))
+    parser.add_argument('--version', help='Kullanılacak model sürümü (varsayılan: registry\'deki güncel sürüm)')
+    args = parser.parse_args()
+
+    loaded = load_model(args.registry, args.version)
+    print(f"Model version {loaded.version} ({loaded.artifact_format}), validation: {loaded.validation}")
+
+    if args.output.endswith('.parquet'):
+        output = ParquetOutput(args.output, loaded.scoring.names, args.id_column,
+                               input_column_type(args.input, args.id_column))
+    else:
+        output = CsvOutput(args.output)
+    max_pending = args.max_pending or max(2 * args.workers, 2)
+    rows = invalid = chunks = 0
+    start = time.perf_counter()
+
+    def write(frame):
+        nonlocal rows, invalid, chunks
+        output.write(frame)
+        rows += len(frame)
+        invalid += int((frame['error'] != '').sum())
+        chunks += 1
+
+    offsets = 0
+    try:
+        if args.workers <= 0:
+            init_worker(args.registry, loaded.version)
+            for chunk in read_chunks(args.input, args.chunk_size):
+                write(score_chunk(offsets, chunk, args.id_column))
+                offsets += len(chunk)
+        else:
+            with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                                     initargs=(args.registry, loaded.version)) as pool:
+                # Sonuçlar gönderim sırasıyla yazılır; bekleyen parça sayısı sınırlı
+                pending = deque()
+                for chunk in read_chunks(args.input, args.chunk_size):
+                    pending.append(pool.submit(score_chunk, offsets, chunk, args.id_column))
+                    offsets += len(chunk)
+                    while len(pending) >= max_pending:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Scored {rows} rows in {chunks} chunks ({invalid} invalid) in {elapsed:.1f}s: "
+          f"{rows / elapsed if elapsed else 0:,.0f} rows/sec, peak RSS (main process) {peak_rss_mb:.0f}MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
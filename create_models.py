@@ -1,42 +1,170 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
+from joblib import Parallel, delayed
+import argparse
+import io
 import joblib
+import os
+import sys
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
-def create_models():
+# Backend modülleri (düzleştirilmiş orman formatı, registry) eğitim tarafında da kullanılır
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from features import FEATURE_COLUMNS, TARGET_COLUMN, FeatureEncoder, records_from_dataset
+from forest import FlatForest
+from inference import create_engine, save_flat_artifacts
+from model_registry import publish_version
+
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'models/registry')
+HOLDOUT_SIZE = 200
+# Registry'de tutulacak en yeni sürüm sayısı (CURRENT her zaman korunur)
+REGISTRY_KEEP = int(os.environ.get('MODEL_REGISTRY_KEEP', 5))
+
+# --search modunda denenen adaylar (Pipeline'daki 'clf' adımı)
+SEARCH_SPACE = [
+    {
+        'clf': [RandomForestClassifier(random_state=42)],
+        'clf__n_estimators': [50, 100, 200],
+        'clf__max_depth': [None, 12, 20],
+        'clf__max_features': ['sqrt', 0.5],
+    },
+    {
+        'clf': [HistGradientBoostingClassifier(random_state=42)],
+        'clf__max_iter': [100, 200],
+        'clf__learning_rate': [0.1],
+        'clf__max_depth': [None, 6],
+    },
+]
+
+
+def measure_latency(model, X, engine_name, calls=1000, rounds=5):
+    """
+    Sunucudaki inference motoruyla tek satır predict_proba gecikmesi (p50, p99 ms).
+    p99 tek ölçümde birkaç aykırı çağrıya bağlı kalmasın diye rounds tur
+    x calls çağrı yapılır; p99 turların p99'larının medyanı, p50 tüm çağrılardandır.
+    """
+    engine = create_engine(engine_name, model)
+    rows = [X[i % len(X):i % len(X) + 1] for i in range(calls)]
+    for row in rows[:50]:
+        engine.predict_proba(row)
+    timings = np.empty((rounds, calls))
+    for r in range(rounds):
+        for i, row in enumerate(rows):
+            start = time.perf_counter()
+            engine.predict_proba(row)
+            timings[r, i] = time.perf_counter() - start
+    p50 = np.percentile(timings, 50) * 1000
+    p99 = np.median(np.percentile(timings, 99, axis=1)) * 1000
+    return float(p50), float(p99)
+
+
+def model_size(model):
+    """Pickle boyutu ve (düzleştirilebiliyorsa) flat dizilerin boyutu, byte"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    flat = sum(a.nbytes for a in FlatForest.from_sklearn(model).to_arrays().values()) \
+        if FlatForest.supports(model) else None
+    return buffer.tell(), flat
+
+
+def candidate_params(params):
+    """GridSearchCV parametrelerinden ('clf__x' -> 'x') modelin kendi parametreleri"""
+    return {name[len('clf__'):]: value for name, value in params.items() if name != 'clf'}
+
+
+def fit_candidate(params, X_train, y_train):
+    return clone(params['clf']).set_params(**candidate_params(params)).fit(X_train, y_train)
+
+
+def search_models(X_train_scaled, y_train, X_test_scaled, y_test, latency_budget_ms,
+                  cv=5, n_jobs=-1, engine_name='flat', size_budget_mb=None, allow_over_budget=False):
+    """
+    Aday modelleri tüm çekirdeklerde çapraz doğrulama ile değerlendir, her
+    adayı tüm eğitim verisinde yeniden eğitip tek satır gecikmesini ve boyutunu
+    ölç; p99 gecikmesi (ve verilmişse pickle boyutu) bütçeye sığanlar içinden
+    CV doğruluğu en yüksek olanı seç, eşitlikte küçük ve hızlı olanı.
+    Hiçbir aday sığmazsa allow_over_budget olmadan hata koduyla çıkar.
+    Dönüş: (seçilen aday, tüm aday raporları)
+    """
+    search = GridSearchCV(
+        Pipeline([('clf', RandomForestClassifier())]), SEARCH_SPACE, scoring='accuracy',
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=42), n_jobs=n_jobs, refit=False
+    )
+    print(f"Cross-validating {len(ParameterGrid(SEARCH_SPACE))} candidates x {cv} folds (n_jobs={n_jobs})...")
+    search.fit(X_train_scaled, y_train)
+
+    params = search.cv_results_['params']
+    models = Parallel(n_jobs=n_jobs)(delayed(fit_candidate)(p, X_train_scaled, y_train) for p in params)
+
+    # Gecikme ölçümü paralel eğitim bittikten sonra, sırayla yapılır
+    candidates = []
+    for i, (p, model) in enumerate(zip(params, models)):
+        p50, p99 = measure_latency(model, X_test_scaled, engine_name)
+        pickle_bytes, flat_bytes = model_size(model)
+        candidates.append({
+            'model': model,
+            'name': type(model).__name__,
+            'params': candidate_params(p),
+            'cv_accuracy': round(float(search.cv_results_['mean_test_score'][i]), 4),
+            'test_accuracy': round(float(accuracy_score(y_test, model.predict(X_test_scaled))), 4),
+            'latency_p50_ms': round(p50, 4),
+            'latency_p99_ms': round(p99, 4),
+            'pickle_bytes': pickle_bytes,
+            'flat_bytes': flat_bytes,
+        })
+
+    def within_budget(c):
+        return (c['latency_p99_ms'] <= latency_budget_ms and
+                (size_budget_mb is None or c['pickle_bytes'] <= size_budget_mb * 1e6))
+
+    fits = [c for c in candidates if within_budget(c)]
+    if fits:
+        best = max(fits, key=lambda c: (c['cv_accuracy'], -c['pickle_bytes'], -c['latency_p99_ms']))
+    else:
+        best = min(candidates, key=lambda c: (c['latency_p99_ms'], c['pickle_bytes']))
+
+    budget_text = f"{latency_budget_ms}ms p99" + (f" / {size_budget_mb}MB" if size_budget_mb is not None else '')
+    print(f"\n{'model':<32}{'params':<44}{'cv acc':>8}{'test acc':>9}{'p50':>9}{'p99':>9}{'size':>9}")
+    for c in sorted(candidates, key=lambda c: -c['cv_accuracy']):
+        marker = '*' if c is best and (fits or allow_over_budget) else ('' if within_budget(c) else '-')
+        params_text = ', '.join(f"{k}={v}" for k, v in c['params'].items())
+        print(f"{marker + c['name']:<32}{params_text:<44}{c['cv_accuracy']:>8.4f}{c['test_accuracy']:>9.4f}"
+              f"{c['latency_p50_ms']:>7.3f}ms{c['latency_p99_ms']:>7.3f}ms{c['pickle_bytes'] / 1e6:>7.1f}MB")
+    print(f"(* selected, - over the {budget_text} budget)")
+
+    if not fits:
+        if not allow_over_budget:
+            sys.exit(f"No candidate fits the {budget_text} budget; raise the budget or pass --allow-over-budget")
+        print(f"⚠️ No candidate fits the {budget_text} budget, using the fastest one")
+    return best, candidates
+
+
+def create_models(search=False, latency_budget_ms=2.0, cv=5, n_jobs=-1, size_budget_mb=None,
+                  allow_over_budget=False):
     # Veri setini yükle
     print("Loading dataset...")
     df = pd.read_csv('data/ObesityDataSet_raw_and_data_sinthetic.csv')
     print(f"Dataset shape: {df.shape}")
     
-    # Categorical değişkenleri encoding et
-    le_dict = {}  # Her column için ayrı LabelEncoder
-    
-    categorical_cols = ['Gender', 'CALC', 'FAVC', 'SCC', 'SMOKE', 
-                       'family_history_with_overweight', 'CAEC', 'MTRANS']
-    
-    df_encoded = df.copy()
-    
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df_encoded[col] = le.fit_transform(df[col])
-        le_dict[col] = le
-    
-    # Target encoding
-    target_le = LabelEncoder()
-    df_encoded['NObeyesdad'] = target_le.fit_transform(df['NObeyesdad'])
-    
-    # BMI hesapla
-    df_encoded['BMI'] = df_encoded['Weight'] / (df_encoded['Height'] ** 2)
+    # Categorical değişkenleri backend ile ortak encoder üzerinden encoding et:
+    # encoder veri setinden fit edilir, modelle birlikte kaydedilir ve sunucu
+    # istekleri aynı tablolar ve aynı BMI hesabıyla encode eder
+    encoder = FeatureEncoder.fit(df)
+    X_values, _, _, errors = encoder.encode_records(records_from_dataset(df))
+    if errors:
+        raise ValueError(f"Dataset rows could not be encoded: {errors[:3]}")
     
     # Features ve target ayır
-    X = df_encoded.drop('NObeyesdad', axis=1)
-    y = df_encoded['NObeyesdad']
+    X = pd.DataFrame(X_values, columns=FEATURE_COLUMNS, index=df.index)
+    y = pd.Series(encoder.encode_target(df[TARGET_COLUMN]), index=df.index)
     
     # Train-test split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -47,9 +175,20 @@ def create_models():
     X_test_scaled = scaler.transform(X_test)
     
     # Model eğit
-    print("Training Random Forest model...")
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train_scaled, y_train)
+    if search:
+        best, _ = search_models(X_train_scaled, y_train, X_test_scaled, y_test, latency_budget_ms,
+                                cv=cv, n_jobs=n_jobs, engine_name=os.environ.get('INFERENCE_ENGINE', 'flat'),
+                                size_budget_mb=size_budget_mb, allow_over_budget=allow_over_budget)
+        model = best['model']
+        metrics = {'model': best['name'], 'latency_budget_ms': latency_budget_ms, 'size_budget_mb': size_budget_mb,
+                   **{name: best[name] for name in ('params', 'cv_accuracy', 'latency_p50_ms',
+                                                    'latency_p99_ms', 'pickle_bytes')}}
+        print(f"Selected {best['name']} {best['params']}")
+    else:
+        print("Training Random Forest model...")
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model.fit(X_train_scaled, y_train)
+        metrics = {'model': type(model).__name__, 'params': {'n_estimators': model.n_estimators}}
     
     # Test
     y_pred = model.predict(X_test_scaled)
@@ -60,10 +199,26 @@ def create_models():
     print("Saving models...")
     joblib.dump(model, 'models/obesity_model.pkl')
     joblib.dump(scaler, 'models/scaler.pkl')
+    encoder.save('models/encoder.json')
+
+    # Backend'in NumPy inference motoru için düzleştirilmiş orman ve scaler:
+    # .npy dizileri worker'larda joblib.load yerine memory-map ile açılır
+    # (ağaç topluluğu olmayan modeller sklearn ile değerlendirilir)
+    if FlatForest.supports(model):
+        save_flat_artifacts('models/flat', model, scaler)
+
+    # Sunucunun izlediği registry'ye yeni sürüm olarak yayınla; test setinden
+    # alınan holdout örneği yeni sürüm devreye alınmadan önce doğrulamada kullanılır
+    holdout_rows = df.loc[X_test.index[:HOLDOUT_SIZE]]
+    version = publish_version(REGISTRY_DIR, model, scaler, records_from_dataset(holdout_rows),
+                              metrics={**metrics, 'accuracy': round(float(accuracy), 4),
+                                       'train_rows': len(X_train), 'test_rows': len(X_test)},
+                              encoder=encoder, holdout_labels=y_test[:HOLDOUT_SIZE].tolist(),
+                              keep=REGISTRY_KEEP)
+    print(f"Published model version {version} to {REGISTRY_DIR}")
     
-    # Target class mapping'i kaydet
-    class_mapping = dict(zip(target_le.classes_, target_le.transform(target_le.classes_)))
-    reverse_mapping = {v: k for k, v in class_mapping.items()}
+    # Target class mapping (encoder.json içinde modelle birlikte kaydedildi)
+    reverse_mapping = encoder.class_names
     
     print("\nClass mapping:")
     for k, v in reverse_mapping.items():
@@ -73,4 +228,17 @@ def create_models():
     return model, scaler, reverse_mapping
 
 if __name__ == "__main__":
-    create_models()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the obesity model and publish it to the model registry")
+    parser.add_argument('--search', action='store_true',
+                        help='Çapraz doğrulamalı paralel hiperparametre araması yap')
+    parser.add_argument('--latency-budget-ms', type=float, default=2.0,
+                        help='Seçilecek modelin tek satır p99 gecikme bütçesi (ms)')
+    parser.add_argument('--size-budget-mb', type=float, default=None,
+                        help='Seçilecek modelin en büyük pickle boyutu (MB, varsayılan: sınırsız)')
+    parser.add_argument('--allow-over-budget', action='store_true',
+                        help='Hiçbir aday bütçeye sığmazsa hata yerine en hızlı adayı yayınla')
+    parser.add_argument('--cv', type=int, default=5, help='Çapraz doğrulama fold sayısı')
+    parser.add_argument('--jobs', type=int, default=-1, help='Paralel iş sayısı (-1: tüm çekirdekler)')
+    args = parser.parse_args()
+    create_models(search=args.search, latency_budget_ms=args.latency_budget_ms, cv=args.cv, n_jobs=args.jobs,
+                  size_budget_mb=args.size_budget_mb, allow_over_budget=args.allow_over_budget)
\ No newline at end of file
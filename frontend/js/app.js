@@ -80,7 +80,7 @@ function quickPredict() {
  * Full prediction using all form data
  */
 function makePrediction() {
-    const data = {
+    const formData = {
         gender: document.getElementById('gender').value,
         age: parseInt(document.getElementById('age').value),
         height: parseInt(document.getElementById('height').value),
@@ -101,19 +101,19 @@ function makePrediction() {
 
     showLoading(true);
     
-    fetch(`${API_URL}/predict`, {
+    fetch(`${API_URL}/predict?explain=true`, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify(data)
+        body: JSON.stringify(formData)
     })
     .then(response => response.json())
     .then(data => {
         showLoading(false);
         if (data.success) {
-            // Sonucu global değişkende sakla
-            lastPredictionResult = data;
+            // Sonucu ve yaşam tarzı cevaplarını (öneri kovası için) global değişkende sakla
+            lastPredictionResult = { ...data, user_input: formData };
             
             let probabilities = '';
             for (const [className, prob] of Object.entries(data.prediction.all_probabilities)) {
@@ -273,7 +273,8 @@ async function getQuickRecommendations() {
             },
             body: JSON.stringify({
                 prediction: lastPredictionResult.prediction,
-                user_input: lastPredictionResult.input_data
+                // Hızlı tahminde yaşam tarzı cevapları yoktur, sadece temel bilgiler gider
+                user_input: lastPredictionResult.user_input || lastPredictionResult.input_data
             })
         });
         
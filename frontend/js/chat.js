@@ -3,12 +3,13 @@
  * Streaming chat, mesaj yönetimi ve sağlık verisi entegrasyonu
  */
 
-// API ayarları
-const API_BASE_URL = 'http://localhost:5000';
+// API ayarları (async chat gateway kullanılıyorsa window.CHAT_API_BASE_URL ile değiştirilebilir)
+const API_BASE_URL = window.CHAT_API_BASE_URL || 'http://localhost:5000';
 const CHAT_ENDPOINTS = {
     status: `${API_BASE_URL}/api/chat/status`,
     chat: `${API_BASE_URL}/api/chat`,
     stream: `${API_BASE_URL}/api/chat/stream`,
+    sessions: `${API_BASE_URL}/api/chat/sessions`,
     recommendations: `${API_BASE_URL}/api/health-recommendations`
 };
 
@@ -17,6 +18,8 @@ let isTyping = false;
 let currentStream = null;
 let healthContext = window.healthContext || null;
 let chatHistory = [];
+// Sunucu tarafı sohbet oturumu (çok turlu konuşma geçmişi backend'de tutulur)
+let chatSessionId = null;
 
 // DOM elementleri
 let chatMessages, chatInput, sendButton, statusDot, statusText;
@@ -222,7 +225,8 @@ async function getStreamingResponse(message, context = null) {
     
     const requestBody = {
         message: message,
-        context: context || healthContext
+        context: context || healthContext,
+        session_id: chatSessionId
     };
     
     try {
@@ -249,14 +253,17 @@ async function getStreamingResponse(message, context = null) {
         const reader = response.body.getReader();
         const decoder = new TextDecoder();
         let fullResponse = '';
+        // Sunucu birden çok token'ı tek frame'de gönderebilir; yarım kalan frame sonraki okumayı bekler
+        let pending = '';
         
         while (true) {
             const { done, value } = await reader.read();
             
             if (done) break;
             
-            const chunk = decoder.decode(value);
-            const lines = chunk.split('\n');
+            pending += decoder.decode(value, { stream: true });
+            const lines = pending.split('\n');
+            pending = lines.pop();
             
             for (let line of lines) {
                 if (line.startsWith('data: ')) {
@@ -276,6 +283,9 @@ async function getStreamingResponse(message, context = null) {
                             }
                             
                             if (data.done) {
+                                if (data.session_id) {
+                                    chatSessionId = data.session_id;
+                                }
                                 break;
                             }
                             
@@ -319,7 +329,8 @@ async function getStreamingResponse(message, context = null) {
 async function getFallbackResponse(message, context = null) {
     const requestBody = {
         message: message,
-        context: context || healthContext
+        context: context || healthContext,
+        session_id: chatSessionId
     };
     
     const response = await fetch(CHAT_ENDPOINTS.chat, {
@@ -337,6 +348,9 @@ async function getFallbackResponse(message, context = null) {
     const data = await response.json();
     
     if (data.success) {
+        if (data.session_id) {
+            chatSessionId = data.session_id;
+        }
         addMessage('assistant', data.response);
         
         chatHistory.push({
@@ -448,6 +462,7 @@ function saveChatHistory() {
     try {
         localStorage.setItem('obesityChat_history', JSON.stringify(chatHistory));
         localStorage.setItem('obesityChat_context', JSON.stringify(healthContext));
+        localStorage.setItem('obesityChat_session', chatSessionId || '');
     } catch (error) {
         console.warn('Chat geçmişi kaydedilemedi:', error);
     }
@@ -460,6 +475,7 @@ function loadChatHistory() {
     try {
         const savedHistory = localStorage.getItem('obesityChat_history');
         const savedContext = localStorage.getItem('obesityChat_context');
+        chatSessionId = localStorage.getItem('obesityChat_session') || null;
         
         if (savedHistory) {
             chatHistory = JSON.parse(savedHistory);
@@ -520,6 +536,13 @@ function clearChat() {
         healthContext = null;
         localStorage.removeItem('obesityChat_history');
         localStorage.removeItem('obesityChat_context');
+        localStorage.removeItem('obesityChat_session');
+        
+        // Sunucudaki oturumu da kapat
+        if (chatSessionId) {
+            fetch(`${CHAT_ENDPOINTS.sessions}/${chatSessionId}`, { method: 'DELETE' }).catch(() => {});
+            chatSessionId = null;
+        }
         
         // Sadece welcome message'ı bırak
         const messages = chatMessages.querySelectorAll('.message:not(:first-child)');
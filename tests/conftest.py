@@ -0,0 +1,13 @@
+"""
+Testler için ortak ayarlar
+Backend modülleri düz import edilir (from features import ...), bu yüzden
+backend/ dizini sys.path'e eklenir.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,155 @@
+"""
+Tahmin yollarının eşdeğerliği
+Eski yol (dict -> pd.DataFrame -> scaler.transform -> model.predict_proba,
+eğitimdeki LabelEncoder kodlarıyla) referanstır. RowPredictor, ScoringService
+ve düzleştirilmiş orman motoru (INFERENCE_ENGINE=flat) aynı ölçekli satırları
+ve aynı olasılıkları üretmelidir.
+"""
+
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT_DIR
+from features import FEATURE_COLUMNS, records_from_dataset
+from forest import FlatForest
+from inference import BATCH_ENGINE_MIN_ROWS, RowPredictor, ScoringService, create_engine
+
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+DATA_PATH = os.path.join(ROOT_DIR, 'data', 'ObesityDataSet_raw_and_data_sinthetic.csv')
+N_ROWS = 200
+
+ORDINAL_CODES = {'always': 0, 'frequently': 1, 'sometimes': 2, 'no': 3}
+MTRANS_CODES = {'automobile': 0, 'bike': 1, 'motorbike': 2, 'public_transportation': 3, 'walking': 4}
+
+
+def legacy_features(data):
+    """
+    Referans satır: eğitimde LabelEncoder'ın veri setinden ürettiği kodlarla
+    (ORDINAL_CODES, MTRANS_CODES, alfabetik sıra) elle kurulan tek satırlık
+    DataFrame. Eski app.py'deki process_input_data'nın tabloları bu kodlardan
+    farklıydı, bu yüzden referans o değil, eğitimdeki encoding'dir.
+    """
+    height = data['height'] / 100 if data['height'] > 10 else data['height']
+    bmi = data['weight'] / (height ** 2)
+
+    def yes(field):
+        return 1 if data[field].lower() == 'yes' else 0
+
+    features = {
+        'Age': data['age'],
+        'Gender': 1 if data['gender'].lower() == 'male' else 0,
+        'Height': height,
+        'Weight': data['weight'],
+        'CALC': ORDINAL_CODES[data['calc'].lower()],
+        'FAVC': yes('favc'),
+        'FCVC': data['fcvc'],
+        'NCP': data['ncp'],
+        'SCC': yes('scc'),
+        'SMOKE': yes('smoke'),
+        'CH2O': data['ch2o'],
+        'family_history_with_overweight': yes('family_history'),
+        'FAF': data['faf'],
+        'TUE': data['tue'],
+        'CAEC': ORDINAL_CODES[data['caec'].lower()],
+        'MTRANS': MTRANS_CODES[data['mtrans'].lower()],
+        'BMI': bmi
+    }
+    return pd.DataFrame([features])[FEATURE_COLUMNS], round(bmi, 2)
+
+
+@pytest.fixture(scope='module')
+def artifacts():
+    with warnings.catch_warnings():
+        # Pickle farklı bir sklearn sürümüyle kaydedilmiş olabilir
+        warnings.simplefilter('ignore')
+        model = joblib.load(os.path.join(MODELS_DIR, 'obesity_model.pkl'))
+        scaler = joblib.load(os.path.join(MODELS_DIR, 'scaler.pkl'))
+    return model, scaler
+
+
+@pytest.fixture(scope='module')
+def records():
+    return records_from_dataset(pd.read_csv(DATA_PATH).sample(N_ROWS, random_state=0))
+
+
+@pytest.fixture(scope='module')
+def expected(artifacts, records):
+    """Eski yolun ölçekli satırları, olasılıkları ve BMI'ları"""
+    model, scaler = artifacts
+    rows, probabilities, bmi = [], [], []
+    for data in records:
+        frame, row_bmi = legacy_features(data)
+        scaled = scaler.transform(frame)
+        rows.append(scaled[0])
+        probabilities.append(model.predict_proba(scaled)[0])
+        bmi.append(row_bmi)
+    return np.array(rows), np.array(probabilities), bmi
+
+
+def test_row_predictor_scaled_rows_match_scaler_transform(artifacts, records, expected):
+    model, scaler = artifacts
+    predictor = RowPredictor(model, scaler)
+    for data, expected_row, expected_bmi in zip(records, expected[0], expected[2]):
+        row, bmi = predictor.transform(data)
+        np.testing.assert_array_equal(row[0], expected_row)
+        assert bmi == expected_bmi
+
+
+@pytest.mark.parametrize('engine_name', ['sklearn', 'flat'])
+def test_row_predictor_probabilities_match_legacy_path(artifacts, records, expected, engine_name):
+    model, scaler = artifacts
+    predictor = RowPredictor(create_engine(engine_name, model), scaler)
+    for data, expected_proba in zip(records, expected[1]):
+        proba, _ = predictor.predict_proba(data)
+        np.testing.assert_array_equal(proba, expected_proba)
+
+
+@pytest.mark.parametrize('engine_name', ['sklearn', 'flat'])
+def test_scoring_service_matches_legacy_path(artifacts, records, expected, engine_name):
+    model, scaler = artifacts
+    service = ScoringService(create_engine(engine_name, model), scaler)
+    _, probabilities, bmi = expected
+    classes = list(model.classes_)
+
+    def check(result, proba, row_bmi):
+        best = int(np.argmax(proba))
+        assert result.class_label == classes[best]
+        assert result.confidence == pytest.approx(proba[best] * 100, abs=1e-9)
+        assert result.bmi == row_bmi
+        assert list(result.probabilities.values()) == pytest.approx(list(proba * 100), abs=1e-9)
+
+    for data, proba, row_bmi in zip(records, probabilities, bmi):
+        check(service.score(data), proba, row_bmi)
+
+    # Toplu yol: tüm kayıtlar tek matriste
+    valid_index, results, errors = service.score_records(records)
+    assert valid_index == list(range(len(records))) and not errors
+    for result, proba, row_bmi in zip(results, probabilities, bmi):
+        check(result, proba, row_bmi)
+
+
+def test_flat_forest_matches_sklearn_on_batches(artifacts, expected):
+    model, _ = artifacts
+    X = expected[0]
+    np.testing.assert_array_equal(FlatForest.from_sklearn(model).predict_proba(X), model.predict_proba(X))
+
+
+def test_large_matrices_dispatch_to_batch_engine(artifacts, records, expected):
+    model, scaler = artifacts
+    loads = []
+    service = ScoringService(create_engine('flat', model), scaler,
+                             batch_engine=lambda: loads.append(1) or model)
+    assert service.engine_for(1) is service.engine
+    assert service.engine_for(BATCH_ENGINE_MIN_ROWS) is model
+    assert service.engine_for(BATCH_ENGINE_MIN_ROWS + 1) is model and len(loads) == 1
+
+    # Eşiğin üstündeki toplu skorlama da eski yolla aynı sonucu vermeli
+    many = (records * (BATCH_ENGINE_MIN_ROWS // len(records) + 1))[:BATCH_ENGINE_MIN_ROWS]
+    _, results, _ = service.score_records(many)
+    for result, proba in zip(results, np.tile(expected[1], (len(many) // len(records) + 1, 1))):
+        assert list(result.probabilities.values()) == pytest.approx(list(proba * 100), abs=1e-9)
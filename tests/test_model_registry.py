@@ -0,0 +1,97 @@
+"""
+Model registry: doğruluk kapısı ve eski sürümlerin silinmesi
+Holdout gerçek sınıfları eski modelin kendi tahminleridir (doğruluk 1.0);
+sabit sınıf tahmin eden model aynı holdout'ta geriler ve devreye alınmamalı.
+"""
+
+import os
+import shutil
+import warnings
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from conftest import ROOT_DIR
+from features import records_from_dataset
+from inference import BATCH_ENGINE_MIN_ROWS, ScoringService
+from model_registry import CURRENT_FILE, ModelRegistry, publish_version
+
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+DATA_PATH = os.path.join(ROOT_DIR, 'data', 'ObesityDataSet_raw_and_data_sinthetic.csv')
+
+
+@pytest.fixture(scope='module')
+def holdout():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model = joblib.load(os.path.join(MODELS_DIR, 'obesity_model.pkl'))
+        scaler = joblib.load(os.path.join(MODELS_DIR, 'scaler.pkl'))
+    records = records_from_dataset(pd.read_csv(DATA_PATH).sample(100, random_state=0))
+    scoring = ScoringService(model, scaler)
+    _, results, _ = scoring.score_records(records)
+    labels = [result.class_label for result in results]
+
+    X = scoring.encoder.encode_records(records)[0]
+    scoring.rows.scale_in_place(X)
+    constant = DummyClassifier(strategy='most_frequent').fit(X, labels)
+    return model, constant, scaler, records, labels
+
+
+def test_accuracy_regression_is_rejected(tmp_path, holdout):
+    model, constant, scaler, records, labels = holdout
+    root = str(tmp_path)
+    registry = ModelRegistry(root, poll_interval=0)
+
+    publish_version(root, model, scaler, records, version='v1', holdout_labels=labels)
+    assert registry.check()
+    assert registry.active.validation['accuracy'] == 1.0
+
+    publish_version(root, constant, scaler, records, version='v2', holdout_labels=labels)
+    assert not registry.check()
+    assert registry.active.version == 'v1'
+    assert 'regressed' in registry.status()['rejected_versions']['v2']
+
+
+def test_minimum_accuracy_is_enforced(tmp_path, holdout):
+    _, constant, scaler, records, labels = holdout
+    root = str(tmp_path)
+    publish_version(root, constant, scaler, records, version='v1', holdout_labels=labels)
+
+    registry = ModelRegistry(root, poll_interval=0, min_accuracy=0.9)
+    assert not registry.check()
+    assert 'below threshold' in registry.status()['rejected_versions']['v1']
+
+
+def test_publish_keeps_newest_versions_and_current(tmp_path, holdout):
+    _, constant, scaler, records, labels = holdout
+    root = str(tmp_path)
+    publish_version(root, constant, scaler, records, version='v1')
+    for version in ['v2', 'v3', 'v4']:
+        publish_version(root, constant, scaler, records, version=version, activate=False, keep=2)
+
+    assert sorted(name for name in os.listdir(root) if name != CURRENT_FILE) == ['v1', 'v3', 'v4']
+
+
+def test_publishes_in_the_same_second_get_distinct_versions(tmp_path, holdout):
+    _, constant, scaler, records, _ = holdout
+    root = str(tmp_path)
+    versions = [publish_version(root, constant, scaler, records, activate=False) for _ in range(3)]
+    assert len(set(versions)) == 3
+    with pytest.raises(FileExistsError):
+        publish_version(root, constant, scaler, records, version=versions[0])
+
+
+def test_serving_survives_pruning_of_its_version(tmp_path, holdout):
+    model, _, scaler, records, labels = holdout
+    root = str(tmp_path)
+    publish_version(root, model, scaler, records, version='v1', holdout_labels=labels)
+    registry = ModelRegistry(root, poll_interval=0)
+    assert registry.check()
+
+    # Sunucunun hizmet verdiği sürüm silinir; büyük matris asıl motora düşer
+    shutil.rmtree(os.path.join(root, 'v1'))
+    batch = records * (BATCH_ENGINE_MIN_ROWS // len(records) + 1)
+    _, results, errors = registry.active.scoring.score_records(batch)
+    assert not errors and len(results) == len(batch)
@@ -0,0 +1,66 @@
+"""
+Quick-predict ızgarası: ızgara dışı (hücreler arası) girdilerde
+QuickPredictGrid.predict ile ScoringService aynı sınıfı en az MIN_AGREEMENT
+oranında vermeli. Testte veri setinin yoğun bölgesini kapsayan küçük bir
+ızgara varsayılan adımlarla (1 yıl/1 cm/1 kg) kurulur.
+"""
+
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+from conftest import ROOT_DIR
+from features import DEFAULT_ENCODER
+from inference import ScoringService
+from quick_grid import LOOKUP_MODES, MIN_AGREEMENT, GridAxis, QuickPredictGrid, build_grid, save_grid
+from schema import quick_predict_schema
+
+MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+VERSION = 'test'
+N_SAMPLES = 500
+AXES = {'age': GridAxis(18.0, 1.0, 15), 'height': GridAxis(155.0, 1.0, 31), 'weight': GridAxis(50.0, 1.0, 71)}
+
+
+@pytest.fixture(scope='module')
+def scoring():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model = joblib.load(os.path.join(MODELS_DIR, 'obesity_model.pkl'))
+        scaler = joblib.load(os.path.join(MODELS_DIR, 'scaler.pkl'))
+    return ScoringService(model, scaler)
+
+
+@pytest.fixture(scope='module')
+def grid_dir(tmp_path_factory, scoring):
+    directory = str(tmp_path_factory.mktemp('quick_grid'))
+    genders, probabilities, labels = build_grid(scoring, AXES)
+    save_grid(directory, VERSION, scoring.names, genders, AXES, probabilities, labels)
+    return directory
+
+
+def off_grid_requests(seed=0):
+    """/quick-predict şemasından geçmiş, hücre merkezlerine denk gelmeyen istekler"""
+    rng = np.random.default_rng(seed)
+    schema = quick_predict_schema(DEFAULT_ENCODER)
+    requests = []
+    for _ in range(N_SAMPLES):
+        body = {'gender': str(rng.choice(['Male', 'Female']))}
+        body.update({name: round(float(rng.uniform(axis.start, axis.end)), 2) for name, axis in AXES.items()})
+        data, errors = schema.validate(body)
+        assert not errors
+        requests.append(data)
+    return requests
+
+
+@pytest.mark.parametrize('mode', LOOKUP_MODES)
+def test_grid_agrees_with_model_off_grid(grid_dir, scoring, mode):
+    grid = QuickPredictGrid.load(grid_dir, mode)
+    same = 0
+    for data in off_grid_requests():
+        result = grid.predict(VERSION, scoring, data)
+        assert result is not None
+        same += result.predicted_class == scoring.score(data).predicted_class
+    assert same / N_SAMPLES >= MIN_AGREEMENT
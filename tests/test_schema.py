@@ -0,0 +1,20 @@
+"""
+İstek şemaları: /quick-predict sadece gender/age/height/weight'e bağlıdır
+"""
+
+from features import DEFAULT_ENCODER, QUICK_PREDICT_DEFAULTS
+from schema import quick_predict_schema
+
+QUICK_BODY = {'gender': 'Male', 'age': 30, 'height': 175, 'weight': 70}
+
+
+def test_quick_predict_applies_defaults():
+    data, errors = quick_predict_schema(DEFAULT_ENCODER).validate(QUICK_BODY)
+    assert not errors
+    assert data == {'gender': 'male', 'age': 30, 'height': 175, 'weight': 70, **QUICK_PREDICT_DEFAULTS}
+
+
+def test_quick_predict_ignores_client_lifestyle_fields():
+    schema = quick_predict_schema(DEFAULT_ENCODER)
+    body = dict(QUICK_BODY, faf=3, family_history='yes', favc='yes', mtrans='walking')
+    assert schema.validate(body) == schema.validate(QUICK_BODY)
@@ -0,0 +1,154 @@
+"""
+Sık görülen profil kovaları için sağlık önerilerini önceden üret
+Veri seti model ile skorlanır, (tahmin sınıfı, BMI aralığı, aile geçmişi,
+FAVC, aktivite) kovaları sıklığa göre seçilir ve her kova için yerel Ollama
+modeliyle LlamaHealthBot.get_health_recommendations metni üretilir.
+Sonuç backend'in açılışta memory-map ettiği models/recommendations.idx dosyasıdır.
+
+Kullanım: python warm_recommendations.py [--coverage 0.95] [--max-buckets 300] [--model llama3.1]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import requests
+
+warnings.filterwarnings('ignore')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from features import load_encoder, records_from_dataset
+from inference import ScoringService
+from llama_integration import LlamaHealthBot, OllamaError, RECOMMENDATION_MESSAGE
+from recommendation_index import UNKNOWN, bucket_key, write_index
+
+
+def score_dataset(model, scaler, encoder):
+    """Veri setini modelle skorla: (istek kayıtları, tahmin sonuçları)"""
+    df = pd.read_csv('data/ObesityDataSet_raw_and_data_sinthetic.csv')
+    records = records_from_dataset(df)
+    _, results, _ = ScoringService(model, scaler, encoder).score_records(records)
+    return records, results
+
+
+def representative_context(rows):
+    """Kovadaki satırların medyan/mod değerleriyle temsili (prediction_data, user_input)"""
+    records, results = zip(*rows)
+    first = records[0]
+    prediction_data = {
+        'predicted_class': results[0].predicted_class,
+        'bmi': round(float(np.median([r.bmi for r in results])), 2),
+        'confidence': round(float(np.median([r.confidence for r in results])), 1)
+    }
+    user_input = {
+        'age': int(np.median([r['age'] for r in records])),
+        'gender': Counter(r['gender'] for r in records).most_common(1)[0][0],
+        'height': int(np.median([r['height'] for r in records])),
+        'weight': int(np.median([r['weight'] for r in records])),
+    }
+    return prediction_data, user_input, first
+
+
+def select_buckets(records, results, coverage, max_buckets):
+    """
+    Veri setindeki sıklığa göre kovaları seç.
+
+    Ön yüz yaşam tarzı alanlarını göndermediği için her (sınıf, BMI aralığı)
+    çifti bir de 'unknown' yaşam tarzı kovasıyla temsil edilir.
+    """
+    full = defaultdict(list)
+    basic = defaultdict(list)
+    for record, result in zip(records, results):
+        prediction = {'predicted_class': result.predicted_class, 'bmi': result.bmi}
+        full[bucket_key(prediction, record)].append((record, result))
+        basic[bucket_key(prediction, {})].append((record, result))
+
+    selected = {}
+    for key, rows in basic.items():
+        prediction_data, user_input, _ = representative_context(rows)
+        selected[key] = (prediction_data, user_input, len(rows))
+
+    covered = 0
+    for key, rows in sorted(full.items(), key=lambda item: -len(item[1])):
+        if covered / len(records) >= coverage or len(selected) >= max_buckets:
+            break
+        prediction_data, user_input, first = representative_context(rows)
+        user_input.update({field: first[field] for field in ('family_history', 'favc')})
+        user_input['faf'] = float(np.median([record['faf'] for record, _ in rows]))
+        selected[key] = (prediction_data, user_input, len(rows))
+        covered += len(rows)
+
+    return selected, covered / len(records)
+
+
+def generate(bot, key, prediction_data, user_input):
+    """Kova için öneri metni üret (önbellek ve fallback olmadan, hatada exception)"""
+    context = bot.format_health_context(prediction_data, user_input)
+    payload = bot.build_payload(bot.build_prompt(RECOMMENDATION_MESSAGE, context), stream=False)
+    return key, bot.request_generation(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ollama-url', default=os.environ.get('OLLAMA_URL', 'http://localhost:11434'))
+    parser.add_argument('--model', default=os.environ.get('OLLAMA_MODEL', 'llama3.1'))
+    parser.add_argument('--coverage', type=float, default=0.95, help='Kapsanacak veri seti oranı')
+    parser.add_argument('--max-buckets', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=1, help='Ollama\'ya paralel istek sayısı')
+    parser.add_argument('--output', default='models/recommendations.idx')
+    args = parser.parse_args()
+
+    model = joblib.load('models/obesity_model.pkl')
+    scaler = joblib.load('models/scaler.pkl')
+    records, results = score_dataset(model, scaler, load_encoder('models/encoder.json'))
+    buckets, coverage = select_buckets(records, results, args.coverage, args.max_buckets)
+    print(f"Selected {len(buckets)} buckets covering {coverage:.1%} of dataset rows "
+          f"(plus one '{UNKNOWN}' lifestyle bucket per class/BMI band)")
+
+    bot = LlamaHealthBot(ollama_url=args.ollama_url, model_name=args.model,
+                         read_timeout=300, pool_size=max(args.workers, 1))
+    if not (bot.check_ollama_status() and bot.check_model_availability()):
+        print(f"❌ Ollama veya '{args.model}' modeli erişilebilir değil: {args.ollama_url}")
+        return 1
+
+    texts = {}
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(generate, bot, key, prediction_data, user_input)
+                   for key, (prediction_data, user_input, _) in buckets.items()]
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                key, text = future.result()
+            except (requests.RequestException, OllamaError) as e:
+                failed += 1
+                print(f"  [{i}/{len(futures)}] failed: {e}")
+                continue
+            if text:
+                texts[key] = text
+                print(f"  [{i}/{len(futures)}] {key}")
+            else:
+                failed += 1
+
+    write_index(args.output, texts, {
+        'model_name': args.model,
+        'generated_at': datetime.now().isoformat(),
+        'buckets': len(texts),
+        'dataset_coverage': round(coverage, 4)
+    })
+    print(f"\nWrote {len(texts)} recommendations to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.1f} KB, {failed} failed, "
+          f"{time.perf_counter() - start:.0f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())